@@ -0,0 +1,144 @@
+# Side-by-side benchmark of the registered algorithm modules.
+# Runs walk-forward on the same data for each algorithm and reports fit time, predict time and MAE.
+#
+# Usage (from the 03-ml directory):
+#   python benchmarks/compare_algorithms.py                          # all algorithms, h1, last 5 folds
+#   python benchmarks/compare_algorithms.py --horizon 2 --last-folds 10
+#   python benchmarks/compare_algorithms.py --algorithms random_forest hist_gradient_boosting
+#   python benchmarks/compare_algorithms.py --synthetic 3             # offline, 3 seasons of benchmarks/synthetic.py data
+#
+# Version: 1.1.0
+
+import argparse
+import copy
+import importlib
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from training.common import build_sort_key
+from training.registry import ALGORITHM_REGISTRY
+
+CONFIG_PATH = Path(__file__).parent.parent / "config.yaml"
+PREDICT_REPEATS = 5
+
+
+def hyperparameters_for(config: dict, algorithm: str):
+    if config["model"]["algorithm"] == algorithm:
+        return config["model"]["hyperparameters"]
+    alternatives = config["model"].get("alternative_hyperparameters", {})
+    if algorithm not in alternatives:
+        raise ValueError(
+            f"No hyperparameters for '{algorithm}'. "
+            "Add them under model.alternative_hyperparameters in config.yaml."
+        )
+    return alternatives[algorithm]
+
+
+def config_for(config: dict, algorithm: str, n_steps: int, last_folds: int | None):
+    cfg = copy.deepcopy(config)
+    cfg["model"]["algorithm"] = algorithm
+    cfg["model"]["hyperparameters"] = hyperparameters_for(config, algorithm)
+    if last_folds is not None:
+        wf = cfg["training"]["walk_forward"]
+        wf["min_train_steps"] = max(wf["min_train_steps"], n_steps - last_folds * wf["step"])
+    return cfg
+
+
+def benchmark_algorithm(df, config: dict, algorithm: str, horizon: int):
+    mod = importlib.import_module(ALGORITHM_REGISTRY[algorithm])
+
+    t0 = time.perf_counter()
+    fold_metrics, final_model, feature_cols, avg = mod.walk_forward(df=df, config=config, horizon=horizon)
+    walk_forward_s = time.perf_counter() - t0
+
+    # Predict on the latest step — the same batch size predict.py scores each week.
+    sort_key = build_sort_key(df)
+    latest = df[sort_key == sort_key.max()]
+    cat_str_cols = config["features"].get("categorical_str", [])
+    X_latest = mod.preprocess(latest[feature_cols], cat_str_cols)
+
+    predict_times = []
+    for _ in range(PREDICT_REPEATS):
+        t0 = time.perf_counter()
+        final_model.predict(X_latest)
+        predict_times.append(time.perf_counter() - t0)
+
+    n_fits = len(fold_metrics) + 1  # folds + final model
+    return {
+        "algorithm": algorithm,
+        "n_folds": len(fold_metrics),
+        "walk_forward_s": walk_forward_s,
+        "fit_s_per_model": walk_forward_s / n_fits,
+        "predict_ms": min(predict_times) * 1000,
+        "n_predict_rows": len(latest),
+        **avg,
+    }
+
+
+def print_results(results: list[dict]):
+    header = f"{'algorithm':<26}{'folds':>6}{'wf total s':>12}{'s/fit':>9}{'predict ms':>12}{'MAE':>9}{'RMSE':>9}{'R2':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['algorithm']:<26}{r['n_folds']:>6}{r['walk_forward_s']:>12.2f}{r['fit_s_per_model']:>9.2f}"
+            f"{r['predict_ms']:>12.1f}{r['avg_mae']:>9.4f}{r['avg_rmse']:>9.4f}{r['avg_r2']:>9.4f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FPL Gaffer — Compare training algorithms")
+    parser.add_argument("--horizon", type=int, default=1, help="Horizon to benchmark (1, 2, or 3). Default: 1.")
+    parser.add_argument(
+        "--algorithms",
+        nargs="+",
+        default=list(ALGORITHM_REGISTRY.keys()),
+        choices=list(ALGORITHM_REGISTRY.keys()),
+        help="Algorithms to compare. Default: every registered algorithm.",
+    )
+    parser.add_argument(
+        "--last-folds",
+        dest="last_folds",
+        type=int,
+        default=5,
+        help="Only validate on the most recent N steps (0 = full walk-forward). Default: 5.",
+    )
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        default=None,
+        metavar="SEASONS",
+        help="Use N seasons of synthetic features instead of Postgres (no database_url needed).",
+    )
+    args = parser.parse_args()
+
+    with open(CONFIG_PATH) as f:
+        config = yaml.safe_load(f)
+
+    if args.synthetic:
+        from benchmarks.synthetic import training_frame
+        df = training_frame(args.synthetic, args.horizon)
+    else:
+        from data.loader import load_features
+        df = load_features(args.horizon)
+
+    n_steps = build_sort_key(df).nunique()
+    last_folds = args.last_folds or None
+
+    results = []
+    for algorithm in args.algorithms:
+        cfg = config_for(config, algorithm, n_steps, last_folds)
+        print(f"  Benchmarking {algorithm} on h{args.horizon} ({len(df)} rows)...")
+        results.append(benchmark_algorithm(df, cfg, algorithm, args.horizon))
+
+    print()
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Benchmark: memory of the training feature frame — raw read_sql dtypes vs the data/dtypes.py policy,
+# and the peak while building it in one piece vs season by season (data/loader.py iter_feature_chunks).
+# Uses synthetic player_gw_features, so no database is needed. Every size runs in a fresh subprocess so
+# peak RSS is not inherited from the previous one.
+#
+# Usage (from the 03-ml directory):
+#   python benchmarks/feature_memory.py                   # 1, 3 and 10 seasons
+#   python benchmarks/feature_memory.py --seasons 10 20
+#
+# Version: 1.0.1
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.synthetic import PLAYERS_PER_SEASON, make_features
+from data.dtypes import apply_dtype_policy
+from training.profiling import peak_rss_mb
+
+
+def _frame_mb(df: pd.DataFrame):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+def run_size(n_seasons: int, mode: str, n_players: int):
+    # mode: "raw" (one frame, read_sql dtypes), "whole" (one frame, then policy), "chunked" (policy per season).
+    if mode == "chunked":
+        chunks = []
+        for s in range(n_seasons):
+            chunk = apply_dtype_policy(make_features(1, n_players, seed=s))
+            chunk["season_id"] += s
+            chunks.append(chunk)
+        df = pd.concat(chunks, ignore_index=True)
+    else:
+        df = make_features(n_seasons, n_players)
+        if mode == "whole":
+            df = apply_dtype_policy(df)
+    return {"seasons": n_seasons, "mode": mode, "rows": len(df), "frame_mb": _frame_mb(df), "peak_rss_mb": peak_rss_mb()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FPL Gaffer — Feature frame memory benchmark")
+    parser.add_argument("--seasons", nargs="+", type=int, default=[1, 3, 10], help="History sizes. Default: 1 3 10.")
+    parser.add_argument("--players", type=int, default=PLAYERS_PER_SEASON, help="Players per season.")
+    parser.add_argument("--run", nargs=2, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Child process: one (seasons, mode) measurement as JSON
+    if args.run:
+        print(json.dumps(run_size(int(args.run[0]), args.run[1], args.players)))
+        return
+
+    print(f"  {'seasons':>8}{'rows':>10}{'mode':>9}{'frame MB':>11}{'peak RSS MB':>13}")
+    for n_seasons in args.seasons:
+        for mode in ("raw", "whole", "chunked"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--run", str(n_seasons), mode, "--players", str(args.players)],
+                capture_output=True, text=True, check=True,
+            )
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"  {r['seasons']:>8}{r['rows']:>10}{r['mode']:>9}{r['frame_mb']:>11.1f}{r['peak_rss_mb']:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# Benchmark: sklearn RandomForestRegressor vs the compiled flat-array evaluator (inference/flat_forest.py).
+# Reports load and predict latency for both paths and checks the outputs match.
+# Also times predict_distribution (mean + std + p10/p90) against the mean-only flat predict.
+#
+# Usage (from the 03-ml directory):
+#   python benchmarks/flat_forest.py                                  # fit a forest with config.yaml hyperparameters on random data
+#   python benchmarks/flat_forest.py --artefact artefacts/random_forest_h1_....pkl
+#   python benchmarks/flat_forest.py --rows 700 --features 100 --train-rows 20000
+#   python benchmarks/flat_forest.py --synthetic 1                    # fit on 1 season of synthetic player_gw_features
+#
+# Version: 1.2.0
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import yaml
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from inference.flat_forest import compile_forest, load_compiled, predict, predict_distribution, save_compiled
+
+CONFIG_PATH = Path(__file__).parent.parent / "config.yaml"
+REPEATS = 5
+NAN_RATE = 0.1  # lags and fixture columns are often NULL in player_gw_features
+
+
+def _best_of(fn, repeats: int = REPEATS):
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return min(times), result
+
+
+def _random_X(rng, n_rows: int, n_features: int):
+    X = rng.random((n_rows, n_features))
+    X[rng.random(X.shape) < NAN_RATE] = np.nan
+    return X
+
+
+def _fit_forest(n_train_rows: int, n_features: int, rng):
+    X = _random_X(rng, n_train_rows, n_features)
+    y = np.nan_to_num(X[:, 0]) * 5 + np.nan_to_num(X[:, 1]) + rng.normal(0, 1, n_train_rows)
+    return _fit_forest_on(X, y)
+
+
+def _fit_forest_on(X, y):
+    from sklearn.ensemble import RandomForestRegressor
+
+    with open(CONFIG_PATH) as f:
+        hyperparams = yaml.safe_load(f)["model"]["hyperparameters"]
+    print(f"  Fitting RandomForestRegressor({hyperparams}) on {X.shape[0]}x{X.shape[1]}...")
+    return RandomForestRegressor(**hyperparams).fit(X, y)
+
+
+def _synthetic_X(n_seasons: int, n_rows: int):
+    # Preprocessed synthetic features (training rows) and a latest-GW-sized batch to score.
+    from benchmarks.synthetic import make_features
+    from training.random_forest import preprocess
+
+    with open(CONFIG_PATH) as f:
+        features = yaml.safe_load(f)["features"]
+    df = make_features(n_seasons)
+    feature_cols = [c for c in df.columns if c not in set(features["exclude"])]
+    X = preprocess(df[feature_cols], features.get("categorical_str", [])).astype(np.float64).to_numpy()
+    y = df["pts_target_h1"].to_numpy()
+    train = ~np.isnan(y)
+    return X[train], y[train], X[-n_rows:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FPL Gaffer — Flat-array forest benchmark")
+    parser.add_argument("--artefact", default=None, help="Existing .pkl forest artefact. Default: fit one.")
+    parser.add_argument("--rows", type=int, default=700, help="Rows to score (one GW of players). Default: 700.")
+    parser.add_argument("--features", type=int, default=100, help="Feature count when fitting. Default: 100.")
+    parser.add_argument("--train-rows", dest="train_rows", type=int, default=20000, help="Training rows when fitting.")
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        default=None,
+        metavar="SEASONS",
+        help="Fit on N seasons of synthetic player_gw_features and score its latest rows instead of random data.",
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    X_synthetic = None
+    with tempfile.TemporaryDirectory() as tmp:
+        pkl_path = Path(args.artefact) if args.artefact else Path(tmp) / "forest.pkl"
+        if args.synthetic:
+            X_train, y_train, X_synthetic = _synthetic_X(args.synthetic, args.rows)
+            joblib.dump(_fit_forest_on(X_train, y_train), pkl_path)
+        elif not args.artefact:
+            joblib.dump(_fit_forest(args.train_rows, args.features, rng), pkl_path)
+
+        sk_load_s, model = _best_of(lambda: joblib.load(pkl_path), repeats=1)
+        compiled_dir = save_compiled(compile_forest(model), Path(tmp) / "forest.forest")
+        flat_load_s, compiled = _best_of(lambda: load_compiled(compiled_dir))
+
+        X = X_synthetic if X_synthetic is not None else _random_X(rng, args.rows, model.n_features_in_)
+        sk_predict_s, sk_pred = _best_of(lambda: model.predict(X))
+        flat_predict_s, flat_pred = _best_of(lambda: predict(compiled, X))
+        dist_s, dist = _best_of(lambda: predict_distribution(compiled, X, (0.1, 0.9)))
+
+    max_diff = float(np.max(np.abs(sk_pred - flat_pred)))
+    n_nodes = len(compiled["arrays"]["feature"])
+    print()
+    print(f"  trees={len(model.estimators_)} nodes={n_nodes} rows={args.rows}")
+    print(f"  {'':<10}{'load ms':>12}{'predict ms':>14}")
+    print(f"  {'sklearn':<10}{sk_load_s * 1000:>12.1f}{sk_predict_s * 1000:>14.1f}")
+    print(f"  {'flat':<10}{flat_load_s * 1000:>12.1f}{flat_predict_s * 1000:>14.1f}")
+    print(f"  {'flat+dist':<10}{'':>12}{dist_s * 1000:>14.1f}")
+    print(f"  speedup: load x{sk_load_s / flat_load_s:.1f}, predict x{sk_predict_s / flat_predict_s:.1f}")
+    print(f"  std/p10/p90 cost: x{dist_s / flat_predict_s:.2f} the mean-only flat predict")
+    print(f"  max |sklearn - flat| = {max_diff:.2e}")
+
+    if not np.allclose(sk_pred, flat_pred, rtol=1e-9, atol=1e-9):
+        raise SystemExit("Flat-array predictions do not match sklearn.")
+    if not np.allclose(dist["mean"], flat_pred, rtol=1e-9, atol=1e-9):
+        raise SystemExit("predict_distribution mean does not match predict.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Benchmark: building prediction rows for ml.predictions — old iterrows path vs the columnar COPY path.
+# Sized for historical backfills: every player × GW × horizon over whole seasons.
+#
+# Usage (from the 03-ml directory):
+#   python benchmarks/save_predictions.py                   # 1 and 3 seasons, row building + CSV only
+#   python benchmarks/save_predictions.py --seasons 1 3 10
+#   python benchmarks/save_predictions.py --write           # also COPY + merge into ml.predictions (needs database_url)
+#
+# Version: 1.1.0
+
+import argparse
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.synthetic import make_features
+from registry.bulk import prediction_frame, to_csv_buffer
+
+HORIZONS = [1, 2, 3]
+
+
+def _rows_iterrows(features_df, batches, predicted_at):
+    # The previous save_predictions row building, per horizon, for backfills (per-row gameweek_id).
+    rows = []
+    for b in batches:
+        rows.extend(
+            {
+                "run_id": b["run_id"],
+                "predicted_at": predicted_at,
+                "opta_code": int(row["opta_code"]),
+                "season_id": int(row["season_id"]),
+                "features_gameweek_id": int(row["gameweek_id"]),
+                "predicted_gameweek_id": int(row["gameweek_id"]) + b["horizon"],
+                "horizon": b["horizon"],
+                "predicted_points": round(float(pts), 4),
+                "actual_points": None,
+            }
+            for (_, row), pts in zip(features_df.iterrows(), b["predicted_points"])
+        )
+    return rows
+
+
+def _columnar(features_df, batches, predicted_at):
+    frame = prediction_frame(predicted_at=predicted_at, features_df=features_df, batches=batches, current_gw=None)
+    return to_csv_buffer(frame)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FPL Gaffer — save_predictions benchmark")
+    parser.add_argument("--seasons", nargs="+", type=int, default=[1, 3], help="Season counts to benchmark.")
+    parser.add_argument("--write", action="store_true", help="Also write to ml.predictions via save_predictions_bulk.")
+    parser.add_argument("--skip-iterrows", dest="skip_iterrows", action="store_true", help="Skip the slow baseline.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    predicted_at = datetime.now(timezone.utc)
+    run_id = uuid.uuid4()
+
+    print(f"  {'seasons':>8}{'rows':>12}{'iterrows s':>13}{'columnar s':>13}{'write s':>10}")
+    for n_seasons in args.seasons:
+        features_df = make_features(n_seasons)  # full-width synthetic player_gw_features
+        batches = [
+            {"run_id": run_id, "horizon": h, "predicted_points": rng.random(len(features_df)) * 10}
+            for h in HORIZONS
+        ]
+
+        iterrows_s = float("nan")
+        if not args.skip_iterrows:
+            t0 = time.perf_counter()
+            _rows_iterrows(features_df, batches, predicted_at)
+            iterrows_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        _columnar(features_df, batches, predicted_at)
+        columnar_s = time.perf_counter() - t0
+
+        write_s = float("nan")
+        if args.write:
+            from registry.logger import save_predictions_bulk
+            t0 = time.perf_counter()
+            save_predictions_bulk(predicted_at=predicted_at, features_df=features_df, batches=batches, current_gw=None)
+            write_s = time.perf_counter() - t0
+
+        n_rows = len(features_df) * len(HORIZONS)
+        print(f"  {n_seasons:>8}{n_rows:>12}{iterrows_s:>13.2f}{columnar_s:>13.2f}{write_s:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
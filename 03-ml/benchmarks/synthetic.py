@@ -0,0 +1,276 @@
+# Synthetic processed.player_gw_features generator for offline benchmarks (no Postgres needed).
+# Mirrors 02-dbt/models/processed/player_gw_features.sql: same columns in the same order, the dtypes
+# pd.read_sql returns for them, and the same per-player time structure — lags, rolling averages,
+# season totals and lead targets are derived per (opta_code, season_id) from simulated match stats,
+# so NaN patterns (first GWs, last GWs of a season, fixture difficulty before collection) match the real table.
+# Snapshot columns (element_type, team_id, status, chance_of_playing_next_round) come from the latest
+# player snapshot in dbt, so they are constant per player across every season — reproduced here.
+#
+# Usage:
+#   from benchmarks.synthetic import make_features, training_frame
+#   df = make_features(n_seasons=3)          # every row as pd.read_sql returns it (raw dtypes)
+#   df = training_frame(n_seasons=3, horizon=1)  # like data.loader.load_features(1): dtype policy applied
+#
+# Version: 1.1.0
+
+import numpy as np
+import pandas as pd
+
+from data.dtypes import apply_dtype_policy
+
+PLAYERS_PER_SEASON = 700
+GAMEWEEKS = 38
+N_TEAMS = 20
+FIRST_SEASON_ID = 16
+HORIZONS = [1, 2, 3]
+
+# Share of the player pool that plays in any given season (promotions, transfers, retirements).
+SEASON_PRESENCE = 0.85
+STATUS_PROBS = {"a": 0.80, "d": 0.06, "i": 0.08, "s": 0.02, "u": 0.04}
+POSITION_PROBS = [0.10, 0.33, 0.40, 0.17]  # GK, DEF, MID, FWD
+GOAL_POINTS = np.array([0, 10, 6, 5, 4])  # indexed by element_type
+CLEAN_SHEET_POINTS = np.array([0, 4, 4, 1, 0])
+
+# (stat, column prefix, has season total, rolling windows) in the order the dbt model selects them.
+_ROLLED_STATS = [
+    ("starts", "starts", False, (3, 5)),
+    ("goals_scored", "goals", True, (3, 5)),
+    ("assists", "assists", True, (3, 5)),
+    ("own_goals", None, False, ()),
+    ("penalties_missed", None, False, ()),
+    ("penalties_saved", None, False, ()),
+    ("clean_sheets", "clean_sheets", True, (3, 5)),
+    ("goals_conceded", "goals_conceded", True, (3, 5)),
+    ("saves", "saves", True, (3, 5)),
+    ("yellow_cards", "yellow_cards", True, (3,)),
+    ("red_cards", "red_cards", True, (3,)),
+    ("bonus", "bonus", False, (3, 5)),
+    ("bps", "bps", False, (3, 5)),
+    ("influence", "influence", False, (3, 5)),
+    ("creativity", "creativity", False, (3, 5)),
+    ("threat", "threat", False, (3, 5)),
+    ("ict_index", "ict_index", False, (3, 5)),
+    ("xg", "xg", False, (3, 5)),
+    ("xa", "xa", False, (3, 5)),
+    ("xgi", "xgi", False, (3, 5)),
+    ("xgc", "xgc", False, (3, 5)),
+]
+
+
+def make_features(
+    n_seasons: int = 1,
+    n_players: int = PLAYERS_PER_SEASON,
+    n_gws: int = GAMEWEEKS,
+    seed: int = 0,
+):
+    # Returns every row ordered by (season_id, gameweek_id), like the loader queries.
+    rng = np.random.default_rng(seed)
+    pool_size = int(np.ceil(n_players / SEASON_PRESENCE))
+    players = _player_pool(pool_size, rng)
+
+    frames = []
+    for s in range(n_seasons):
+        in_season = np.sort(rng.choice(pool_size, size=n_players, replace=False))
+        last_season = s == n_seasons - 1
+        frames.append(_season(FIRST_SEASON_ID + s, players, in_season, n_gws, last_season, rng))
+    return pd.concat(frames, ignore_index=True)
+
+
+def training_frame(
+    n_seasons: int = 1,
+    horizon: int = 1,
+    n_players: int = PLAYERS_PER_SEASON,
+    seed: int = 0,
+    dtype_policy: bool = True,
+):
+    # Same rows and dtypes as data.loader.load_features(horizon): target not null, ordered by season and GW,
+    # data/dtypes.py policy applied (dtype_policy=False keeps the raw read_sql dtypes).
+    df = make_features(n_seasons, n_players, seed=seed)
+    df = df[df[f"pts_target_h{horizon}"].notna()].reset_index(drop=True)
+    return apply_dtype_policy(df) if dtype_policy else df
+
+
+def _player_pool(pool_size: int, rng):
+    element_type = rng.choice([1, 2, 3, 4], size=pool_size, p=POSITION_PROBS)
+    status = rng.choice(list(STATUS_PROBS), size=pool_size, p=list(STATUS_PROBS.values()))
+    chance = np.where(status == "a", np.nan, rng.choice([0.0, 25.0, 50.0, 75.0], size=pool_size))
+    return {
+        "opta_code": np.arange(pool_size) + 100000,
+        "element_type": element_type,
+        "team_id": rng.integers(1, N_TEAMS + 1, size=pool_size),
+        "status": status,
+        "chance_of_playing_next_round": chance,
+        "quality": rng.lognormal(0.0, 0.5, size=pool_size),
+        "play_rate": rng.beta(2.0, 1.5, size=pool_size),
+    }
+
+
+def _schedule(n_gws: int, rng):
+    # Double round robin (circle method): opponent[team, gw] and home[team, gw], teams 1..N_TEAMS.
+    teams = list(range(1, N_TEAMS + 1))
+    rounds = []
+    for r in range(N_TEAMS - 1):
+        pairs = [(teams[i], teams[-1 - i]) for i in range(N_TEAMS // 2)]
+        rounds.append(pairs if r % 2 == 0 else [(a_, h_) for h_, a_ in pairs])
+        teams = [teams[0]] + [teams[-1]] + teams[1:-1]
+    rounds += [[(a_, h_) for h_, a_ in pairs] for pairs in rounds]
+
+    opponent = np.zeros((N_TEAMS + 1, n_gws), dtype=np.int64)
+    home = np.zeros((N_TEAMS + 1, n_gws), dtype=bool)
+    for gw in range(n_gws):
+        for h_, a_ in rounds[gw % len(rounds)]:
+            opponent[h_, gw], opponent[a_, gw] = a_, h_
+            home[h_, gw] = True
+    return opponent, home
+
+
+def _season(season_id: int, players: dict, idx: np.ndarray, n_gws: int, last_season: bool, rng):
+    P, G = len(idx), n_gws
+    et = players["element_type"][idx]
+    team = players["team_id"][idx]
+    quality = players["quality"][idx]
+
+    # Fixtures and team results for the season
+    opponent_of, home_of = _schedule(G, rng)
+    strength = rng.integers(2, 6, size=N_TEAMS + 1)
+    attack = strength / 3.5
+    team_goals = np.zeros((N_TEAMS + 1, G), dtype=np.int64)
+    for gw in range(G):
+        opp = opponent_of[1:, gw]
+        team_goals[1:, gw] = rng.poisson(1.35 * attack[1:] / attack[opp] + 0.15 * home_of[1:, gw])
+    opponent = opponent_of[team]
+    was_home = home_of[team]
+    scored = team_goals[team]
+    conceded = team_goals[opponent, np.arange(G)]
+
+    # Minutes: appearance probability per player, starters mostly play 60+
+    plays = rng.random((P, G)) < players["play_rate"][idx, None]
+    starts = (plays & (rng.random((P, G)) < 0.85)).astype(np.int64)
+    minutes = np.where(starts == 1, rng.integers(55, 91, (P, G)), np.where(plays, rng.integers(1, 35, (P, G)), 0))
+    share = minutes / 90.0
+
+    # Expected and actual attacking returns by position
+    attack_weight = np.array([0, 0.02, 0.1, 0.25, 0.45])[et][:, None] * quality[:, None]
+    xg = np.round(rng.gamma(1.2, attack_weight * share + 1e-9), 2)
+    xa = np.round(rng.gamma(1.2, 0.6 * attack_weight * share + 1e-9), 2)
+    goals = rng.poisson(xg)
+    assists = rng.poisson(xa)
+    xgc = np.round(np.where(plays, rng.gamma(2.0, 0.6 * attack[opponent] * share), 0.0), 2)
+
+    played_60 = minutes >= 60
+    clean_sheets = (played_60 & (conceded == 0) & (et[:, None] < 4)).astype(np.int64)
+    goals_conceded = np.where(plays, conceded, 0)
+    is_gk = (et == 1)[:, None]
+    saves = np.where(plays & is_gk, rng.poisson(2.5, (P, G)), 0)
+    penalties_saved = (plays & is_gk & (rng.random((P, G)) < 0.02)).astype(np.int64)
+    penalties_missed = (plays & (rng.random((P, G)) < 0.003)).astype(np.int64)
+    own_goals = (plays & (rng.random((P, G)) < 0.003)).astype(np.int64)
+    yellow = (plays & (rng.random((P, G)) < 0.1)).astype(np.int64)
+    red = (plays & (rng.random((P, G)) < 0.004)).astype(np.int64)
+
+    total_points = (
+        (minutes > 0).astype(np.int64) + played_60
+        + goals * GOAL_POINTS[et][:, None] + 3 * assists
+        + clean_sheets * CLEAN_SHEET_POINTS[et][:, None] + saves // 3 + 5 * penalties_saved
+        - np.where(et[:, None] < 3, goals_conceded // 2, 0)
+        - yellow - 3 * red - 2 * own_goals - 2 * penalties_missed
+    )
+    bonus = np.where(plays, np.clip(rng.poisson(np.maximum(total_points, 0) / 6.0), 0, 3), 0)
+    total_points = total_points + bonus
+    bps = np.where(plays, np.maximum(3 * total_points + rng.integers(-3, 8, (P, G)), 0), 0)
+
+    influence = np.round(np.where(plays, rng.gamma(2.0, 5.0 + 4.0 * total_points.clip(0)), 0.0), 1)
+    creativity = np.round(np.where(plays, rng.gamma(1.5, 6.0 + 40.0 * xa), 0.0), 1)
+    threat = np.round(np.where(plays, rng.gamma(1.5, 4.0 + 60.0 * xg), 0.0), 1)
+    ict_index = np.round((influence + creativity + threat) / 10.0, 1)
+
+    now_cost = np.clip(np.round(40 + 25 * quality + 5 * (et == 4)), 40, 150).astype(np.int64)[:, None] \
+        + np.cumsum(rng.choice([-1, 0, 0, 0, 1], (P, G)), axis=1)
+
+    base = {
+        "total_points": total_points, "minutes": minutes, "starts": starts,
+        "goals_scored": goals, "assists": assists, "own_goals": own_goals,
+        "penalties_missed": penalties_missed, "penalties_saved": penalties_saved,
+        "clean_sheets": clean_sheets, "goals_conceded": goals_conceded, "saves": saves,
+        "yellow_cards": yellow, "red_cards": red, "bonus": bonus, "bps": bps,
+        "influence": influence, "creativity": creativity, "threat": threat, "ict_index": ict_index,
+        "xg": xg, "xa": xa, "xgi": np.round(xg + xa, 2), "xgc": xgc,
+    }
+
+    cols = {
+        "opta_code": np.repeat(players["opta_code"][idx][:, None], G, axis=1),
+        "player_id": np.repeat(rng.permutation(P)[:, None] + 1, G, axis=1),
+        "gameweek_id": np.repeat(np.arange(1, G + 1)[None, :], P, axis=0),
+        "season_id": np.full((P, G), season_id),
+    }
+    for h in HORIZONS:
+        cols[f"pts_target_h{h}"] = _lead(total_points, h)
+    for h in HORIZONS:
+        # Difficulty only comes from player_future_fixtures, collected since the latest season started:
+        # NULL for every earlier season and for fixtures past the end of the season.
+        difficulty = np.full((P, G), np.nan)
+        if last_season:
+            difficulty[:, :-h] = rng.integers(2, 6, (P, G - h))
+        cols[f"fixture_difficulty_h{h}"] = difficulty
+        cols[f"fixture_is_home_h{h}"] = _lead(was_home, h)
+        cols[f"opponent_team_id_h{h}"] = _lead(opponent, h)
+        cols[f"opponent_strength_h{h}"] = _lead(strength[opponent], h)
+    for k in (1, 2):
+        cols[f"pts_lag_{k}"] = _lag(total_points, k)
+        cols[f"opponent_team_id_lag_{k}"] = _lag(opponent, k)
+        cols[f"opponent_strength_lag_{k}"] = _lag(strength[opponent], k)
+        cols[f"fixture_is_home_lag_{k}"] = _lag(was_home, k)
+
+    cols["total_points"] = total_points
+    cols["pts_season_total"] = np.cumsum(total_points, axis=1)
+    cols["pts_rolling_3"] = _rolling_avg(total_points, 3)
+    cols["pts_rolling_5"] = _rolling_avg(total_points, 5)
+    cols["minutes"] = minutes
+    cols["minutes_season_total"] = np.cumsum(minutes, axis=1)
+    cols["minutes_rolling_3"] = _rolling_avg(minutes, 3)
+    cols["minutes_rolling_5"] = _rolling_avg(minutes, 5)
+    cols["was_home"] = was_home
+    cols["team_h_score"] = np.where(was_home, scored, conceded)
+    cols["team_a_score"] = np.where(was_home, conceded, scored)
+    cols["opponent_team_id"] = opponent
+    cols["opponent_strength"] = strength[opponent]
+    cols["gw_finished"] = np.ones((P, G), dtype=bool)
+    for stat, prefix, season_total, windows in _ROLLED_STATS:
+        cols[stat] = base[stat]
+        if season_total:
+            cols[f"{prefix}_season_total"] = np.cumsum(base[stat], axis=1)
+        for w in windows:
+            cols[f"{prefix}_rolling_{w}"] = _rolling_avg(base[stat], w)
+
+    # Row order: season, GW, then player — (P, G) arrays are transposed before flattening
+    data = {name: values.T.ravel() for name, values in cols.items()}
+    for name in ("element_type", "team_id", "status", "chance_of_playing_next_round"):
+        data[name] = np.tile(players[name][idx], G)
+    data["now_cost"] = now_cost.T.ravel()
+
+    df = pd.DataFrame(data)
+    # Nullable booleans come back from Postgres as object columns of True/False/None
+    for col in [c for c in df.columns if c.startswith("fixture_is_home_")]:
+        df[col] = df[col].astype(object).where(df[col].notna(), None)
+    return df
+
+
+def _lag(a: np.ndarray, k: int):
+    out = np.full(a.shape, np.nan) if a.dtype != bool else np.full(a.shape, np.nan, dtype=object)
+    out[:, k:] = a[:, :-k]
+    return out
+
+
+def _lead(a: np.ndarray, k: int):
+    out = np.full(a.shape, np.nan) if a.dtype != bool else np.full(a.shape, np.nan, dtype=object)
+    out[:, :-k] = a[:, k:]
+    return out
+
+
+def _rolling_avg(a: np.ndarray, window: int):
+    # AVG(...) OVER (ROWS BETWEEN window-1 PRECEDING AND CURRENT ROW), per player along the GW axis.
+    c = np.cumsum(a, axis=1, dtype=np.float64)
+    sums = c.copy()
+    sums[:, window:] -= c[:, :-window]
+    counts = np.minimum(np.arange(1, a.shape[1] + 1), window)
+    return sums / counts[None, :]
@@ -0,0 +1,210 @@
+# Offline training benchmark suite on synthetic player_gw_features (benchmarks/synthetic.py).
+# Times each stage of the training pipeline at several history sizes and reports wall time and peak RSS.
+# Every (case, seasons) pair runs in a fresh subprocess, and the peak is reset (training.profiling) before
+# the stage, so peak RSS is that stage's own high-water mark — memory already held, like the data, included.
+# "data MB" is the peak after generating the synthetic frame — the stage's own footprint is roughly peak minus data.
+#
+# Cases:
+#   preprocess    algorithm module's preprocess() on every training row
+#   walk_forward  full walk-forward (folds + final model), or the last N folds with --last-folds
+#   fit           final model fit on every training row (walk_forward's final-model cost, one validation fold)
+#   predict       final model predict on the latest GW (best of 5); fit is not timed
+#   save_load     dump_model + load_model, plus flat-array export/load for forests; fit is not timed
+# The final model is always fitted through the algorithm's public walk_forward(fit_final=True).
+#
+# Usage (from the 03-ml directory):
+#   python benchmarks/training_suite.py                                   # every case at 1, 3 and 10 seasons
+#   python benchmarks/training_suite.py --cases fit predict --seasons 1 3
+#   python benchmarks/training_suite.py --algorithm hist_gradient_boosting --last-folds 5
+#
+# Version: 1.1.0
+
+import argparse
+import importlib
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.compare_algorithms import config_for
+from benchmarks.synthetic import PLAYERS_PER_SEASON, training_frame
+from training.common import build_sort_key
+from training.profiling import peak_rss_mb, reset_peak_rss, summarise_folds
+from training.registry import ALGORITHM_REGISTRY
+
+CONFIG_PATH = Path(__file__).parent.parent / "config.yaml"
+CASES = ["preprocess", "walk_forward", "fit", "predict", "save_load"]
+SEASONS = [1, 3, 10]
+PREDICT_REPEATS = 5
+
+
+def _fit_final(mod, df, config: dict, algorithm: str, horizon: int):
+    # Returns (final_model, profile): walk_forward with a single validation fold, the cheapest public path
+    # to the final model. profile holds the final model's own cost (fit_ms, peak_rss_mb, ...).
+    config = config_for(config, algorithm, build_sort_key(df).nunique(), 1)
+    profile = {}
+    _, final_model, _, _ = mod.walk_forward(df=df, config=config, horizon=horizon, fit_final=True, profile=profile)
+    return final_model, profile
+
+
+def run_case(case: str, n_seasons: int, algorithm: str, horizon: int, last_folds: int | None, n_players: int):
+    # Runs one case in this process and returns its result dict.
+    with open(CONFIG_PATH) as f:
+        config = yaml.safe_load(f)
+
+    df = training_frame(n_seasons, horizon, n_players)
+    config = config_for(config, algorithm, build_sort_key(df).nunique(), last_folds)
+    mod = importlib.import_module(ALGORITHM_REGISTRY[algorithm])
+    exclude = set(config["features"]["exclude"])
+    feature_cols = [c for c in df.columns if c not in exclude]
+    cat_str_cols = config["features"].get("categorical_str", [])
+    data_rss_mb = peak_rss_mb()
+    extra = {}
+
+    if case == "preprocess":
+        reset_peak_rss()
+        t0 = time.perf_counter()
+        mod.preprocess(df[feature_cols], cat_str_cols)
+        wall_s = time.perf_counter() - t0
+        stage_rss_mb = peak_rss_mb()
+
+    elif case == "walk_forward":
+        profile = {}
+        t0 = time.perf_counter()
+        fold_metrics, _, _, avg = mod.walk_forward(df=df, config=config, horizon=horizon, profile=profile)
+        wall_s = time.perf_counter() - t0
+        # walk_forward resets the peak per fold and for the final model — the stage peak is the largest of them
+        stage_rss_mb = max(summarise_folds(fold_metrics)["peak_rss_mb"], profile["peak_rss_mb"])
+        extra = {"folds": len(fold_metrics), "avg_mae": avg["avg_mae"]}
+
+    elif case == "fit":
+        _, profile = _fit_final(mod, df, config, algorithm, horizon)
+        wall_s = profile["fit_ms"] / 1000
+        stage_rss_mb = profile["peak_rss_mb"]
+
+    elif case == "predict":
+        model, _ = _fit_final(mod, df, config, algorithm, horizon)
+        reset_peak_rss()
+        sort_key = build_sort_key(df)
+        latest = df[sort_key == sort_key.max()]
+        times = []
+        for _ in range(PREDICT_REPEATS):
+            t0 = time.perf_counter()
+            model.predict(mod.preprocess(latest[feature_cols], cat_str_cols))
+            times.append(time.perf_counter() - t0)
+        wall_s = min(times)
+        stage_rss_mb = peak_rss_mb()
+        extra = {"predict_rows": len(latest)}
+
+    elif case == "save_load":
+        from inference.flat_forest import compile_forest, is_forest, load_compiled, save_compiled
+        from registry.artefacts import dump_model, load_model
+
+        model, _ = _fit_final(mod, df, config, algorithm, horizon)
+        reset_peak_rss()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "model.pkl"
+            t0 = time.perf_counter()
+            size = dump_model(model, path, compress=config.get("artefacts", {}).get("compress", 0))
+            load_model(path, mmap=config.get("artefacts", {}).get("mmap", True))
+            if is_forest(model):
+                load_compiled(save_compiled(compile_forest(model), Path(tmp) / "model.forest"))
+            wall_s = time.perf_counter() - t0
+        stage_rss_mb = peak_rss_mb()
+        extra = {"artefact_mb": round(size / 1e6, 1)}
+
+    else:
+        raise ValueError(f"Unknown case '{case}'. Choose from {CASES}.")
+
+    return {
+        "case": case,
+        "seasons": n_seasons,
+        "rows": len(df),
+        "wall_s": wall_s,
+        "peak_rss_mb": stage_rss_mb,
+        "data_rss_mb": data_rss_mb,
+        **extra,
+    }
+
+
+def _run_in_subprocess(case: str, n_seasons: int, args):
+    cmd = [
+        sys.executable, __file__, "--run-case", case,
+        "--seasons", str(n_seasons),
+        "--algorithm", args.algorithm,
+        "--horizon", str(args.horizon),
+        "--players", str(args.players),
+        "--last-folds", str(args.last_folds),
+    ]
+    out = subprocess.run(cmd, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(f"{case} @ {n_seasons} seasons failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def print_results(results: list[dict]):
+    header = f"{'case':<14}{'seasons':>8}{'rows':>9}{'wall s':>10}{'peak MB':>10}{'data MB':>10}  notes"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        notes = ", ".join(f"{k}={v}" for k, v in r.items() if k not in {
+            "case", "seasons", "rows", "wall_s", "peak_rss_mb", "data_rss_mb"
+        })
+        print(
+            f"{r['case']:<14}{r['seasons']:>8}{r['rows']:>9}{r['wall_s']:>10.3f}"
+            f"{r['peak_rss_mb']:>10.0f}{r['data_rss_mb']:>10.0f}  {notes}"
+        )
+
+
+def main():
+    with open(CONFIG_PATH) as f:
+        default_algorithm = yaml.safe_load(f)["model"]["algorithm"]
+
+    parser = argparse.ArgumentParser(description="FPL Gaffer — Offline training benchmarks on synthetic features")
+    parser.add_argument("--cases", nargs="+", default=CASES, choices=CASES, help="Cases to run. Default: all.")
+    parser.add_argument("--seasons", nargs="+", type=int, default=SEASONS, help="History sizes. Default: 1 3 10.")
+    parser.add_argument(
+        "--algorithm",
+        default=default_algorithm,
+        choices=list(ALGORITHM_REGISTRY.keys()),
+        help="Algorithm module to benchmark. Default: model.algorithm from config.yaml.",
+    )
+    parser.add_argument("--horizon", type=int, default=1, help="Horizon to train (1, 2, or 3). Default: 1.")
+    parser.add_argument("--players", type=int, default=PLAYERS_PER_SEASON, help="Players per season.")
+    parser.add_argument(
+        "--last-folds",
+        dest="last_folds",
+        type=int,
+        default=0,
+        help="walk_forward: only validate on the most recent N steps (0 = full walk-forward). Default: 0.",
+    )
+    parser.add_argument("--run-case", dest="run_case", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Child process: run one case and print its result as JSON for the parent
+    if args.run_case:
+        result = run_case(
+            args.run_case, args.seasons[0], args.algorithm, args.horizon, args.last_folds or None, args.players
+        )
+        print(json.dumps(result))
+        return
+
+    results = []
+    for n_seasons in args.seasons:
+        for case in args.cases:
+            print(f"  {case} @ {n_seasons} season(s)...")
+            results.append(_run_in_subprocess(case, n_seasons, args))
+
+    print()
+    print(f"  algorithm={args.algorithm} horizon=h{args.horizon} players/season={args.players}")
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# Dtype policy for feature frames, applied at load time (training and inference alike).
+# pd.read_sql returns int64/float64 for every number, Decimal-backed floats for NUMERIC, Python bools
+# for nullable booleans and Python strings for status — several times the memory the values need.
+#   float64 -> float32         (tree models cast to float32 anyway)
+#   ints -> smallest int       (keys stay at least int32 so season_id * 100 + gameweek_id cannot overflow)
+#   booleans -> int8, or float32 1/0/NaN when they have NULLs (fixture_is_home_*)
+#   status -> categorical with STATUS_MAP's categories; unknown values become NaN (-1 after preprocess)
+# No DB imports here, so benchmarks can apply the same policy to synthetic frames.
+# Version: 1.0.0
+
+import numpy as np
+import pandas as pd
+
+from training.common import STATUS_MAP
+
+# Identify and tag rows — never downcast below int32.
+KEY_COLS = ["opta_code", "season_id", "gameweek_id"]
+
+# String columns stored as categoricals. The category order matches STATUS_MAP, so codes == mapped ints.
+CATEGORICAL_COLS = {"status": pd.CategoricalDtype(list(STATUS_MAP))}
+
+
+def apply_dtype_policy(df: pd.DataFrame):
+    # Returns a new frame; df is not modified.
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if col in CATEGORICAL_COLS:
+            out[col] = s if s.dtype == CATEGORICAL_COLS[col] else s.astype(CATEGORICAL_COLS[col])
+        elif s.dtype == bool:
+            out[col] = s.astype(np.int8)
+        elif s.dtype == object and pd.api.types.infer_dtype(s, skipna=True) == "boolean":
+            out[col] = s.map({True: 1.0, False: 0.0}).astype(np.float32)
+        elif pd.api.types.is_float_dtype(s.dtype):
+            out[col] = s.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(s.dtype):
+            s = pd.to_numeric(s, downcast="integer")
+            out[col] = s.astype(np.int32) if col in KEY_COLS and s.dtype.itemsize < 4 else s
+        else:
+            out[col] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+def categorical_from_codes(codes: pd.Series, col: str):
+    # For categoricals encoded in SQL (see data/loader.py): code -1 = NULL or unknown value.
+    return pd.Series(
+        pd.Categorical.from_codes(codes.to_numpy(), dtype=CATEGORICAL_COLS[col]),
+        index=codes.index,
+        name=col,
+    )
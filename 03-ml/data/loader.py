@@ -1,27 +1,57 @@
 # Load the featuresfrom processed.player_gw_features.
 # Returns a DataFrame sorted by (season_id, gameweek_id) ready for walk-forward training.
-# Version: 1.0.0
+# Version: 1.2.2
 
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
+from sqlalchemy import text
+
 from db.engine import engine
+from data.dtypes import CATEGORICAL_COLS, KEY_COLS, apply_dtype_policy, categorical_from_codes
+
+# Postgres types that always load as numbers (booleans via _select_list's ::int cast)
+NUMERIC_PG_TYPES = {"smallint", "integer", "bigint", "numeric", "real", "double precision", "boolean"}
+
+
+def load_features(horizon: int, columns: list[str] | None = None): #all training rows where target is not null. 
+    # Loaded one season at a time (iter_feature_chunks) and concatenated, so only one season is ever held
+    # at read_sql's full width — the rest is already in compact dtypes (data/dtypes.py).
+    # OLD: one SELECT * into default int64/float64/object dtypes.
+    chunks = list(iter_feature_chunks(horizon, columns))
+    if not chunks:
+        raise RuntimeError(f"No training rows with pts_target_h{horizon} in processed.player_gw_features.")
+    return pd.concat(chunks, ignore_index=True)
 
 
-def load_features(horizon: int): #all training rows where target is not null. 
-    
+def iter_feature_chunks(horizon: int, columns: list[str] | None = None):
+    # Yields the training rows of one season at a time, ordered by (season_id, gameweek_id), with the dtype policy applied.
+    # columns: project to these columns plus KEY_COLS (targets are not added). None = every column.
     target_col = f"pts_target_h{horizon}" #target column name depends on horizon
 
-    query = f"""
-        SELECT *
-        FROM processed.player_gw_features
-        WHERE {target_col} IS NOT NULL
-        ORDER BY season_id ASC, gameweek_id ASC
-    """
+    with engine.connect() as conn:
+        seasons = [r[0] for r in conn.execute(text(f"""
+            SELECT DISTINCT season_id
+            FROM processed.player_gw_features
+            WHERE {target_col} IS NOT NULL
+            ORDER BY season_id
+        """))]
 
-    df = pd.read_sql(query, engine)
-    return df
+    query = text(f"""
+        SELECT {_select_list(columns)}
+        FROM processed.player_gw_features
+        WHERE {target_col} IS NOT NULL AND season_id = :season_id
+        ORDER BY gameweek_id ASC
+    """)
+    for season_id in seasons:
+        yield _finalise(pd.read_sql(query, engine, params={"season_id": season_id}))
 
 
-def load_latest_features(): #the row to predict on. Most recent gameweek with features. Used for inference.
+def load_latest_features(columns: list[str] | None = None): #the row to predict on. Most recent gameweek with features. Used for inference.
+    # columns: project to these feature columns plus KEY_COLS. None = every column.
+    # predict.py passes the union of the production artefacts' feature_cols.
+    # Same dtype policy as load_features, so models see identically typed values at training and inference.
     # OLD: global MAX(gameweek_id) — excluded blank-GW teams whose latest row is GW-1.
     # query = """
     #     SELECT *
@@ -42,12 +72,70 @@ def load_latest_features(): #the row to predict on. Most recent gameweek with fe
     """
     current_gw = int(pd.read_sql(current_gw_query, engine).iloc[0, 0])
 
-    query = """
-        SELECT DISTINCT ON (opta_code) *
+    query = f"""
+        SELECT DISTINCT ON (opta_code) {_select_list(columns)}
         FROM processed.player_gw_features
         WHERE season_id = (SELECT MAX(season_id) FROM processed.player_gw_features)
         ORDER BY opta_code, gameweek_id DESC
     """
 
-    df = pd.read_sql(query, engine)
+    df = _finalise(pd.read_sql(query, engine))
     return df, current_gw
+
+
+@lru_cache(maxsize=1)
+def _column_types():
+    # {column: Postgres data_type} of processed.player_gw_features, in table order.
+    query = text("""
+        SELECT column_name, data_type
+        FROM information_schema.columns
+        WHERE table_schema = 'processed' AND table_name = 'player_gw_features'
+        ORDER BY ordinal_position
+    """)
+    with engine.connect() as conn:
+        return dict(conn.execute(query).fetchall())
+
+
+def reset_column_types():
+    # Drops the cached column types so the next load re-reads them — long-lived processes (worker.py)
+    # call it before reloading features, as a dbt run may have changed the table.
+    _column_types.cache_clear()
+
+
+def _select_list(columns: list[str] | None):
+    # Casts in SQL so the driver never builds Python objects pandas would then have to convert:
+    # NUMERIC -> float8 (no Decimals), boolean -> int (NULL stays NULL), status -> category code (no strings).
+    types = _column_types()
+    if columns is None:
+        columns = list(types)
+    else:
+        columns = KEY_COLS + [c for c in columns if c not in KEY_COLS]
+
+    exprs = []
+    for col in columns:
+        # Column names come from ml.model_artefacts.feature_cols — quote them as identifiers.
+        quoted = '"' + col.replace('"', '""') + '"'
+        if col in CATEGORICAL_COLS:
+            categories = ", ".join(f"'{c}'" for c in CATEGORICAL_COLS[col].categories)
+            exprs.append(f"COALESCE(array_position(ARRAY[{categories}]::text[], {quoted}::text) - 1, -1) AS {quoted}")
+        elif types.get(col) == "numeric":
+            exprs.append(f"{quoted}::float8 AS {quoted}")
+        elif types.get(col) == "boolean":
+            exprs.append(f"{quoted}::int AS {quoted}")
+        else:
+            exprs.append(quoted)
+    return ", ".join(exprs)
+
+
+def _finalise(df: pd.DataFrame):
+    # A column that is NULL on every row (e.g. fixture_difficulty_hN in a season before fixtures were collected)
+    # comes back as object, which apply_dtype_policy leaves alone and concat would keep for every season.
+    # Type it from the table instead.
+    types = _column_types()
+    for col in df.columns:
+        if df[col].dtype == object and types.get(col) in NUMERIC_PG_TYPES:
+            df[col] = df[col].astype(np.float32)
+    for col in CATEGORICAL_COLS:
+        if col in df.columns:
+            df[col] = categorical_from_codes(df[col], col)
+    return apply_dtype_policy(df)
@@ -2,12 +2,46 @@ from sqlalchemy import text
 from schema import ml_metadata
 from engine import engine
 
+# Columns added after the tables were first created.
+# create_all() skips existing tables, so existing databases get them via ADD COLUMN IF NOT EXISTS.
+ADDED_COLUMNS = [
+    ("model_artefacts", "output_index", "SMALLINT"),
+    ("model_artefacts", "compiled_path", "VARCHAR(500)"),
+    ("predictions", "fingerprint", "VARCHAR(64)"),
+    ("training_runs", "search_id", "UUID"),
+    ("predictions", "predicted_std", "NUMERIC(8, 4)"),
+    ("predictions", "predicted_p10", "NUMERIC(8, 4)"),
+    ("predictions", "predicted_p90", "NUMERIC(8, 4)"),
+    ("training_runs", "preprocess_ms", "INTEGER"),
+    ("training_runs", "fit_ms", "INTEGER"),
+    ("training_runs", "predict_ms", "INTEGER"),
+    ("training_runs", "peak_rss_mb", "INTEGER"),
+    ("model_artefacts", "preprocess_ms", "INTEGER"),
+    ("model_artefacts", "fit_ms", "INTEGER"),
+    ("model_artefacts", "predict_ms", "INTEGER"),
+    ("model_artefacts", "peak_rss_mb", "INTEGER"),
+    ("model_artefacts", "artefact_size_bytes", "BIGINT"),
+    ("model_accuracy", "window_gws", "SMALLINT"),
+    ("model_accuracy", "first_season_id", "SMALLINT"),
+    ("model_accuracy", "first_gameweek_id", "SMALLINT"),
+]
+
 def init_schema():
     with engine.connect() as conn:
         conn.execute(text("CREATE SCHEMA IF NOT EXISTS ml"))
         conn.commit()
     ml_metadata.create_all(engine)
+    with engine.connect() as conn:
+        for table, column, col_type in ADDED_COLUMNS:
+            conn.execute(text(f"ALTER TABLE ml.{table} ADD COLUMN IF NOT EXISTS {column} {col_type}"))
+        # create_all() only creates indexes together with their table
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_training_runs_search_id ON ml.training_runs (search_id)"))
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_predictions_unreconciled
+            ON ml.predictions (season_id, predicted_gameweek_id) WHERE actual_points IS NULL
+        """))
+        conn.commit()
 
 if __name__ == "__main__":
     init_schema()
-    print("Done")
\ No newline at end of file
+    print("Done")
@@ -9,7 +9,7 @@ from sqlalchemy import TIMESTAMP
 ml_metadata = MetaData(schema="ml")
 
 # ML SCHEMA
-# Tables: ml.training_runs, ml.model_artefacts, ml.predictions
+# Tables: ml.training_runs, ml.model_artefacts, ml.predictions, ml.model_accuracy, ml.model_accuracy_gw
 # 1. Training Runs
 # One row per walk-forward fold per training execution.
 # run_id groups all folds that belong to the same run
@@ -30,16 +30,24 @@ ml_training_runs = Table(
     Column("mae", Numeric(8, 4)),
     Column("rmse", Numeric(8, 4)),
     Column("r2", Numeric(8, 4)),
+    Column("search_id", UUID(as_uuid=True)),                        # groups trials of one search.py run; NULL = not a search trial
+    # Fold cost (training/profiling.py); NULL for folds cached before it was recorded
+    Column("preprocess_ms", Integer),
+    Column("fit_ms", Integer),
+    Column("predict_ms", Integer),                                  # scoring the validation rows
+    Column("peak_rss_mb", Integer),
     UniqueConstraint("run_id", "fold_index", "horizon", name="uq_training_runs_run_fold_horizon"),
 )
 
 Index("ix_training_runs_run_id", ml_training_runs.c.run_id)
+Index("ix_training_runs_search_id", ml_training_runs.c.search_id)
 Index("ix_training_runs_horizon", ml_training_runs.c.horizon)
 
 # 2. Model Artefacts
 # One row per saved (final) model file.
 # is_production = True marks the model actively used for predictions.
 # Only one row per horizon should have is_production = True at a time.
+# A multi-output model has one row per horizon, all pointing at the same artefact_path.
 ml_model_artefacts = Table(
     "model_artefacts", ml_metadata,
     Column("id", BigInteger, primary_key=True, autoincrement=True),
@@ -49,6 +57,8 @@ ml_model_artefacts = Table(
     Column("algorithm", String(50), nullable=False),
     Column("horizon", SmallInteger, nullable=False),
     Column("artefact_path", String(500), nullable=False),           # relative path to .pkl
+    Column("compiled_path", String(500)),                           # flat-array forest dir (inference/flat_forest.py); NULL = not a forest
+    Column("output_index", SmallInteger),                           # column of predict() for this horizon; NULL = single-output model
     Column("feature_cols", JSONB, nullable=False),                  # list of features used
     Column("feature_importances", JSONB),                           # {feature_name: importance}
     Column("config_snapshot", JSONB, nullable=False),
@@ -56,6 +66,12 @@ ml_model_artefacts = Table(
     Column("avg_mae", Numeric(8, 4)),
     Column("avg_rmse", Numeric(8, 4)),
     Column("avg_r2", Numeric(8, 4)),
+    # Final model cost (training/profiling.py)
+    Column("preprocess_ms", Integer),
+    Column("fit_ms", Integer),
+    Column("predict_ms", Integer),                                  # scoring the latest GW's rows
+    Column("peak_rss_mb", Integer),
+    Column("artefact_size_bytes", BigInteger),                      # .pkl plus the flat-array export, if any
     Column("is_production", Boolean, nullable=False, default=False),
     Column("promoted_at", TIMESTAMP(timezone=True)),                # when is_production was set True
 )
@@ -69,7 +85,7 @@ Index("ix_model_artefacts_run_id", ml_model_artefacts.c.run_id)
 # Upsert key: (opta_code, season_id, predicted_gameweek_id, horizon).
 # Overwritten if predict.py is re-run for the same GW — run_id tracks which
 # model version produced the current value.
-# actual_points is NULL until that GW is played, then filled by a post-GW job.
+# actual_points is NULL until that GW is played, then filled by reconcile.py.
 ml_predictions = Table(
     "predictions", ml_metadata,
     Column("id", BigInteger, primary_key=True, autoincrement=True),
@@ -82,6 +98,11 @@ ml_predictions = Table(
     Column("horizon", SmallInteger, nullable=False),
     Column("predicted_points", Numeric(8, 4), nullable=False),
     Column("actual_points", SmallInteger),                             # filled post-GW
+    Column("fingerprint", String(64)),                                 # features + production model hash (registry/fingerprint.py)
+    # Spread of the forest's per-tree predictions (NULL for models without per-tree outputs)
+    Column("predicted_std", Numeric(8, 4)),
+    Column("predicted_p10", Numeric(8, 4)),
+    Column("predicted_p90", Numeric(8, 4)),
     UniqueConstraint(
         "opta_code", "season_id", "predicted_gameweek_id", "horizon",
         name="uq_predictions_player_gw_horizon",
@@ -90,3 +111,46 @@ ml_predictions = Table(
 
 Index("ix_predictions_predicted_gameweek_id", ml_predictions.c.predicted_gameweek_id)
 Index("ix_predictions_opta_code", ml_predictions.c.opta_code)
+# reconcile.py only ever looks at rows still waiting for their actual points
+Index(
+    "ix_predictions_unreconciled",
+    ml_predictions.c.season_id, ml_predictions.c.predicted_gameweek_id,
+    postgresql_where=ml_predictions.c.actual_points.is_(None),
+)
+
+# 4. Model Accuracy
+# One row per (run_id, horizon): MAE/RMSE over that model's last accuracy.window_gws reconciled GWs
+# (config.yaml), rebuilt by reconcile.py from ml.model_accuracy_gw for the models it touched,
+# so mae/rmse never require a scan of ml.predictions.
+ml_model_accuracy = Table(
+    "model_accuracy", ml_metadata,
+    Column("run_id", UUID(as_uuid=True), primary_key=True),
+    Column("horizon", SmallInteger, primary_key=True),
+    Column("n", Integer, nullable=False),                              # reconciled predictions in the window
+    Column("sum_abs_err", Numeric(14, 4), nullable=False),
+    Column("sum_sq_err", Numeric(16, 4), nullable=False),
+    Column("mae", Numeric(8, 4), nullable=False),
+    Column("rmse", Numeric(8, 4), nullable=False),
+    Column("window_gws", SmallInteger),                                # GWs in the window (<= accuracy.window_gws)
+    Column("first_season_id", SmallInteger),                           # earliest GW in the window
+    Column("first_gameweek_id", SmallInteger),
+    Column("last_season_id", SmallInteger, nullable=False),            # latest reconciled GW
+    Column("last_gameweek_id", SmallInteger, nullable=False),
+    Column("updated_at", TIMESTAMP(timezone=True), nullable=False),
+)
+
+# 5. Model Accuracy per GW
+# One row per (run_id, horizon, GW): error totals of that GW's reconciled predictions.
+# reconcile.py overwrites a GW's row from ml.predictions whenever it (re-)reconciles that GW, so
+# re-running it never double-counts; ml.model_accuracy sums the trailing window of these rows.
+ml_model_accuracy_gw = Table(
+    "model_accuracy_gw", ml_metadata,
+    Column("run_id", UUID(as_uuid=True), primary_key=True),
+    Column("horizon", SmallInteger, primary_key=True),
+    Column("season_id", SmallInteger, primary_key=True),
+    Column("gameweek_id", SmallInteger, primary_key=True),
+    Column("n", Integer, nullable=False),
+    Column("sum_abs_err", Numeric(14, 4), nullable=False),
+    Column("sum_sq_err", Numeric(16, 4), nullable=False),
+    Column("updated_at", TIMESTAMP(timezone=True), nullable=False),
+)
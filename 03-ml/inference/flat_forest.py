@@ -0,0 +1,146 @@
+# Compiled flat-array forest inference.
+# Packs every node of every tree in a fitted RandomForestRegressor into a handful of NumPy arrays
+# (feature, threshold, children, missing direction, values) and evaluates the whole batch against all
+# trees at once. Saved as one .npy per array, so loading is an np.load(mmap_mode="r") — no unpickling.
+# Output matches sklearn's predict within float tolerance.
+# predict_distribution returns the spread of the per-tree predictions (std, quantiles) from the same pass.
+# Version: 1.1.0
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+ARRAY_NAMES = ("feature", "threshold", "children", "missing_left", "value", "roots")
+
+# Rows scored per pass. Memory per pass is n_trees × batch node indices.
+DEFAULT_BATCH_SIZE = 4096
+
+
+def is_forest(model):
+    # Any fitted sklearn forest regressor (RandomForest / ExtraTrees) — trees expose tree_.
+    estimators = getattr(model, "estimators_", None)
+    return isinstance(estimators, list) and len(estimators) > 0 and hasattr(estimators[0], "tree_")
+
+
+def compile_forest(model):
+    trees = [est.tree_ for est in model.estimators_]
+    counts = np.array([t.node_count for t in trees])
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    feature, threshold, left, right, missing_left, value = [], [], [], [], [], []
+    for tree, offset in zip(trees, offsets):
+        node_ids = np.arange(tree.node_count) + offset
+        is_leaf = tree.children_left == -1
+
+        # Leaves point at themselves with an always-true split, so every row can be stepped
+        # max_depth times without checking whether it already reached a leaf.
+        feature.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+        left.append(np.where(is_leaf, node_ids, tree.children_left + offset).astype(np.int32))
+        right.append(np.where(is_leaf, node_ids, tree.children_right + offset).astype(np.int32))
+        if hasattr(tree, "missing_go_to_left"):
+            missing_left.append(np.asarray(tree.missing_go_to_left, dtype=bool))
+        else:
+            missing_left.append(np.zeros(tree.node_count, dtype=bool))
+        value.append(tree.value[:, :, 0])  # (node_count, n_outputs)
+
+    arrays = {
+        "feature": np.concatenate(feature),
+        "threshold": np.concatenate(threshold),
+        # (n_nodes, 2): [left, right] per node, so the next node is children[node, go_right]
+        "children": np.stack([np.concatenate(left), np.concatenate(right)], axis=1),
+        "missing_left": np.concatenate(missing_left),
+        "value": np.ascontiguousarray(np.concatenate(value)),
+        "roots": offsets.astype(np.int32),
+    }
+    meta = {
+        "n_trees": len(trees),
+        "n_features": int(model.n_features_in_),
+        "n_outputs": int(model.n_outputs_),
+        "max_depth": int(max(t.max_depth for t in trees)),
+    }
+    return {"arrays": arrays, "meta": meta}
+
+
+def save_compiled(compiled: dict, directory: Path):
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in ARRAY_NAMES:
+        np.save(directory / f"{name}.npy", compiled["arrays"][name])
+    with open(directory / "meta.json", "w") as f:
+        json.dump(compiled["meta"], f)
+    return directory
+
+
+def load_compiled(directory: Path, mmap: bool = True):
+    directory = Path(directory)
+    mmap_mode = "r" if mmap else None
+    arrays = {name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode) for name in ARRAY_NAMES}
+    with open(directory / "meta.json") as f:
+        meta = json.load(f)
+    return {"arrays": arrays, "meta": meta}
+
+
+def predict_per_tree(compiled: dict, X, batch_size: int = DEFAULT_BATCH_SIZE):
+    # Returns leaf values with shape (n_trees, n_rows, n_outputs).
+    a = compiled["arrays"]
+    meta = compiled["meta"]
+    # sklearn trees compare float32 features against float64 thresholds — do the same for identical splits.
+    X = np.asarray(X, dtype=np.float32)
+    if X.shape[1] != meta["n_features"]:
+        raise ValueError(f"Expected {meta['n_features']} features, got {X.shape[1]}.")
+
+    n_rows, n_features = X.shape
+    out = np.empty((meta["n_trees"], n_rows, meta["n_outputs"]), dtype=np.float64)
+    roots = np.asarray(a["roots"])
+    children = np.asarray(a["children"]).ravel()
+
+    for start in range(0, n_rows, batch_size):
+        Xb = X[start:start + batch_size]
+        flat_X = Xb.ravel()
+        row_offsets = (np.arange(Xb.shape[0]) * n_features)[None, :]
+        nodes = np.repeat(roots[:, None], Xb.shape[0], axis=1)
+
+        # One step down every tree for every row per iteration (n_trees × rows at a time).
+        for _ in range(meta["max_depth"]):
+            x = np.take(flat_X, np.take(a["feature"], nodes) + row_offsets)
+            go_right = ~(x <= np.take(a["threshold"], nodes))
+            missing = np.isnan(x)
+            if missing.any():
+                go_right[missing] = ~a["missing_left"][nodes[missing]]
+            nodes = np.take(children, nodes * 2 + go_right)
+
+        out[:, start:start + Xb.shape[0], :] = a["value"][nodes]
+
+    return out
+
+
+def predict(compiled: dict, X, batch_size: int = DEFAULT_BATCH_SIZE):
+    # Forest mean, shaped like sklearn's predict: (n_rows,) for single-output, (n_rows, n_outputs) otherwise.
+    return predict_distribution(compiled, X, quantiles=(), batch_size=batch_size)["mean"]
+
+
+def predict_distribution(compiled: dict, X, quantiles=(0.1, 0.9), batch_size: int = DEFAULT_BATCH_SIZE):
+    # Mean, std and quantiles across trees, from one traversal per batch of rows.
+    # Returns {"mean", "std", q: ...} (q as given, e.g. 0.1), each shaped like predict().
+    # The spread is the disagreement between trees — a model-uncertainty signal, not a calibrated
+    # interval for the points a player will actually score.
+    X = np.asarray(X, dtype=np.float32)
+    n_rows = X.shape[0]
+    n_outputs = compiled["meta"]["n_outputs"]
+    out = {name: np.empty((n_rows, n_outputs)) for name in ["mean", "std", *quantiles]}
+
+    # Per-tree values are only held for one batch at a time (n_trees × batch × n_outputs)
+    for start in range(0, n_rows, batch_size):
+        rows = slice(start, start + batch_size)
+        per_tree = predict_per_tree(compiled, X[rows], batch_size)
+        out["mean"][rows] = per_tree.mean(axis=0)
+        out["std"][rows] = per_tree.std(axis=0)
+        if quantiles:
+            for q, values in zip(quantiles, np.quantile(per_tree, quantiles, axis=0)):
+                out[q][rows] = values
+
+    if n_outputs == 1:
+        out = {name: values[:, 0] for name, values in out.items()}
+    return out
@@ -1,18 +1,25 @@
 # FPL Gaffer — ML Training Entry Point
-# Version: 1.0.0
+# Version: 1.2.2
 #
 # Usage:
 #   python main.py                              # train h1, triggered_by=manual
 #   python main.py --horizon 2                  # train h2
 #   python main.py --triggered-by experiment    # mark run as an experiment
 #   python main.py --triggered-by pipeline      # used by Airflow
+#   python main.py --multi-output               # one model for all horizons
+#   python main.py --no-cache                   # refit every fold, ignore cached fold results
+#   python main.py --profile cprofile           # write profiles/<run>.prof and print the top functions
+#   python main.py --profile py-spy             # re-run under py-spy record, write profiles/<run>.svg
+#
+# Hyperparameter tuning: see search.py (successive halving over walk-forward folds).
 #
 # The script:
 #   1. Loads config.yaml
 #   2. Loads features from processed.player_gw_features
-#   3. Runs walk-forward validation
+#   3. Runs walk-forward validation (cached folds are reused, see training/fold_cache.py)
 #   4. Saves the final model to artefacts/
 #   5. Logs the run to ml.training_runs and ml.model_artefacts
+#      (with per-fold and final-model cost: preprocess/fit/predict ms, peak RSS, artefact size)
 
 import argparse
 import sys
@@ -25,12 +32,15 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from data.loader import load_features
-from registry.logger import save_run
+from registry.logger import save_run, save_multi_output_run
+from training import fold_cache as fold_cache_module
+from training.profiling import PROFILE_MODES, exec_under_py_spy, profiled, summarise_folds
 from training.registry import ALGORITHM_REGISTRY
 
 VALID_TRIGGERED_BY = {"manual", "pipeline", "experiment"}
 CONFIG_PATH = Path(__file__).parent / "config.yaml"
 ARTEFACTS_DIR = Path(__file__).parent / "artefacts"
+PROFILES_DIR = Path(__file__).parent / "profiles"
 
 def load_config():
     with open(CONFIG_PATH) as f:
@@ -47,6 +57,10 @@ def get_algorithm_module(algorithm: str):
     return importlib.import_module(ALGORITHM_REGISTRY[algorithm])
 
 
+def build_fold_cache(config: dict, algorithm: str, enabled: bool = True):
+    return fold_cache_module.build_fold_cache(config, algorithm, Path(__file__).parent, enabled)
+
+
 def main():
     parser = argparse.ArgumentParser(description="FPL Gaffer — Train ML model")
     parser.add_argument(
@@ -63,13 +77,44 @@ def main():
         choices=list(VALID_TRIGGERED_BY),
         help="Who/what triggered this run. Default: manual.",
     )
+    parser.add_argument(
+        "--multi-output",
+        dest="multi_output",
+        action="store_true",
+        help="Train one multi-output model for all horizons. "
+             "Defaults to training.multi_output in config.yaml.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="no_cache",
+        action="store_true",
+        help="Ignore cached fold results and refit every walk-forward fold.",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        default=None,
+        help="Profile the run: cprofile (in-process, .prof) or py-spy (sampling, flame graph .svg).",
+    )
     args = parser.parse_args()
 
+    run_id = uuid.uuid4()
+    run_at = datetime.now(timezone.utc)
+    profile_label = f"train_{run_at.strftime('%Y%m%d_%H%M%S')}_{str(run_id)[:8]}"
+    if args.profile == "py-spy":
+        exec_under_py_spy(PROFILES_DIR, profile_label)
+
+    with profiled(args.profile, PROFILES_DIR, profile_label):
+        train(args, run_id, run_at)
+
+
+def train(args, run_id: uuid.UUID, run_at: datetime):
     config = load_config()
     algorithm = config["model"]["algorithm"]
     mod = get_algorithm_module(algorithm)
     walk_forward = mod.walk_forward
     get_importances = mod.feature_importances
+    fold_cache = build_fold_cache(config, algorithm, enabled=not args.no_cache)
 
     # Determine which horizons to train
     horizons_to_train = (
@@ -77,17 +122,22 @@ def main():
         else config["training"]["horizons"]
     )
 
-    run_id = uuid.uuid4()
-    run_at = datetime.now(timezone.utc)
+    if args.multi_output or config["training"].get("multi_output", False):
+        train_multi_output(mod, config, algorithm, sorted(horizons_to_train), run_id, run_at, args.triggered_by, fold_cache)
+        return
 
     for horizon in horizons_to_train:
 
         df = load_features(horizon)
 
+        profile, holdout = {}, {}
         fold_metrics, final_model, feature_cols, avg_metrics = walk_forward(
             df=df,
             config=config,
             horizon=horizon,
+            fold_cache=fold_cache,
+            profile=profile,
+            holdout=holdout,
         )
 
         artefact_path = save_run(
@@ -100,10 +150,74 @@ def main():
             fold_metrics=fold_metrics,
             final_model=final_model,
             feature_cols=feature_cols,
-            feature_importances=get_importances(final_model, feature_cols),
+            feature_importances=get_importances(final_model, feature_cols, holdout["X"], holdout["y"]),
             avg_metrics=avg_metrics,
             artefacts_dir=ARTEFACTS_DIR,
+            profile=profile,
         )
+        _print_cache_stats(fold_cache, f"h{horizon}")
+        _print_cost(fold_metrics, profile, f"h{horizon}")
+
+
+def train_multi_output(mod, config, algorithm, horizons, run_id, run_at, triggered_by, fold_cache=None):
+    if not hasattr(mod, "walk_forward_multi"):
+        raise ValueError(f"Algorithm '{algorithm}' does not support multi-output training.")
+
+    # Rows need at least the shortest horizon's target; later horizons are masked in walk_forward_multi.
+    df = load_features(horizons[0])
+
+    profile, holdout = {}, {}
+    fold_metrics, final_model, feature_cols, avg_metrics = mod.walk_forward_multi(
+        df=df,
+        config=config,
+        horizons=horizons,
+        fold_cache=fold_cache,
+        profile=profile,
+        holdout=holdout,
+    )
+
+    save_multi_output_run(
+        run_id=run_id,
+        run_at=run_at,
+        triggered_by=triggered_by,
+        algorithm=algorithm,
+        horizons=horizons,
+        config_snapshot=config,
+        fold_metrics=fold_metrics,
+        final_model=final_model,
+        feature_cols=feature_cols,
+        feature_importances=mod.feature_importances(final_model, feature_cols, holdout["X"], holdout["y"]),
+        avg_metrics=avg_metrics,
+        artefacts_dir=ARTEFACTS_DIR,
+        profile=profile,
+    )
+    label = "multi-output " + ",".join(f"h{h}" for h in horizons)
+    _print_cache_stats(fold_cache, label)
+    # One fit per fold covers every horizon — the first horizon's rows hold the fold costs
+    _print_cost(fold_metrics[horizons[0]], profile, label)
+
+
+def _print_cache_stats(fold_cache, label: str):
+    if fold_cache is None:
+        return
+    print(f"  {label}: {fold_cache.hits} folds from cache, {fold_cache.misses} folds fitted.")
+    fold_cache.hits = fold_cache.misses = 0
+
+
+def _print_cost(fold_metrics: list[dict], profile: dict, label: str):
+    folds = summarise_folds(fold_metrics)
+    if folds["n_timed"]:
+        print(
+            f"  {label}: {folds['n_timed']} timed folds — preprocess {folds['preprocess_ms'] / 1000:.1f}s, "
+            f"fit {folds['fit_ms'] / 1000:.1f}s, predict {folds['predict_ms'] / 1000:.1f}s, "
+            f"peak RSS {folds['peak_rss_mb']} MB"
+        )
+    print(
+        f"  {label}: final model — preprocess {profile['preprocess_ms'] / 1000:.1f}s, "
+        f"fit {profile['fit_ms'] / 1000:.1f}s, predict latest GW {profile['predict_ms']} ms, "
+        f"peak RSS {profile['peak_rss_mb']} MB"
+    )
+
 
 if __name__ == "__main__":
     main()
@@ -1,20 +1,29 @@
 # FPL Gaffer — Prediction Entry Point
-# Version: 1.0.0
+# Version: 1.4.1
 #
 # Loads the production model for each horizon, runs inference on the most
 # recent GW feature rows, and writes predicted points to ml.predictions.
+# Forest models also write the spread of their per-tree predictions (predicted_std, predicted_p10,
+# predicted_p90), taken from the same batched pass over the trees as the mean.
+#
+# Skipped when neither the latest feature rows nor the production models changed since the
+# last write (fingerprints stored on ml.predictions, see registry/fingerprint.py).
 #
 # Usage:
 #   python predict.py                   # predict for all trained horizons
 #   python predict.py --horizon 1       # predict h1 only
+#   python predict.py --force           # re-score and rewrite even if nothing changed
+#   python predict.py --worker-url http://127.0.0.1:8001   # thin client of a running worker.py
 
 import argparse
+import json
 import sys
+import urllib.error
+import urllib.request
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
 
-import joblib
 import pandas as pd
 from sqlalchemy import text
 
@@ -23,35 +32,57 @@ sys.path.insert(0, str(Path(__file__).parent))
 import importlib
 
 from db.engine import engine
+from data.dtypes import KEY_COLS
 from data.loader import load_latest_features
 from training.registry import ALGORITHM_REGISTRY
-from registry.logger import save_predictions
-
-
-def _load_production_artefact(horizon: int):
-    
-    query = text("""
-        SELECT run_id, algorithm, artefact_path, feature_cols, config_snapshot
-        FROM ml.model_artefacts
-        WHERE horizon = :horizon AND is_production = TRUE
-        ORDER BY promoted_at DESC
-        LIMIT 1
-    """)
-    with engine.connect() as conn:
-        row = conn.execute(query, {"horizon": horizon}).mappings().fetchone()
+from registry.logger import save_predictions_bulk, stored_prediction_fingerprints
+from registry.fingerprint import features_fingerprint, horizon_fingerprint
+from registry.artefacts import get_model
 
-    if row is None:
-        raise RuntimeError(
-            f"No production model found for horizon h{horizon}. "
-            "Run main.py first to train and register a model."
-        )
-    return dict(row)
+# Quantiles of the per-tree predictions stored as predicted_p10 / predicted_p90.
+INTERVAL_QUANTILES = (0.1, 0.9)
 
 
-def predict_horizon(horizon: int, features_df: pd.DataFrame, current_gw: int):  # NEW: current_gw added
+def _load_production_artefacts(horizons: list[int] | None = None):
+    # Every production artefact in one round trip: {horizon: artefact row}.
+    # horizons=None resolves all horizons that have a production model.
+    query = """
+        SELECT DISTINCT ON (horizon)
+            horizon, run_id, algorithm, artefact_path, compiled_path, output_index, feature_cols, config_snapshot
+        FROM ml.model_artefacts
+        WHERE is_production = TRUE
+    """
+    params = {}
+    if horizons is not None:
+        query += " AND horizon = ANY(:horizons)"
+        params["horizons"] = list(horizons)
+    query += " ORDER BY horizon, promoted_at DESC"
 
-    artefact = _load_production_artefact(horizon)
-    model = joblib.load(artefact["artefact_path"])
+    with engine.connect() as conn:
+        rows = conn.execute(text(query), params).mappings().fetchall()
+    artefacts = {row["horizon"]: dict(row) for row in rows}
+
+    if horizons is None and not artefacts:
+        raise RuntimeError("No production models found. Run main.py to train first.")
+    for horizon in horizons or []:
+        if horizon not in artefacts:
+            raise RuntimeError(
+                f"No production model found for horizon h{horizon}. "
+                "Run main.py first to train and register a model."
+            )
+    return artefacts
+
+
+def _required_columns(artefacts: dict):
+    # Union of feature_cols across the artefacts, in first-seen order — the only feature columns
+    # inference needs to pull from processed.player_gw_features.
+    columns = []
+    for artefact in artefacts.values():
+        columns.extend(c for c in artefact["feature_cols"] if c not in columns)
+    return columns
+
+
+def _predict_points(artefact: dict, features_df: pd.DataFrame):
     feature_cols: list[str] = artefact["feature_cols"]
     cat_str_cols: list[str] = artefact["config_snapshot"]["features"].get("categorical_str", [])
 
@@ -61,20 +92,110 @@ def predict_horizon(horizon: int, features_df: pd.DataFrame, current_gw: int):
     # Select only the features the model was trained on
     features = algo_module.preprocess(features_df[feature_cols], cat_str_cols)
 
-    predicted_points = model.predict(features).tolist()
+    # Loaded once per run_id and kept warm for the life of the process.
+    # Forests exported at save_run time are scored from memory-mapped node arrays (no unpickling).
+    mmap = artefact["config_snapshot"].get("artefacts", {}).get("mmap", True)
+    model = get_model(artefact["run_id"], artefact["artefact_path"], artefact["compiled_path"], mmap=mmap)
+
+    # Forests: mean, std and quantiles from one pass over the per-tree predictions.
+    # Other models (HistGradientBoosting) only have the point estimate — the spread is left NULL.
+    dist = model.predict_distribution(features, INTERVAL_QUANTILES)
+    if dist is None:
+        return {"predicted_points": model.predict(features)}
+    low, high = INTERVAL_QUANTILES
+    return {
+        "predicted_points": dist["mean"],
+        "predicted_std": dist["std"],
+        "predicted_p10": dist[low],
+        "predicted_p90": dist[high],
+    }
+
+
+def score_horizon(
+    artefact: dict,
+    features_df: pd.DataFrame,
+    model_outputs: dict | None = None,
+    fingerprint: str | None = None,
+):
+    # Returns the prediction batch for one production artefact:
+    # {"run_id", "horizon", "predicted_points", "fingerprint"} plus predicted_std/p10/p90 for forests.
+    # model_outputs caches _predict_points() results by artefact_path across calls, so a multi-output
+    # model shared by several horizons is loaded and scored once.
+    if model_outputs is None:
+        model_outputs = {}
+    if artefact["artefact_path"] not in model_outputs:
+        model_outputs[artefact["artefact_path"]] = _predict_points(artefact, features_df)
+    outputs = model_outputs[artefact["artefact_path"]]
+
+    # Multi-output models return one column per horizon
+    if artefact["output_index"] is not None:
+        outputs = {name: values[:, artefact["output_index"]] for name, values in outputs.items()}
+
+    return {
+        "run_id": uuid.UUID(str(artefact["run_id"])),
+        "horizon": artefact["horizon"],
+        **outputs,
+        "fingerprint": fingerprint,
+    }
+
+
+def run_predictions(artefacts: dict, force: bool = False, features: tuple | None = None):
+    # Scores and writes the latest feature rows for every artefact ({horizon: row} from _load_production_artefacts).
+    # features: (features_df, current_gw) already loaded with _required_columns(artefacts) — the worker passes
+    # its cached frame; None loads it here.
+    # Returns {"current_gw", "written": [horizons], "skipped": [horizons], "rows": n}.
+    # OLD: features_df = load_latest_features()
+    # NEW: also returns current_gw (global max GW) for consistent prediction tagging
+    # Only the columns the production models were trained on (+ keys), with compact dtypes
+    columns = _required_columns(artefacts)
+    features_df, current_gw = features or load_latest_features(columns=columns)
+    # Exactly the columns a standalone run loads, so CLI and worker runs produce the same fingerprints
+    features_df = features_df[KEY_COLS + [c for c in columns if c not in KEY_COLS]]
+    horizons = sorted(artefacts)
+
+    # Skip-if-unchanged: same feature rows + same production run_id per horizon = same predictions
+    features_fp = features_fingerprint(features_df, current_gw)
+    fingerprints = {h: horizon_fingerprint(features_fp, artefacts[h]) for h in horizons}
+    unchanged = []
+    if not force:
+        stored = stored_prediction_fingerprints(
+            season_id=int(features_df["season_id"].max()),
+            features_gameweek_id=current_gw,
+        )
+        unchanged = [h for h in horizons if stored.get(h) == fingerprints[h]]
+        horizons = [h for h in horizons if h not in unchanged]
+
+    n = 0
+    if horizons:
+        model_outputs = {}
+        batches = []
+        for horizon in horizons:
+            batches.append(score_horizon(artefacts[horizon], features_df, model_outputs, fingerprints[horizon]))
+
+        # All horizons in one COPY + merge transaction
+        n = save_predictions_bulk(
+            predicted_at=datetime.now(timezone.utc),
+            features_df=features_df,
+            batches=batches,
+            current_gw=current_gw,  # NEW: current_gw threaded through
+        )
+    return {"current_gw": current_gw, "written": horizons, "skipped": unchanged, "rows": n}
 
-    predicted_at = datetime.now(timezone.utc)
-    run_id = uuid.UUID(str(artefact["run_id"]))
 
-    n = save_predictions(
-        run_id=run_id,
-        predicted_at=predicted_at,
-        horizon=horizon,
-        features_df=features_df,
-        predicted_points=predicted_points,
-        current_gw=current_gw,  # NEW: passed through from load_latest_features
+def _request_worker(worker_url: str, horizon: int | None, force: bool):
+    # Thin-client mode: the worker (worker.py) already holds the models and does the same run.
+    body = json.dumps({"horizons": [horizon] if horizon is not None else None, "force": force}).encode()
+    req = urllib.request.Request(
+        worker_url.rstrip("/") + "/predict-latest",
+        data=body,
+        headers={"Content-Type": "application/json"},
+        method="POST",
     )
-    print(f"  Horizon h{horizon}: Predicted points for {n} rows.")
+    try:
+        with urllib.request.urlopen(req, timeout=300) as resp:
+            return json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(f"Worker returned {e.code}: {e.read().decode(errors='replace')}") from e
 
 
 def main():
@@ -85,29 +206,32 @@ def main():
         default=None,
         help="Horizon to predict (1, 2, or 3). Defaults to all registered horizons.",
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-score and rewrite predictions even if features and production models are unchanged.",
+    )
+    parser.add_argument(
+        "--worker-url",
+        dest="worker_url",
+        default=None,
+        help="Run through a prediction worker (e.g. http://127.0.0.1:8001) instead of loading models here.",
+    )
     args = parser.parse_args()
 
-    if args.horizon is not None:
-        horizons = [args.horizon]
+    if args.worker_url:
+        summary = _request_worker(args.worker_url, args.horizon, args.force)
     else:
-        with engine.connect() as conn:
-            rows = conn.execute(text("""
-                SELECT DISTINCT horizon FROM ml.model_artefacts
-                WHERE is_production = TRUE ORDER BY horizon
-            """)).fetchall()
-        horizons = [r[0] for r in rows]
-        if not horizons:
-            raise RuntimeError("No production models found. Run main.py to train first.")
-
-    # Load features once — shared across all horizons
-    # OLD: features_df = load_latest_features()
-    # NEW: also returns current_gw (global max GW) for consistent prediction tagging
-    features_df, current_gw = load_latest_features()
-
-    for horizon in horizons:
-        # OLD: predict_horizon(horizon, features_df)
-        predict_horizon(horizon, features_df, current_gw)  # NEW: current_gw threaded through
-
+        # One query resolves every production artefact (and, without --horizon, which horizons exist)
+        artefacts = _load_production_artefacts([args.horizon] if args.horizon is not None else None)
+        summary = run_predictions(artefacts, force=args.force)
+
+    if summary["skipped"]:
+        print(f"  Horizons {', '.join(f'h{h}' for h in summary['skipped'])}: unchanged since last run — skipped.")
+    if not summary["written"]:
+        print("  Nothing to predict. Use --force to rewrite anyway.")
+        return
+    print(f"  Horizons {', '.join(f'h{h}' for h in summary['written'])}: Predicted points for {summary['rows']} rows.")
     print("  Predictions written to ml.predictions.")
 
 
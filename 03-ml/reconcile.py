@@ -0,0 +1,222 @@
+# FPL Gaffer — Actual Points Reconciliation
+# Version: 1.1.0
+#
+# Run after each ingestion. In one transaction:
+#   1. Fills ml.predictions.actual_points for predictions of finished GWs that are still NULL,
+#      from archive.player_gw_history — summed over a double GW, 0 for a blank GW or no appearance.
+#      A GW is only reconciled once it is finished and its history rows have been ingested.
+#      --season/--gameweek re-fills one GW even if already reconciled (e.g. after corrected history).
+#   2. Rewrites ml.model_accuracy_gw for every (run_id, horizon, GW) that step 1 touched, from that GW's
+#      reconciled predictions — an upsert that replaces the row, so re-reconciling a GW never double-counts.
+#   3. Rebuilds ml.model_accuracy for the touched models: MAE/RMSE over each model's last
+#      accuracy.window_gws reconciled GWs (config.yaml), summed from the per-GW rows.
+# Each run only reads the predictions of the GWs it reconciles, never the full history.
+#
+# Usage:
+#   python reconcile.py
+#   python reconcile.py --season 25 --gameweek 12    # re-reconcile one GW
+#   python reconcile.py --rebuild                    # recompute all accuracy rows (first run on an existing DB)
+
+import argparse
+import sys
+from pathlib import Path
+
+import yaml
+from sqlalchemy import text
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from db.engine import engine
+
+CONFIG_PATH = Path(__file__).parent / "config.yaml"
+DEFAULT_WINDOW_GWS = 5
+
+# Step 1. {target} selects the rows to fill: still-NULL ones, or every row of one GW.
+FILL_SQL = """
+    WITH finished AS (
+        SELECT g.season_id, g.gameweek_id
+        FROM archive.gameweeks g
+        WHERE g.finished
+          AND EXISTS (
+              SELECT 1 FROM archive.player_gw_history h
+              WHERE h.season_id = g.season_id AND h.gameweek_id = g.gameweek_id
+          )
+    ),
+    actuals AS (
+        SELECT p.id, COALESCE(SUM(h.total_points), 0) AS actual_points
+        FROM ml.predictions p
+        JOIN finished f
+            ON f.season_id = p.season_id AND f.gameweek_id = p.predicted_gameweek_id
+        LEFT JOIN archive.player_gw_history h
+            ON h.opta_code = p.opta_code
+           AND h.season_id = p.season_id
+           AND h.gameweek_id = p.predicted_gameweek_id
+        WHERE {target}
+        GROUP BY p.id
+    ),
+    reconciled AS (
+        UPDATE ml.predictions p
+        SET actual_points = a.actual_points
+        FROM actuals a
+        WHERE p.id = a.id
+        RETURNING p.run_id, p.horizon, p.season_id, p.predicted_gameweek_id
+    )
+    SELECT CAST(run_id AS text) AS run_id, horizon, season_id, predicted_gameweek_id AS gameweek_id,
+           COUNT(*) AS n_new
+    FROM reconciled
+    GROUP BY run_id, horizon, season_id, predicted_gameweek_id
+"""
+FILL_NEW_SQL = text(FILL_SQL.format(target="p.actual_points IS NULL"))
+FILL_GW_SQL = text(FILL_SQL.format(target="p.season_id = :season_id AND p.predicted_gameweek_id = :gameweek_id"))
+
+# Every reconciled (run_id, horizon, GW) — the keys --rebuild recomputes
+RECONCILED_KEYS_SQL = text("""
+    SELECT DISTINCT CAST(run_id AS text) AS run_id, horizon, season_id, predicted_gameweek_id AS gameweek_id
+    FROM ml.predictions
+    WHERE actual_points IS NOT NULL
+""")
+
+# Step 2 — separate statement so it sees step 1's updates
+GW_ACCURACY_SQL = text("""
+    INSERT INTO ml.model_accuracy_gw AS g (
+        run_id, horizon, season_id, gameweek_id, n, sum_abs_err, sum_sq_err, updated_at
+    )
+    SELECT
+        p.run_id, p.horizon, p.season_id, p.predicted_gameweek_id,
+        COUNT(*),
+        SUM(ABS(p.predicted_points - p.actual_points)),
+        SUM((p.predicted_points - p.actual_points) * (p.predicted_points - p.actual_points)),
+        NOW()
+    FROM ml.predictions p
+    JOIN unnest(
+        CAST(:run_ids AS uuid[]), CAST(:horizons AS smallint[]),
+        CAST(:season_ids AS smallint[]), CAST(:gameweek_ids AS smallint[])
+    ) AS k(run_id, horizon, season_id, gameweek_id)
+        ON k.run_id = p.run_id AND k.horizon = p.horizon
+       AND k.season_id = p.season_id AND k.gameweek_id = p.predicted_gameweek_id
+    WHERE p.actual_points IS NOT NULL
+    GROUP BY p.run_id, p.horizon, p.season_id, p.predicted_gameweek_id
+    ON CONFLICT (run_id, horizon, season_id, gameweek_id) DO UPDATE SET
+        n = EXCLUDED.n,
+        sum_abs_err = EXCLUDED.sum_abs_err,
+        sum_sq_err = EXCLUDED.sum_sq_err,
+        updated_at = EXCLUDED.updated_at
+""")
+
+# Step 3
+WINDOW_ACCURACY_SQL = text("""
+    WITH models AS (
+        SELECT DISTINCT run_id, horizon
+        FROM unnest(CAST(:run_ids AS uuid[]), CAST(:horizons AS smallint[])) AS m(run_id, horizon)
+    ),
+    ranked AS (
+        SELECT g.*, ROW_NUMBER() OVER (
+            PARTITION BY g.run_id, g.horizon ORDER BY g.season_id DESC, g.gameweek_id DESC
+        ) AS recency
+        FROM ml.model_accuracy_gw g
+        JOIN models m ON m.run_id = g.run_id AND m.horizon = g.horizon
+    ),
+    windowed AS (
+        SELECT
+            run_id,
+            horizon,
+            COUNT(*) AS window_gws,
+            SUM(n) AS n,
+            SUM(sum_abs_err) AS sum_abs_err,
+            SUM(sum_sq_err) AS sum_sq_err,
+            MIN(season_id * 100 + gameweek_id) AS first_step,
+            MAX(season_id * 100 + gameweek_id) AS last_step
+        FROM ranked
+        WHERE recency <= :window_gws
+        GROUP BY run_id, horizon
+    )
+    INSERT INTO ml.model_accuracy AS acc (
+        run_id, horizon, n, sum_abs_err, sum_sq_err, mae, rmse, window_gws,
+        first_season_id, first_gameweek_id, last_season_id, last_gameweek_id, updated_at
+    )
+    SELECT
+        run_id, horizon, n, sum_abs_err, sum_sq_err,
+        sum_abs_err / n,
+        SQRT(sum_sq_err / n),
+        window_gws,
+        first_step / 100,
+        first_step % 100,
+        last_step / 100,
+        last_step % 100,
+        NOW()
+    FROM windowed
+    ON CONFLICT (run_id, horizon) DO UPDATE SET
+        n = EXCLUDED.n,
+        sum_abs_err = EXCLUDED.sum_abs_err,
+        sum_sq_err = EXCLUDED.sum_sq_err,
+        mae = EXCLUDED.mae,
+        rmse = EXCLUDED.rmse,
+        window_gws = EXCLUDED.window_gws,
+        first_season_id = EXCLUDED.first_season_id,
+        first_gameweek_id = EXCLUDED.first_gameweek_id,
+        last_season_id = EXCLUDED.last_season_id,
+        last_gameweek_id = EXCLUDED.last_gameweek_id,
+        updated_at = EXCLUDED.updated_at
+    RETURNING CAST(acc.run_id AS text) AS run_id, acc.horizon, acc.window_gws, acc.n, acc.mae, acc.rmse
+""")
+
+
+def load_window_gws():
+    with open(CONFIG_PATH) as f:
+        return int((yaml.safe_load(f).get("accuracy") or {}).get("window_gws", DEFAULT_WINDOW_GWS))
+
+
+def reconcile(window_gws: int, season_id: int | None = None, gameweek_id: int | None = None,
+              rebuild: bool = False):
+    # Returns (reconciled, accuracy): reconciled = one dict per (run_id, horizon, GW) filled by this run
+    # (with n_new), accuracy = the rebuilt ml.model_accuracy rows of the models touched.
+    with engine.begin() as conn:
+        if season_id is not None:
+            reconciled = conn.execute(FILL_GW_SQL, {"season_id": season_id, "gameweek_id": gameweek_id})
+        else:
+            reconciled = conn.execute(FILL_NEW_SQL)
+        reconciled = [dict(row) for row in reconciled.mappings().fetchall()]
+        keys = [dict(row) for row in conn.execute(RECONCILED_KEYS_SQL).mappings()] if rebuild else reconciled
+        if not keys:
+            return reconciled, []
+
+        conn.execute(GW_ACCURACY_SQL, {
+            "run_ids": [k["run_id"] for k in keys],
+            "horizons": [k["horizon"] for k in keys],
+            "season_ids": [k["season_id"] for k in keys],
+            "gameweek_ids": [k["gameweek_id"] for k in keys],
+        })
+        accuracy = conn.execute(WINDOW_ACCURACY_SQL, {
+            "run_ids": [k["run_id"] for k in keys],
+            "horizons": [k["horizon"] for k in keys],
+            "window_gws": window_gws,
+        })
+        return reconciled, [dict(row) for row in accuracy.mappings().fetchall()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill actual points and refresh live model accuracy")
+    parser.add_argument("--season", type=int, help="re-reconcile one GW (with --gameweek)")
+    parser.add_argument("--gameweek", type=int)
+    parser.add_argument("--window", type=int, help="GWs in the accuracy window (default: config accuracy.window_gws)")
+    parser.add_argument("--rebuild", action="store_true", help="recompute accuracy for every reconciled GW")
+    args = parser.parse_args()
+    if (args.season is None) != (args.gameweek is None):
+        parser.error("--season and --gameweek go together")
+
+    window_gws = args.window or load_window_gws()
+    reconciled, accuracy = reconcile(window_gws, args.season, args.gameweek, args.rebuild)
+    if reconciled:
+        print(f"  Reconciled {sum(r['n_new'] for r in reconciled)} predictions.")
+    else:
+        print("  No newly finished GWs to reconcile.")
+
+    for r in sorted(accuracy, key=lambda r: (r["horizon"], r["run_id"])):
+        print(
+            f"  h{r['horizon']} run {r['run_id'][:8]}: last {r['window_gws']} GWs, "
+            f"n={r['n']} MAE={float(r['mae']):.4f} RMSE={float(r['rmse']):.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# Model artefact storage and a process-level cache of loaded models.
+# - dump_model: joblib pickle, optionally compressed (cold storage, ~3x smaller for forests).
+# - load_model: uncompressed pickles are opened with mmap_mode="r" so large arrays are not copied.
+# - Forests also have a flat-array export (inference/flat_forest.py) that is always memory-mapped
+#   and is preferred for scoring. It is never compressed — it is the hot path.
+# - get_model: loads once per (run_id, artefact path) and keeps it warm for long-lived processes.
+# No DB imports here, so benchmarks and tooling can use it offline.
+#
+# Usage (cold storage):
+#   python registry/artefacts.py --compress 3 artefacts/random_forest_h1_*.pkl
+#
+# Version: 1.1.0
+
+import argparse
+import os
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import joblib
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from inference import flat_forest
+
+# Uncompressed pickles start with the PROTO opcode. Compressed joblib files start with a codec magic.
+_PICKLE_PROTO = b"\x80"
+
+# Models kept warm per process. Each production horizon is one entry (one for a multi-output model).
+MODEL_CACHE_SIZE = 8
+
+_model_cache: OrderedDict = OrderedDict()
+_model_cache_lock = threading.Lock()
+
+
+class LoadedModel:
+    # A loaded artefact. Scores through the flat-array forest when there is one, else the sklearn model.
+
+    def __init__(self, run_id: str, artefact_path: str, compiled=None, model=None):
+        self.run_id = run_id
+        self.artefact_path = artefact_path
+        self.compiled = compiled
+        self._model = model
+
+    @property
+    def model(self):
+        # The pickle is only needed when there is no compiled forest, or for introspection.
+        if self._model is None:
+            self._model = load_model(self.artefact_path)
+        return self._model
+
+    def predict(self, X):
+        if self.compiled is not None:
+            return flat_forest.predict(self.compiled, X)
+        return self.model.predict(X)
+
+    def predict_distribution(self, X, quantiles=(0.1, 0.9)):
+        # Forests: {"mean", "std", q...} from one pass over the per-tree predictions (see flat_forest).
+        # Forests saved before compiled export are compiled here once and kept on this instance.
+        # Other models have no per-tree outputs: returns None.
+        if self.compiled is None:
+            if not flat_forest.is_forest(self.model):
+                return None
+            self.compiled = flat_forest.compile_forest(self.model)
+        return flat_forest.predict_distribution(self.compiled, X, quantiles)
+
+
+def dump_model(model, path: Path, compress: int = 0):
+    path = Path(path)
+    joblib.dump(model, path, compress=compress)
+    return path.stat().st_size
+
+
+def is_compressed(path: Path):
+    with open(path, "rb") as f:
+        return f.read(1) != _PICKLE_PROTO
+
+
+def load_model(path: Path, mmap: bool = True):
+    mmap_mode = "r" if mmap and not is_compressed(path) else None
+    return joblib.load(path, mmap_mode=mmap_mode)
+
+
+def compress_artefact(path: Path, compress: int = 3):
+    # Rewrites an artefact in place with compression. Written to a temp file first so the
+    # artefact is never half-written.
+    path = Path(path)
+    model = joblib.load(path)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    size = dump_model(model, tmp, compress=compress)
+    os.replace(tmp, path)
+    return size
+
+
+def get_model(run_id, artefact_path: str, compiled_path: str | None = None, mmap: bool = True):
+    key = (str(run_id), str(artefact_path))
+    with _model_cache_lock:
+        if key in _model_cache:
+            _model_cache.move_to_end(key)
+            return _model_cache[key]
+
+    if compiled_path and Path(compiled_path).exists():
+        loaded = LoadedModel(str(run_id), str(artefact_path), compiled=flat_forest.load_compiled(compiled_path, mmap=mmap))
+    else:
+        loaded = LoadedModel(str(run_id), str(artefact_path), model=load_model(artefact_path, mmap=mmap))
+
+    with _model_cache_lock:
+        _model_cache[key] = loaded
+        while len(_model_cache) > MODEL_CACHE_SIZE:
+            _model_cache.popitem(last=False)
+    return loaded
+
+
+def clear_model_cache():
+    with _model_cache_lock:
+        _model_cache.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FPL Gaffer — Compress model artefacts for cold storage")
+    parser.add_argument("paths", nargs="+", help=".pkl artefacts to rewrite with compression.")
+    parser.add_argument("--compress", type=int, default=3, help="joblib compression level (1-9). Default: 3.")
+    args = parser.parse_args()
+
+    for path in args.paths:
+        before = Path(path).stat().st_size
+        after = compress_artefact(path, args.compress)
+        print(f"  {path}: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,26 @@
 # Persists training run metadata, model artefact records, and predictions to the ml schema.
-# Version: 1.1.0
+# Version: 1.9.3
 
+import json
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
 
-import joblib
 import pandas as pd
 from sqlalchemy import text
-from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from db.engine import engine
-from db.schema import ml_training_runs, ml_model_artefacts, ml_predictions
+from db.schema import ml_training_runs, ml_model_artefacts
+from inference.flat_forest import compile_forest, is_forest, save_compiled
+from registry.artefacts import dump_model
+from registry.bulk import PREDICTION_COLUMNS, prediction_frame, to_csv_buffer
+from training.profiling import path_size_bytes
+
+# NOTIFY channel signalled after every predictions write; 04-optimizer expires its cached player pool on it.
+PREDICTIONS_CHANNEL = "ml_predictions"
+
+# Cost columns shared by ml.training_runs (per fold) and ml.model_artefacts (final model).
+COST_COLUMNS = ["preprocess_ms", "fit_ms", "predict_ms", "peak_rss_mb"]
 
 def save_run(
     *,
@@ -27,15 +36,150 @@ def save_run(
     feature_importances: dict,
     avg_metrics: dict,
     artefacts_dir: Path,
+    profile: dict | None = None,
 ):
-    
+    # profile: the final model's cost from walk_forward(profile=...); stored on the artefact row.
     short_id = str(run_id)[:8]
     ts = run_at.strftime("%Y%m%d_%H%M%S")
     pkl_filename = f"{algorithm}_h{horizon}_{ts}_{short_id}.pkl"
     artefact_path = artefacts_dir / pkl_filename
 
+    # 1. Save fold metrics to ml.training_runs
+    fold_rows = _fold_rows(run_id, run_at, triggered_by, algorithm, horizon, config_snapshot, fold_metrics)
+
+    with engine.begin() as conn:
+        conn.execute(ml_training_runs.insert(), fold_rows)
+
+    # 2. Save model to disk (plus the flat-array export used for inference, for forests)
+    artefacts_dir.mkdir(parents=True, exist_ok=True)
+    dump_model(final_model, artefact_path, compress=config_snapshot.get("artefacts", {}).get("compress", 0))
+    compiled_path = _export_compiled(final_model, artefact_path)
+    cost = _artefact_cost(profile, artefact_path, compiled_path)
+
+    # 3. Demote existing production models for this horizon, then insert new one
+    with engine.begin() as conn:
+        _promote_artefact(
+            conn,
+            run_id=run_id,
+            run_at=run_at,
+            triggered_by=triggered_by,
+            algorithm=algorithm,
+            horizon=horizon,
+            artefact_path=artefact_path,
+            compiled_path=compiled_path,
+            output_index=None,
+            feature_cols=feature_cols,
+            feature_importances=feature_importances,
+            config_snapshot=config_snapshot,
+            n_folds=len(fold_metrics),
+            avg_metrics=avg_metrics,
+            cost=cost,
+        )
+
+    return artefact_path
+
+
+def save_multi_output_run(
+    *,
+    run_id: uuid.UUID,
+    run_at: datetime,
+    triggered_by: str,
+    algorithm: str,
+    horizons: list[int],
+    config_snapshot: dict,
+    fold_metrics: dict[int, list[dict]],
+    final_model,
+    feature_cols: list[str],
+    feature_importances: dict,
+    avg_metrics: dict[int, dict],
+    artefacts_dir: Path,
+    profile: dict | None = None,
+):
+    # Same as save_run, for one model covering several horizons.
+    # Fold metrics are still written per horizon; the model is saved once and registered once per
+    # horizon with output_index pointing at its column of predict(). With a single horizon the estimator
+    # is fitted on a 1-D target and predict() returns a vector, so output_index stays NULL (single-output).
+    short_id = str(run_id)[:8]
+    ts = run_at.strftime("%Y%m%d_%H%M%S")
+    horizon_tag = "".join(str(h) for h in horizons)
+    pkl_filename = f"{algorithm}_multi_h{horizon_tag}_{ts}_{short_id}.pkl"
+    artefact_path = artefacts_dir / pkl_filename
+
     # 1. Save fold metrics to ml.training_runs
     fold_rows = [
+        row
+        for horizon in horizons
+        for row in _fold_rows(run_id, run_at, triggered_by, algorithm, horizon, config_snapshot, fold_metrics[horizon])
+    ]
+
+    with engine.begin() as conn:
+        conn.execute(ml_training_runs.insert(), fold_rows)
+
+    # 2. Save model to disk (plus the flat-array export used for inference, for forests)
+    artefacts_dir.mkdir(parents=True, exist_ok=True)
+    dump_model(final_model, artefact_path, compress=config_snapshot.get("artefacts", {}).get("compress", 0))
+    compiled_path = _export_compiled(final_model, artefact_path)
+    cost = _artefact_cost(profile, artefact_path, compiled_path)
+
+    # 3. Demote and insert per horizon — all in one transaction so the horizons switch together
+    with engine.begin() as conn:
+        for column, horizon in enumerate(horizons):
+            _promote_artefact(
+                conn,
+                run_id=run_id,
+                run_at=run_at,
+                triggered_by=triggered_by,
+                algorithm=algorithm,
+                horizon=horizon,
+                artefact_path=artefact_path,
+                compiled_path=compiled_path,
+                output_index=column if len(horizons) > 1 else None,
+                feature_cols=feature_cols,
+                feature_importances=feature_importances,
+                config_snapshot=config_snapshot,
+                n_folds=len(fold_metrics[horizon]),
+                avg_metrics=avg_metrics[horizon],
+                cost=cost,
+            )
+
+    return artefact_path
+
+
+def _export_compiled(final_model, artefact_path: Path):
+    # Forests are also written as packed node arrays next to the .pkl (see inference/flat_forest.py).
+    if not is_forest(final_model):
+        return None
+    return save_compiled(compile_forest(final_model), artefact_path.with_suffix(".forest"))
+
+
+def _artefact_cost(profile: dict | None, artefact_path: Path, compiled_path: Path | None):
+    cost = {col: (profile or {}).get(col) for col in COST_COLUMNS}
+    cost["artefact_size_bytes"] = path_size_bytes(artefact_path) + (
+        path_size_bytes(compiled_path) if compiled_path is not None else 0
+    )
+    return cost
+
+
+def save_search_trial(
+    *,
+    run_id: uuid.UUID,
+    run_at: datetime,
+    search_id: uuid.UUID,
+    algorithm: str,
+    horizon: int,
+    config_snapshot: dict,
+    fold_metrics: list[dict],
+):
+    # One search.py trial: fold rows only (no artefact), tagged with the search it belongs to.
+    fold_rows = _fold_rows(run_id, run_at, "experiment", algorithm, horizon, config_snapshot, fold_metrics)
+    for row in fold_rows:
+        row["search_id"] = search_id
+    with engine.begin() as conn:
+        conn.execute(ml_training_runs.insert(), fold_rows)
+
+
+def _fold_rows(run_id, run_at, triggered_by, algorithm, horizon, config_snapshot, fold_metrics):
+    return [
         {
             "run_id": run_id,
             "run_at": run_at,
@@ -51,46 +195,58 @@ def save_run(
             "mae": f["mae"],
             "rmse": f["rmse"],
             "r2": f["r2"],
+            **{col: f.get(col) for col in COST_COLUMNS},
         }
         for f in fold_metrics
     ]
 
-    with engine.begin() as conn:
-        conn.execute(ml_training_runs.insert(), fold_rows)
-
-    # 2. Save model to disk
-    artefacts_dir.mkdir(parents=True, exist_ok=True)
-    joblib.dump(final_model, artefact_path)
 
-    # 3. Demote existing production models for this horizon, then insert new one
-    with engine.begin() as conn:
-        conn.execute(
-            ml_model_artefacts.update()
-            .where(ml_model_artefacts.c.horizon == horizon)
-            .where(ml_model_artefacts.c.is_production == True)
-            .values(is_production=False)
-        )
-        conn.execute(
-            ml_model_artefacts.insert().values(
-                run_id=run_id,
-                run_at=run_at,
-                triggered_by=triggered_by,
-                algorithm=algorithm,
-                horizon=horizon,
-                artefact_path=str(artefact_path),
-                feature_cols=feature_cols,
-                feature_importances=feature_importances,
-                config_snapshot=config_snapshot,
-                n_folds=len(fold_metrics),
-                avg_mae=avg_metrics["avg_mae"],
-                avg_rmse=avg_metrics["avg_rmse"],
-                avg_r2=avg_metrics["avg_r2"],
-                is_production=True,
-                promoted_at=datetime.now(timezone.utc),
-            )
+def _promote_artefact(
+    conn,
+    *,
+    run_id: uuid.UUID,
+    run_at: datetime,
+    triggered_by: str,
+    algorithm: str,
+    horizon: int,
+    artefact_path: Path,
+    compiled_path: Path | None,
+    output_index: int | None,
+    feature_cols: list[str],
+    feature_importances: dict,
+    config_snapshot: dict,
+    n_folds: int,
+    avg_metrics: dict,
+    cost: dict | None = None,
+):
+    conn.execute(
+        ml_model_artefacts.update()
+        .where(ml_model_artefacts.c.horizon == horizon)
+        .where(ml_model_artefacts.c.is_production == True)
+        .values(is_production=False)
+    )
+    conn.execute(
+        ml_model_artefacts.insert().values(
+            run_id=run_id,
+            run_at=run_at,
+            triggered_by=triggered_by,
+            algorithm=algorithm,
+            horizon=horizon,
+            artefact_path=str(artefact_path),
+            compiled_path=str(compiled_path) if compiled_path is not None else None,
+            output_index=output_index,
+            feature_cols=feature_cols,
+            feature_importances=feature_importances,
+            config_snapshot=config_snapshot,
+            n_folds=n_folds,
+            avg_mae=avg_metrics["avg_mae"],
+            avg_rmse=avg_metrics["avg_rmse"],
+            avg_r2=avg_metrics["avg_r2"],
+            **(cost or {}),
+            is_production=True,
+            promoted_at=datetime.now(timezone.utc),
         )
-
-    return artefact_path
+    )
 
 
 def save_predictions(
@@ -101,40 +257,104 @@ def save_predictions(
     features_df: pd.DataFrame,
     predicted_points: list[float],
     current_gw: int,  # NEW: global current GW passed explicitly
+    fingerprint: str | None = None,
 ):
-
-    rows = [
-        {
+    # Single-horizon wrapper around save_predictions_bulk.
+    return save_predictions_bulk(
+        predicted_at=predicted_at,
+        features_df=features_df,
+        batches=[{
             "run_id": run_id,
-            "predicted_at": predicted_at,
-            "opta_code": int(row["opta_code"]),
-            "season_id": int(row["season_id"]),
-            # OLD: used row["gameweek_id"] — blank-GW players were tagged with GW-1,
-            # making the optimizer's MAX(features_gameweek_id) filter exclude them.
-            # "features_gameweek_id": int(row["gameweek_id"]),
-            # "predicted_gameweek_id": int(row["gameweek_id"]) + horizon,
-            # NEW: always tag with the global current GW so all players are consistent.
-            "features_gameweek_id": current_gw,
-            "predicted_gameweek_id": current_gw + horizon,
             "horizon": horizon,
-            "predicted_points": round(float(pts), 4),
-            "actual_points": None,
-        }
-        for (_, row), pts in zip(features_df.iterrows(), predicted_points)
-    ]
+            "predicted_points": predicted_points,
+            "fingerprint": fingerprint,
+        }],
+        current_gw=current_gw,
+    )
 
-    stmt = pg_insert(ml_predictions).values(rows)
-    stmt = stmt.on_conflict_do_update(
-        constraint="uq_predictions_player_gw_horizon",
-        set_={
-            "run_id": stmt.excluded.run_id,
-            "predicted_at": stmt.excluded.predicted_at,
-            "features_gameweek_id": stmt.excluded.features_gameweek_id,
-            "predicted_points": stmt.excluded.predicted_points,
-        },
+
+def save_predictions_bulk(
+    *,
+    predicted_at: datetime,
+    features_df: pd.DataFrame,
+    batches: list[dict],
+    current_gw: int | None,
+):
+    # Writes every horizon's predictions in one transaction:
+    # columnar frame -> COPY into a temp staging table -> one INSERT ... ON CONFLICT merge.
+    # batches: [{"run_id", "horizon", "predicted_points", "fingerprint"}, ...], each aligned with features_df rows.
+    # Batches may also carry "predicted_std", "predicted_p10", "predicted_p90" (see registry/bulk.py).
+    # current_gw=None keeps each row's own gameweek_id (historical backfills).
+    # OLD: one pg_insert(...).values(rows) per horizon, rows built with features_df.iterrows().
+    # Blank-GW fix still applies: with current_gw set, every row is tagged with the global current GW.
+    frame = prediction_frame(
+        predicted_at=predicted_at,
+        features_df=features_df,
+        batches=batches,
+        current_gw=current_gw,
     )
+    cols = ", ".join(PREDICTION_COLUMNS)
 
     with engine.begin() as conn:
-        conn.execute(stmt)
+        conn.execute(text(f"""
+            CREATE TEMP TABLE predictions_staging ON COMMIT DROP AS
+            SELECT {cols} FROM ml.predictions WITH NO DATA
+        """))
+        _copy_csv(conn, f"COPY predictions_staging ({cols}) FROM STDIN WITH (FORMAT csv)", to_csv_buffer(frame))
+        conn.execute(text(f"""
+            INSERT INTO ml.predictions ({cols})
+            SELECT {cols} FROM predictions_staging
+            ON CONFLICT ON CONSTRAINT uq_predictions_player_gw_horizon DO UPDATE SET
+                run_id = EXCLUDED.run_id,
+                predicted_at = EXCLUDED.predicted_at,
+                features_gameweek_id = EXCLUDED.features_gameweek_id,
+                predicted_points = EXCLUDED.predicted_points,
+                fingerprint = EXCLUDED.fingerprint,
+                predicted_std = EXCLUDED.predicted_std,
+                predicted_p10 = EXCLUDED.predicted_p10,
+                predicted_p90 = EXCLUDED.predicted_p90,
+                actual_points = NULL  -- a rewritten prediction is reconciled again (reconcile.py) under its new run_id
+        """))
+        # Delivered to listeners on commit, i.e. only once the new rows are visible
+        if len(frame):
+            payload = json.dumps({
+                "season_id": int(frame["season_id"].max()),
+                "features_gameweek_id": int(frame["features_gameweek_id"].max()),
+                "horizons": sorted(int(h) for h in frame["horizon"].unique()),
+            })
+            conn.execute(
+                text("SELECT pg_notify(:channel, :payload)"), {"channel": PREDICTIONS_CHANNEL, "payload": payload}
+            )
+
+    return len(frame)
+
+
+def stored_prediction_fingerprints(*, season_id: int, features_gameweek_id: int):
+    # {horizon: fingerprint} for the predictions already written from this feature GW.
+    # A horizon whose rows carry mixed or NULL fingerprints maps to None (never matches).
+    query = text("""
+        SELECT horizon, MIN(fingerprint) AS fingerprint,
+               COUNT(DISTINCT fingerprint) = 1 AND COUNT(fingerprint) = COUNT(*) AS uniform
+        FROM ml.predictions
+        WHERE season_id = :season_id AND features_gameweek_id = :features_gameweek_id
+        GROUP BY horizon
+    """)
+    with engine.connect() as conn:
+        rows = conn.execute(query, {
+            "season_id": season_id,
+            "features_gameweek_id": features_gameweek_id,
+        }).mappings().fetchall()
+    return {row["horizon"]: row["fingerprint"] if row["uniform"] else None for row in rows}
+
 
-    return len(rows)
+def _copy_csv(conn, copy_sql: str, buf):
+    # COPY through the raw DBAPI cursor, inside the SQLAlchemy transaction of `conn`.
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):  # psycopg2
+            cursor.copy_expert(copy_sql, buf)
+        else:  # psycopg 3
+            with cursor.copy(copy_sql) as copy:
+                copy.write(buf.getvalue())
+    finally:
+        cursor.close()
@@ -0,0 +1,238 @@
+# FPL Gaffer — Hyperparameter Search Entry Point
+# Version: 1.0.0
+#
+# Successive halving over walk-forward folds: every sampled configuration is scored on the most
+# recent few folds, the best 1/eta are promoted to eta times as many folds, and so on until one
+# configuration is left or the fold budget is reached. Trials run in parallel processes and reuse
+# the fold cache, so a promoted trial only fits the folds it has not been scored on yet.
+# Every trial is logged to ml.training_runs (triggered_by=experiment) under one search_id.
+# No artefacts are saved — copy the winning block into config.yaml and run main.py.
+#
+# Usage:
+#   python search.py                                        # config.yaml algorithm, h1, search section defaults
+#   python search.py --horizon 2 --algorithm hist_gradient_boosting
+#   python search.py --candidates 54 --workers 8
+#   python search.py --synthetic 3 --no-log                 # offline dry run on benchmarks/synthetic.py data
+
+import argparse
+import copy
+import importlib
+import itertools
+import random
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import yaml
+
+# Make imports work when running from the 03-ml directory
+sys.path.insert(0, str(Path(__file__).parent))
+
+from training.common import build_sort_key
+from training.fold_cache import build_fold_cache
+from training.registry import ALGORITHM_REGISTRY
+
+CONFIG_PATH = Path(__file__).parent / "config.yaml"
+
+# Set once per worker process by _init_worker, so the feature frame is sent to each worker once.
+_worker = {}
+
+
+def sample_candidates(space: dict, n_candidates: int, seed: int):
+    # Distinct random picks from the space (or the whole grid when it is smaller than n_candidates).
+    names = sorted(space)
+    grid_size = 1
+    for name in names:
+        grid_size *= len(space[name])
+
+    if grid_size <= n_candidates:
+        return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+    rng = random.Random(seed)
+    seen, candidates = set(), []
+    while len(candidates) < n_candidates:
+        values = tuple(rng.choice(space[name]) for name in names)
+        if values not in seen:
+            seen.add(values)
+            candidates.append(dict(zip(names, values)))
+    return candidates
+
+
+def trial_config(config: dict, algorithm: str, params: dict, n_steps: int, n_folds: int, single_threaded: bool):
+    # Full config for one trial: the algorithm's base hyperparameters overridden by `params`,
+    # walk-forward restricted to the most recent `n_folds` validation steps.
+    cfg = copy.deepcopy(config)
+    base = (
+        cfg["model"]["hyperparameters"] if cfg["model"]["algorithm"] == algorithm
+        else cfg["model"].get("alternative_hyperparameters", {}).get(algorithm, {})
+    )
+    hyperparams = {**base, **params}
+    if single_threaded and "n_jobs" in hyperparams:
+        hyperparams["n_jobs"] = 1
+    cfg["model"]["algorithm"] = algorithm
+    cfg["model"]["hyperparameters"] = hyperparams
+
+    wf = cfg["training"]["walk_forward"]
+    wf["min_train_steps"] = max(wf["min_train_steps"], n_steps - n_folds * wf["step"])
+    return cfg
+
+
+def _init_worker(df, algorithm: str, horizon: int, use_cache: bool, single_threaded: bool):
+    if single_threaded:
+        # HistGradientBoosting uses OpenMP threads regardless of n_jobs — one per process instead.
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=1)
+    _worker.update(df=df, algorithm=algorithm, horizon=horizon, use_cache=use_cache)
+
+
+def _evaluate(trial_id: int, cfg: dict):
+    # Runs in a worker: walk-forward on the trial's folds, no final fit.
+    mod = importlib.import_module(ALGORITHM_REGISTRY[_worker["algorithm"]])
+    fold_cache = build_fold_cache(cfg, _worker["algorithm"], Path(__file__).parent, enabled=_worker["use_cache"])
+    t0 = time.perf_counter()
+    fold_metrics, _, _, avg = mod.walk_forward(
+        df=_worker["df"],
+        config=cfg,
+        horizon=_worker["horizon"],
+        fold_cache=fold_cache,
+        fit_final=False,
+    )
+    return {
+        "trial_id": trial_id,
+        "fold_metrics": fold_metrics,
+        "avg": avg,
+        "wall_s": time.perf_counter() - t0,
+        "cached_folds": fold_cache.hits if fold_cache is not None else 0,
+    }
+
+
+def successive_halving(df, config: dict, algorithm: str, horizon: int, args):
+    # Returns one result per candidate — from the deepest rung it reached — sorted best first.
+    search_cfg = config["search"]
+    candidates = sample_candidates(search_cfg["space"][algorithm], args.candidates, search_cfg.get("seed", 1))
+    eta = search_cfg.get("eta", 3)
+    n_steps = build_sort_key(df).nunique()
+    wf = config["training"]["walk_forward"]
+    all_folds = len(range(wf["min_train_steps"], n_steps, wf["step"]))
+    max_folds = min(search_cfg.get("max_folds") or all_folds, all_folds)
+    n_folds = min(search_cfg.get("initial_folds", 3), max_folds)
+    single_threaded = args.workers > 1
+
+    print(f"  {len(candidates)} candidates, {all_folds} folds available, eta={eta}, max_folds={max_folds}")
+
+    final = {}
+    alive = list(range(len(candidates)))
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_worker,
+        initargs=(df, algorithm, horizon, not args.no_cache, single_threaded),
+    ) as pool:
+        rung = 0
+        while True:
+            configs = {
+                i: trial_config(config, algorithm, candidates[i], n_steps, n_folds, single_threaded) for i in alive
+            }
+            t0 = time.perf_counter()
+            results = list(pool.map(_evaluate, configs, configs.values()))
+            results.sort(key=lambda r: r["avg"]["avg_mae"])
+            best = results[0]["avg"]["avg_mae"]
+            print(
+                f"  Rung {rung}: {len(alive)} trials x {n_folds} folds in {time.perf_counter() - t0:.1f}s "
+                f"— best MAE {best:.4f}"
+            )
+
+            for r in results:
+                final[r["trial_id"]] = {**r, "params": candidates[r["trial_id"]], "config": configs[r["trial_id"]],
+                                        "rung": rung, "n_folds": n_folds}
+
+            if len(alive) == 1 or n_folds >= max_folds:
+                break
+            alive = [r["trial_id"] for r in results[:max(1, len(alive) // eta)]]
+            n_folds = min(n_folds * eta, max_folds)
+            rung += 1
+
+    # Deeper rungs first, then MAE — a trial scored on more folds outranks a lucky short one
+    return sorted(final.values(), key=lambda r: (-r["rung"], r["avg"]["avg_mae"]))
+
+
+def print_leaderboard(trials: list[dict], top: int = 10):
+    names = sorted(trials[0]["params"])
+    header = f"  {'rung':>4}{'folds':>6}{'MAE':>9}{'RMSE':>9}{'R2':>9}  " + "  ".join(names)
+    print(header)
+    print("  " + "-" * (len(header) - 2))
+    for t in trials[:top]:
+        print(
+            f"  {t['rung']:>4}{t['n_folds']:>6}{t['avg']['avg_mae']:>9.4f}{t['avg']['avg_rmse']:>9.4f}"
+            f"{t['avg']['avg_r2']:>9.4f}  " + "  ".join(f"{t['params'][n]}" for n in names)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FPL Gaffer — Hyperparameter search (successive halving)")
+    parser.add_argument("--horizon", type=int, default=1, help="Horizon to tune (1, 2, or 3). Default: 1.")
+    parser.add_argument("--algorithm", default=None, help="Algorithm to tune. Default: model.algorithm in config.yaml.")
+    parser.add_argument("--candidates", type=int, default=None, help="Configurations to sample. Default: search.n_candidates.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes. Default: search.workers.")
+    parser.add_argument("--no-cache", dest="no_cache", action="store_true", help="Do not read or write the fold cache.")
+    parser.add_argument("--no-log", dest="no_log", action="store_true", help="Do not write trials to ml.training_runs.")
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        default=None,
+        metavar="SEASONS",
+        help="Search on N seasons of benchmarks/synthetic.py data instead of Postgres (use with --no-log).",
+    )
+    args = parser.parse_args()
+
+    with open(CONFIG_PATH) as f:
+        config = yaml.safe_load(f)
+    algorithm = args.algorithm or config["model"]["algorithm"]
+    if algorithm not in ALGORITHM_REGISTRY:
+        raise ValueError(f"Unknown algorithm '{algorithm}'. Available: {list(ALGORITHM_REGISTRY.keys())}")
+    if algorithm not in config["search"]["space"]:
+        raise ValueError(f"No search space for '{algorithm}'. Add one under search.space in config.yaml.")
+    args.candidates = args.candidates or config["search"]["n_candidates"]
+    args.workers = args.workers or config["search"].get("workers", 1)
+
+    if args.synthetic:
+        from benchmarks.synthetic import training_frame
+        df = training_frame(args.synthetic, args.horizon)
+    else:
+        from data.loader import load_features
+        df = load_features(args.horizon)
+
+    search_id = uuid.uuid4()
+    run_at = datetime.now(timezone.utc)
+    print(f"  Search {search_id}: {algorithm} h{args.horizon}, {len(df)} rows, {args.workers} workers")
+
+    trials = successive_halving(df, config, algorithm, args.horizon, args)
+
+    if not args.no_log:
+        from registry.logger import save_search_trial
+        for t in trials:
+            save_search_trial(
+                run_id=uuid.uuid4(),
+                run_at=run_at,
+                search_id=search_id,
+                algorithm=algorithm,
+                horizon=args.horizon,
+                config_snapshot=t["config"],
+                fold_metrics=t["fold_metrics"],
+            )
+        print(f"  Logged {len(trials)} trials to ml.training_runs (search_id={search_id}).")
+
+    print()
+    print_leaderboard(trials)
+    best_hyperparams = dict(trials[0]["config"]["model"]["hyperparameters"])
+    if "n_jobs" in best_hyperparams:
+        best_hyperparams["n_jobs"] = -1
+    print()
+    print("  Best hyperparameters (model.hyperparameters):")
+    print("\n".join("    " + line for line in yaml.safe_dump(best_hyperparams, sort_keys=False).splitlines()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# What-if overrides in worker.py (_frame_from_players) on a dtype-policed frame — no models needed.
+# Importing worker builds the DB engine, so database_url must be set (as for worker.py itself).
+# Run from 03-ml: python -m pytest -q tests
+# Version: 1.0.0
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from data.dtypes import apply_dtype_policy
+from worker import PlayerWhatIf, _frame_from_players
+
+
+def features():
+    # minutes is downcast to int8 (90 and 45 fit), form to float32, status to the categorical
+    return apply_dtype_policy(pd.DataFrame({
+        "opta_code": [1, 2], "season_id": [25, 25], "gameweek_id": [3, 3],
+        "minutes": [90, 45], "form": [1.5, 2.0], "status": ["a", "d"],
+    }))
+
+
+def what_if(**overrides):
+    return _frame_from_players([PlayerWhatIf(opta_code=1, overrides=overrides)], features())
+
+
+def test_override_out_of_range_for_downcast_int_is_upcast():
+    assert features()["minutes"].dtype == np.int8
+    df = what_if(minutes=200)
+    assert df["minutes"].dtype == np.float32
+    assert df.loc[0, "minutes"] == 200
+
+
+def test_fractional_and_missing_overrides_on_int_column():
+    assert what_if(minutes=2.5).loc[0, "minutes"] == 2.5
+    assert np.isnan(what_if(minutes=None).loc[0, "minutes"])
+
+
+def test_override_that_fits_keeps_dtype():
+    df = what_if(minutes=60, status="i")
+    assert df["minutes"].dtype == np.int8
+    assert (df.loc[0, "minutes"], df.loc[0, "status"]) == (60, "i")
+
+
+def test_non_numeric_override_is_rejected():
+    with pytest.raises(HTTPException) as e:
+        what_if(minutes="abc")
+    assert e.value.status_code == 422
@@ -0,0 +1,245 @@
+# Shared training helpers used by every algorithm module.
+# Holds the walk-forward loop so each algorithm only supplies its model builder and preprocessing.
+# Every fitted fold also records its cost: preprocess_ms, fit_ms, predict_ms and peak_rss_mb.
+# The last validation step's rows are handed back for the algorithm's feature_importances.
+# Version: 1.6.0
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+from training.fold_cache import step_fingerprints
+from training.profiling import peak_rss_mb, reset_peak_rss, timed
+
+# Maps the 'status' string column (a/d/i/s/u) to integers.
+# Unknown values (e.g. NaN, unexpected strings) become -1.
+STATUS_MAP = {"a": 0, "d": 1, "i": 2, "s": 3, "u": 4}
+
+
+def build_sort_key(df: pd.DataFrame):
+    return df["season_id"] * 100 + df["gameweek_id"]
+
+
+def preprocess(X: pd.DataFrame, categorical_str_cols: list[str]):
+    X = X.copy()
+
+    # String → int (categorical columns from data/dtypes.py are mapped through their codes, no strings built)
+    for col in categorical_str_cols:
+        if col not in X.columns:
+            continue
+        if isinstance(X[col].dtype, pd.CategoricalDtype):
+            mapped = np.array([STATUS_MAP.get(c, -1) for c in X[col].cat.categories] + [-1])
+            X[col] = mapped[X[col].cat.codes.to_numpy()]  # code -1 (NaN) picks the trailing -1
+        else:
+            X[col] = X[col].map(STATUS_MAP).fillna(-1).astype(int)
+
+    # Boolean → int
+    bool_cols = X.select_dtypes(include="bool").columns.tolist()
+    for col in bool_cols:
+        X[col] = X[col].astype(int)
+
+    return X
+
+
+def compute_metrics(y_true: pd.Series, y_pred: np.ndarray):
+    mae = mean_absolute_error(y_true, y_pred)
+    rmse = float(np.sqrt(mean_squared_error(y_true, y_pred)))
+    r2 = r2_score(y_true, y_pred)
+    return {"mae": round(mae, 4), "rmse": round(rmse, 4), "r2": round(r2, 4)}
+
+
+def average_metrics(fold_metrics: list[dict]):
+    return {
+        "avg_mae": round(float(np.mean([f["mae"] for f in fold_metrics])), 4),
+        "avg_rmse": round(float(np.mean([f["rmse"] for f in fold_metrics])), 4),
+        "avg_r2": round(float(np.mean([f["r2"] for f in fold_metrics])), 4),
+    }
+
+
+def run_walk_forward(
+    df: pd.DataFrame,
+    config: dict,
+    horizon: int,
+    build_model,
+    preprocess_fn,
+    fold_cache=None,
+    fit_final: bool = True,
+    profile: dict | None = None,
+    holdout: dict | None = None,
+):
+    # Args:
+    #     df:            Full feature DataFrame from loader.load_features().
+    #     config:        Parsed config.yaml dict.
+    #     horizon:       1, 2, or 3.
+    #     build_model:   callable(config, feature_cols) -> unfitted estimator.
+    #     preprocess_fn: callable(X, categorical_str_cols) -> model-ready X.
+    #     fold_cache:    Optional training.fold_cache.FoldCache — folds with a cached result are not refitted.
+    #     fit_final:     False skips the final fit (search.py only needs the fold metrics).
+    #     profile:       Optional dict, filled with the final model's cost: preprocess_ms, fit_ms,
+    #                    predict_ms (scoring the latest step's rows) and peak_rss_mb.
+    #     holdout:       Optional dict, filled (with the final model) with X and y: the model-ready rows of the
+    #                    last validation step, for feature_importances(model, feature_cols, X, y).
+
+    # Returns:
+    #     fold_metrics: List of dicts, one per validation fold (metrics, row counts and fold cost).
+    #     final_model:  Estimator fitted on all available data (None when fit_final is False).
+    #     feature_cols: Ordered list of column names used as features.
+    #     avg_metrics:  Mean MAE / RMSE / R² across folds.
+    fold_metrics, final_model, feature_cols, avg = _walk_forward(
+        df, config, [horizon], build_model, preprocess_fn, fold_cache, fit_final, profile, holdout
+    )
+    return fold_metrics[horizon], final_model, feature_cols, avg[horizon]
+
+
+def run_walk_forward_multi(
+    df: pd.DataFrame,
+    config: dict,
+    horizons: list[int],
+    build_model,
+    preprocess_fn,
+    fold_cache=None,
+    fit_final: bool = True,
+    profile: dict | None = None,
+    holdout: dict | None = None,
+):
+    # One estimator fitted on every horizon's target at once (multi-output).
+    # Same arguments as run_walk_forward, but fold_metrics and avg_metrics are dicts keyed by horizon
+    # and final_model.predict() returns one column per horizon, in the order of `horizons`.
+    # A fold is fitted once for all horizons, so each horizon's row for that fold carries the same cost.
+    return _walk_forward(df, config, horizons, build_model, preprocess_fn, fold_cache, fit_final, profile, holdout)
+
+
+def _walk_forward(
+    df: pd.DataFrame,
+    config: dict,
+    horizons: list[int],
+    build_model,
+    preprocess_fn,
+    fold_cache,
+    fit_final: bool = True,
+    profile: dict | None = None,
+    holdout: dict | None = None,
+):
+    target_cols = [f"pts_target_h{h}" for h in horizons]
+    exclude = set(config["features"]["exclude"])
+    cat_str_cols = config["features"].get("categorical_str", [])
+
+    wf_config = config["training"]["walk_forward"]
+    min_train_steps: int = wf_config["min_train_steps"]
+    step: int = wf_config["step"]
+
+    # Derive sort key (do NOT add to df permanently — keep df clean)
+    sort_key = build_sort_key(df)
+    sorted_steps = sorted(sort_key.unique())
+
+    # Feature columns: everything not excluded and not the sort key itself
+    feature_cols = [c for c in df.columns if c not in exclude]
+
+    # Fitting needs every target present. For a single horizon this is the usual notna filter;
+    # for multi-output it drops the last rows of each player's season where later targets are unknown.
+    # Validation masks each horizon separately, so those rows still count towards the horizons they have.
+    complete = df[target_cols].notna().all(axis=1)
+
+    if fold_cache is not None:
+        fingerprints = step_fingerprints(df, sort_key, feature_cols + target_cols)
+
+    fold_metrics: dict[int, list[dict]] = {h: [] for h in horizons}
+
+    for i, val_step in enumerate(sorted_steps[min_train_steps::step]):
+        train_df = df[(sort_key < val_step) & complete]
+        val_df = df[sort_key == val_step]
+
+        if len(train_df) < 10 or len(val_df) < 1:
+            continue
+
+        if fold_cache is not None:
+            cache_key = fold_cache.fold_key(horizons, fingerprints[int(val_step)], int(val_step))
+            cached = fold_cache.get(cache_key)
+            if cached is not None:
+                for horizon in horizons:
+                    if cached["folds"].get(str(horizon)) is not None:
+                        fold_metrics[horizon].append({"fold_index": i, **cached["folds"][str(horizon)]})
+                continue
+
+        # Cached folds keep the cost recorded when they were fitted
+        cost = {}
+        reset_peak_rss()
+        with timed(cost, "preprocess_ms"):
+            X_train = preprocess_fn(train_df[feature_cols], cat_str_cols)
+            X_val = preprocess_fn(val_df[feature_cols], cat_str_cols)
+
+        model = build_model(config, feature_cols)
+        with timed(cost, "fit_ms"):
+            model.fit(X_train, _targets(train_df, target_cols))
+        with timed(cost, "predict_ms"):
+            y_pred = model.predict(X_val).reshape(len(val_df), len(horizons))
+        cost["peak_rss_mb"] = peak_rss_mb()
+
+        val_season = int(val_df["season_id"].iloc[0])
+        val_gw = int(val_df["gameweek_id"].iloc[0])
+
+        fold_result: dict[str, dict | None] = {}
+        for j, (horizon, target_col) in enumerate(zip(horizons, target_cols)):
+            mask = val_df[target_col].notna().to_numpy()
+            if not mask.any():
+                fold_result[str(horizon)] = None
+                continue
+
+            m = compute_metrics(val_df[target_col][mask], y_pred[mask, j])
+
+            fold_result[str(horizon)] = {
+                "validation_season_id": val_season,
+                "validation_gameweek_id": val_gw,
+                "n_train_rows": len(train_df),
+                "n_val_rows": int(mask.sum()),
+                **m,
+                **cost,
+            }
+            fold_metrics[horizon].append({"fold_index": i, **fold_result[str(horizon)]})
+
+        if fold_cache is not None:
+            fold_cache.put(cache_key, {"folds": fold_result})
+
+    for horizon in horizons:
+        if not fold_metrics[horizon]:
+            raise RuntimeError(
+                f"Walk-forward produced 0 folds for horizon h{horizon}. "
+                "Check min_train_steps vs available data."
+            )
+
+    avg = {h: average_metrics(fold_metrics[h]) for h in horizons}
+
+    if not fit_final:
+        return fold_metrics, None, feature_cols, avg
+
+    # Final model: train on ALL data
+    cost = {}
+    reset_peak_rss()
+    all_df = df[complete]
+    with timed(cost, "preprocess_ms"):
+        X_all = preprocess_fn(all_df[feature_cols], cat_str_cols)
+    final_model = build_model(config, feature_cols)
+    with timed(cost, "fit_ms"):
+        final_model.fit(X_all, _targets(all_df, target_cols))
+    # Inference cost: the rows predict.py scores (the latest step, targets not needed)
+    X_latest = preprocess_fn(df.loc[sort_key == sorted_steps[-1], feature_cols], cat_str_cols)
+    with timed(cost, "predict_ms"):
+        final_model.predict(X_latest)
+    cost["peak_rss_mb"] = peak_rss_mb()
+    if profile is not None:
+        profile.update(cost)
+
+    if holdout is not None:
+        # The last fold's validation rows with every target known (cached folds included).
+        # The longest horizon's last fold is the latest step where every horizon can have a target.
+        last = max(f["validation_season_id"] * 100 + f["validation_gameweek_id"] for f in fold_metrics[horizons[-1]])
+        last_df = df[(sort_key == last) & complete]
+        holdout["X"] = preprocess_fn(last_df[feature_cols], cat_str_cols)
+        holdout["y"] = _targets(last_df, target_cols)
+
+    return fold_metrics, final_model, feature_cols, avg
+
+
+def _targets(df: pd.DataFrame, target_cols: list[str]):
+    # Series for single-output estimators, DataFrame (one column per horizon) for multi-output.
+    return df[target_cols[0]] if len(target_cols) == 1 else df[target_cols]
@@ -0,0 +1,103 @@
+# On-disk cache of walk-forward fold results.
+# A fold is keyed by hash(config, algorithm, horizons, training-data slice fingerprint, fold boundary),
+# so a rerun with unchanged config and data only fits the folds whose slice changed (usually just the
+# newest GW) plus the final model. dbt reprocesses the last few GWs on each run — if those rows change,
+# every fold that includes them gets a new fingerprint and is recomputed.
+# Version: 1.2.0
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+# Bump when the cached payload or the fold loop changes in a way that invalidates old entries.
+CACHE_VERSION = 1
+
+
+class FoldCache:
+
+    def __init__(self, cache_dir: Path, config: dict, algorithm: str):
+        self.cache_dir = Path(cache_dir)
+        self.hits = 0
+        self.misses = 0
+        # Anything that changes what a fold computes goes into the base key.
+        # n_jobs only changes how a fit is parallelised, so search.py trials (n_jobs=1) share entries with main.py.
+        model = {
+            **config["model"],
+            "hyperparameters": {k: v for k, v in config["model"]["hyperparameters"].items() if k != "n_jobs"},
+        }
+        self._base_key = _sha256(json.dumps(
+            {
+                "cache_version": CACHE_VERSION,
+                "sklearn": sklearn.__version__,
+                "algorithm": algorithm,
+                "model": model,
+                "features": config["features"],
+            },
+            sort_keys=True,
+            default=str,
+        ))
+
+    def fold_key(self, horizons: list[int], slice_fingerprint: str, val_step: int):
+        return _sha256(f"{self._base_key}|{horizons}|{slice_fingerprint}|{val_step}")
+
+    def get(self, key: str):
+        path = self.cache_dir / f"{key}.json"
+        if not path.exists():
+            self.misses += 1
+            return None
+        self.hits += 1
+        with open(path) as f:
+            return json.load(f)
+
+    def put(self, key: str, fold_result: dict):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        _atomic_write_json(self.cache_dir / f"{key}.json", fold_result)
+
+
+def build_fold_cache(config: dict, algorithm: str, base_dir: Path, enabled: bool = True):
+    # FoldCache from training.fold_cache in config.yaml, or None when disabled. dir is relative to base_dir.
+    cache_config = config["training"].get("fold_cache", {})
+    if not enabled or not cache_config.get("enabled", False):
+        return None
+    return FoldCache(
+        cache_dir=Path(base_dir) / cache_config.get("dir", "cache/folds"),
+        config=config,
+        algorithm=algorithm,
+    )
+
+
+def step_fingerprints(df: pd.DataFrame, sort_key: pd.Series, cols: list[str]):
+    # Returns {step: fingerprint of every row with sort_key <= step}.
+    # Row hashes are computed once and chained step by step, so this is O(rows), not O(rows × folds).
+    # Rows are ordered by hash within a step, so the fingerprint does not depend on SQL row order.
+    row_hashes = pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+    keys = sort_key.to_numpy()
+    order = np.lexsort((row_hashes, keys))
+    keys, row_hashes = keys[order], row_hashes[order]
+
+    steps, starts = np.unique(keys, return_index=True)
+    bounds = list(starts[1:]) + [len(keys)]
+
+    fingerprints = {}
+    digest = hashlib.sha256(",".join(cols).encode())
+    for step, start, end in zip(steps, starts, bounds):
+        digest.update(row_hashes[start:end].tobytes())
+        fingerprints[int(step)] = digest.copy().hexdigest()
+    return fingerprints
+
+
+def _sha256(s: str):
+    return hashlib.sha256(s.encode()).hexdigest()
+
+
+def _atomic_write_json(path: Path, payload: dict):
+    # Write-then-rename so a killed run never leaves a half-written entry behind.
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
@@ -0,0 +1,84 @@
+# Histogram Gradient Boosting training module.
+# Same interface as training.random_forest (walk_forward / preprocess / feature_importances).
+# Features are binned into at most 255 buckets, so fitting is much cheaper than a deep forest,
+# nominal columns (element_type, team_id) and the encoded status use native categorical splits,
+# and early stopping picks the number of boosting iterations per fold.
+# Single-output only: no walk_forward_multi, so training.multi_output is not supported.
+# Version: 1.6.0
+
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.inspection import permutation_importance
+
+from training.common import preprocess as _common_preprocess, run_walk_forward
+
+PERMUTATION_REPEATS = 5
+
+
+class _HistGradientBoostingRegressor(HistGradientBoostingRegressor):
+    # sklearn's binning fails on a column with no non-missing values. fixture_difficulty_hN is NULL for
+    # every row before fixture collection started, so early walk-forward folds can hit this.
+    # Such columns are fitted as a constant 0: no split is ever made on them, so predict() needs no change.
+
+    def fit(self, X, y, sample_weight=None):
+        if isinstance(X, pd.DataFrame):
+            all_missing = X.columns[X.isna().all()]
+            if len(all_missing):
+                X = X.assign(**{col: 0.0 for col in all_missing})
+        return super().fit(X, y, sample_weight=sample_weight)
+
+
+def preprocess(X: pd.DataFrame, categorical_str_cols: list[str]):
+    # Status is mapped to 0..4 with -1 for unknown values.
+    # Negative categories are treated as missing by HistGradientBoostingRegressor.
+    return _common_preprocess(X, categorical_str_cols)
+
+
+def _categorical_cols(config: dict, feature_cols: list[str]):
+    cat_cols = (
+        config["features"].get("categorical_str", [])
+        + config["features"].get("categorical_nominal", [])
+    )
+    return [c for c in feature_cols if c in cat_cols]
+
+
+def _build_model(config: dict, feature_cols: list[str]):
+    hyperparams = dict(config["model"]["hyperparameters"])
+    categorical = _categorical_cols(config, feature_cols)
+    return _HistGradientBoostingRegressor(
+        categorical_features=categorical or None,
+        **hyperparams,
+    )
+
+
+def walk_forward(
+    df: pd.DataFrame,
+    config: dict,
+    horizon: int,
+    fold_cache=None,
+    fit_final: bool = True,
+    profile: dict | None = None,
+    holdout: dict | None = None,
+): # returns tuple[list[dict], HistGradientBoostingRegressor, list[str], dict]
+    # See training.common.run_walk_forward for the fold loop.
+    return run_walk_forward(df, config, horizon, _build_model, preprocess, fold_cache, fit_final, profile, holdout)
+
+
+def feature_importances(
+    model: HistGradientBoostingRegressor,
+    feature_cols: list[str],
+    X_holdout: pd.DataFrame,
+    y_holdout: pd.Series,
+):
+    # HistGradientBoostingRegressor has no feature_importances_.
+    # Permutation importance on the last validation step's rows (walk_forward's holdout):
+    # the mean MAE increase, in points, when a feature's values are shuffled. Can be slightly negative.
+    result = permutation_importance(
+        model, X_holdout, y_holdout,
+        scoring="neg_mean_absolute_error",
+        n_repeats=PERMUTATION_REPEATS,
+        random_state=0,
+    )
+    importances = dict(zip(feature_cols, result.importances_mean.tolist()))
+    return dict(sorted(importances.items(), key=lambda x: x[1], reverse=True))
+
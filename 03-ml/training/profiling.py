@@ -0,0 +1,112 @@
+# Cost measurements for training runs: wall-clock timers and peak resident memory.
+# Walk-forward records preprocess/fit/predict time and peak RSS per fold (stored on ml.training_runs)
+# and for the final model (stored on ml.model_artefacts).
+# Also holds the --profile hook used by main.py (cProfile in-process, or a re-exec under py-spy).
+# Version: 1.0.0
+
+import cProfile
+import os
+import pstats
+import resource
+import shutil
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+PROFILE_MODES = ("cprofile", "py-spy")
+
+# Set on the child process when main.py re-executes itself under py-spy, so it does not do it again.
+_PY_SPY_ENV = "FPL_GAFFER_PY_SPY"
+
+
+@contextmanager
+def timed(timings: dict, key: str):
+    # Adds the block's wall time to timings[key], in milliseconds.
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[key] = timings.get(key, 0) + round((time.perf_counter() - t0) * 1000)
+
+
+def reset_peak_rss():
+    # Linux (4.0+) resets the process high-water mark (VmHWM) when 5 is written to clear_refs,
+    # so each fold reports its own peak. Elsewhere the peak stays process-wide (monotonic).
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    # Peak resident set size since the last reset_peak_rss() (or since process start), in MB.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024)
+    except OSError:
+        pass
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024))  # bytes on macOS, KB on Linux
+
+
+def path_size_bytes(path: Path):
+    # File size, or the total size of a directory's files (flat-forest exports are directories).
+    path = Path(path)
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return path.stat().st_size
+
+
+def summarise_folds(fold_metrics: list[dict]):
+    # Totals across folds that carry timings (folds cached before profiling existed do not).
+    timed_folds = [f for f in fold_metrics if f.get("fit_ms") is not None]
+    return {
+        "n_timed": len(timed_folds),
+        "preprocess_ms": sum(f["preprocess_ms"] for f in timed_folds),
+        "fit_ms": sum(f["fit_ms"] for f in timed_folds),
+        "predict_ms": sum(f["predict_ms"] for f in timed_folds),
+        "peak_rss_mb": max((f["peak_rss_mb"] for f in timed_folds), default=None),
+    }
+
+
+@contextmanager
+def profiled(mode: str | None, output_dir: Path, label: str):
+    # mode=None: no-op. "cprofile": profiles the block, writes <label>.prof and prints the top functions
+    # (open the file with snakeviz or `python -m pstats`). "py-spy": see exec_under_py_spy().
+    if mode != "cprofile":
+        yield
+        return
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        out_path = output_dir / f"{label}.prof"
+        profiler.dump_stats(out_path)
+        print(f"  cProfile written to {out_path}")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+
+
+def exec_under_py_spy(output_dir: Path, label: str):
+    # Re-runs the current command under `py-spy record` (flame graph SVG). Replaces this process;
+    # returns only in the child (already under py-spy). py-spy samples from outside the interpreter,
+    # so unlike cProfile it adds almost no overhead to the run being measured.
+    if os.environ.get(_PY_SPY_ENV):
+        return
+    py_spy = shutil.which("py-spy")
+    if py_spy is None:
+        raise RuntimeError("--profile py-spy needs py-spy on PATH (pip install py-spy).")
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    out_path = output_dir / f"{label}.svg"
+    print(f"  Re-running under py-spy, flame graph -> {out_path}")
+    os.environ[_PY_SPY_ENV] = "1"
+    os.execv(py_spy, [py_spy, "record", "-o", str(out_path), "--", sys.executable, *sys.argv])
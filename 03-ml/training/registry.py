@@ -1,7 +1,14 @@
 # Algorithm registry — maps config 'algorithm' keys to their module paths.
 # To add a new algorithm: import its module under training/ and add an entry here.
-# The module must expose a walk_forward(df, config, horizon) function.
+# The module must expose
+# walk_forward(df, config, horizon, fold_cache=None, fit_final=True, profile=None, holdout=None),
+# preprocess(X, categorical_str_cols) and feature_importances(model, feature_cols, X_holdout, y_holdout),
+# where X_holdout / y_holdout are the rows walk_forward fills holdout with.
+# Algorithms that support multi-output training also expose
+# walk_forward_multi(df, config, horizons, fold_cache=None, fit_final=True, profile=None, holdout=None).
+# Hyperparameter search spaces live under search.space.<algorithm> in config.yaml (see search.py).
 
 ALGORITHM_REGISTRY = {
     "random_forest": "training.random_forest",
+    "hist_gradient_boosting": "training.hist_gradient_boosting",
 }
@@ -0,0 +1,272 @@
+# FPL Gaffer — Prediction Worker
+# Version: 1.0.2
+#
+# Long-lived scoring service. Production models (and the latest feature rows) are loaded once and kept
+# in memory; ml.model_artefacts is polled every worker.poll_seconds and a new production model is
+# loaded and warmed before it is swapped in, so requests never wait on unpickling.
+#
+# Endpoints:
+#   GET  /healthz          liveness + number of loaded models
+#   GET  /models           the production artefacts currently served
+#   POST /score            score arbitrary rows, or the latest rows of given players with overrides (what-ifs)
+#   POST /predict-latest   reload the latest features, score and write ml.predictions (predict.py --worker-url)
+#   POST /reload           re-check production models and reload the latest features now
+#
+# Usage (from the 03-ml directory):
+#   python worker.py                                   # host/port from config.yaml worker section
+#   uvicorn worker:app --host 127.0.0.1 --port 8001
+#
+# Example what-if: h1-h3 points for a player if flagged injured
+#   curl -X POST localhost:8001/score -H 'Content-Type: application/json' \
+#        -d '{"players": [{"opta_code": 223094, "overrides": {"status": "i"}}]}'
+
+import asyncio
+import sys
+import threading
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from data.dtypes import CATEGORICAL_COLS, KEY_COLS, apply_dtype_policy
+from data.loader import load_latest_features, reset_column_types
+from predict import _load_production_artefacts, _required_columns, run_predictions, score_horizon
+
+CONFIG_PATH = Path(__file__).parent / "config.yaml"
+
+# JSON feature values: numbers, booleans, status strings, null (= missing)
+FeatureValue = float | int | bool | str | None
+
+
+class PlayerWhatIf(BaseModel):
+    opta_code: int
+    overrides: dict[str, FeatureValue] = {}
+
+
+class ScoreRequest(BaseModel):
+    rows: list[dict[str, FeatureValue]] | None = None   # full feature rows; missing features = null
+    players: list[PlayerWhatIf] | None = None           # latest feature row per player, with overrides applied
+    horizons: list[int] | None = None                   # default: every served horizon
+
+
+class PredictLatestRequest(BaseModel):
+    horizons: list[int] | None = None
+    force: bool = False
+
+
+class ModelPool:
+    # The served production artefacts and the latest feature rows, swapped together under a lock.
+    # Readers take a snapshot (two references), so a swap never changes a request mid-flight.
+    def __init__(self):
+        self.artefacts: dict = {}
+        self.features: tuple | None = None   # (features_df, current_gw), columns = _required_columns(artefacts)
+        self.loaded_at: datetime | None = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def snapshot(self):
+        with self._lock:
+            return self.artefacts, self.features
+
+    def refresh(self, reload_features: bool = False):
+        # Returns True when a new set of production models was swapped in.
+        with self._refresh_lock:
+            artefacts = _load_production_artefacts()
+            changed = _served_version(artefacts) != _served_version(self.artefacts)
+            if not changed and not reload_features and self.features is not None:
+                return False
+
+            reset_column_types()
+            features = load_latest_features(columns=_required_columns(artefacts))
+            if changed:
+                # Warm: load every model (get_model keeps it) and score once, before anyone is routed to it
+                model_outputs = {}
+                for artefact in artefacts.values():
+                    score_horizon(artefact, features[0], model_outputs)
+
+            with self._lock:
+                self.artefacts, self.features = artefacts, features
+                if changed:
+                    self.loaded_at = datetime.now(timezone.utc)
+            if changed:
+                print(f"  Serving {_describe(artefacts)}")
+            return changed
+
+
+def _served_version(artefacts: dict):
+    return sorted((h, str(a["run_id"]), a["artefact_path"], a["output_index"]) for h, a in artefacts.items())
+
+
+def _describe(artefacts: dict):
+    return ", ".join(f"h{h}={str(a['run_id'])[:8]}" for h, a in sorted(artefacts.items()))
+
+
+def load_config():
+    with open(CONFIG_PATH) as f:
+        return yaml.safe_load(f)
+
+
+pool = ModelPool()
+
+
+async def _poll(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(pool.refresh)
+        except Exception as e:  # keep serving the current models if the DB is briefly unavailable
+            print(f"  Production model check failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await asyncio.to_thread(pool.refresh)
+    poller = asyncio.create_task(_poll(load_config().get("worker", {}).get("poll_seconds", 30)))
+    yield
+    poller.cancel()
+
+
+app = FastAPI(title="FPL Gaffer prediction worker", lifespan=lifespan)
+
+
+def _select_horizons(artefacts: dict, horizons: list[int] | None):
+    if horizons is None:
+        return artefacts
+    missing = [h for h in horizons if h not in artefacts]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"No production model for horizons {missing}")
+    return {h: artefacts[h] for h in horizons}
+
+
+def _frame_from_rows(rows: list[dict], columns: list[str]):
+    unknown = sorted({k for row in rows for k in row} - set(columns))
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown feature columns: {unknown}")
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    try:
+        for col in columns:
+            if col not in CATEGORICAL_COLS:
+                df[col] = df[col].astype("float64")
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=f"Non-numeric feature value: {e}") from e
+    return apply_dtype_policy(df)
+
+
+def _frame_from_players(players: list[PlayerWhatIf], features_df: pd.DataFrame):
+    by_code = pd.Series(features_df.index, index=features_df["opta_code"].to_numpy())
+    missing = [p.opta_code for p in players if p.opta_code not in by_code.index]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"No latest feature row for opta_code {missing}")
+
+    df = features_df.loc[by_code[[p.opta_code for p in players]].to_numpy()].reset_index(drop=True)
+    for i, player in enumerate(players):
+        for col, value in player.overrides.items():
+            if col not in df.columns or col in KEY_COLS:
+                raise HTTPException(status_code=422, detail=f"Cannot override '{col}'")
+            value = float("nan") if value is None else int(value) if isinstance(value, bool) else value
+            if isinstance(value, (int, float)) and not _fits_dtype(df[col].dtype, value):
+                # e.g. minutes 200 on an int8 column, or a fractional / missing value on an int column
+                df[col] = df[col].astype(np.float32)
+            try:
+                df.loc[i, col] = value
+            except (TypeError, ValueError) as e:
+                raise HTTPException(status_code=422, detail=f"Bad value for '{col}': {e}") from e
+    return df
+
+
+def _fits_dtype(dtype, value: int | float):
+    # Integer columns are downcast to the smallest int that held the loaded values (data/dtypes.py)
+    if not pd.api.types.is_integer_dtype(dtype):
+        return True
+    info = np.iinfo(dtype)
+    return float(value).is_integer() and info.min <= value <= info.max
+
+
+@app.get("/healthz")
+def healthz():
+    artefacts, _ = pool.snapshot()
+    return {"status": "ok" if artefacts else "no_models", "models": len(artefacts)}
+
+
+@app.get("/models")
+def models():
+    artefacts, features = pool.snapshot()
+    return {
+        "loaded_at": pool.loaded_at,
+        "current_gw": features[1] if features else None,
+        "models": [
+            {
+                "horizon": h,
+                "run_id": str(a["run_id"]),
+                "algorithm": a["algorithm"],
+                "output_index": a["output_index"],
+                "compiled": a["compiled_path"] is not None,
+                "n_features": len(a["feature_cols"]),
+            }
+            for h, a in sorted(artefacts.items())
+        ],
+    }
+
+
+@app.post("/score")
+def score(body: ScoreRequest):
+    # One entry per (input row, horizon), rows first then players, in request order.
+    artefacts, features = pool.snapshot()
+    served = _select_horizons(artefacts, body.horizons)
+    columns = _required_columns(artefacts)
+
+    frames = []
+    if body.rows:
+        frames.append(_frame_from_rows(body.rows, columns))
+    if body.players:
+        frames.append(_frame_from_players(body.players, features[0]))
+    if not frames:
+        raise HTTPException(status_code=422, detail="Provide rows and/or players.")
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    opta_codes = df["opta_code"].tolist() if "opta_code" in df.columns else [None] * len(df)
+    model_outputs = {}
+    results = []
+    for horizon, artefact in sorted(served.items()):
+        batch = score_horizon(artefact, df, model_outputs)
+        values = {k: v for k, v in batch.items() if k.startswith("predicted_")}
+        for i in range(len(df)):
+            results.append({
+                "row": i,
+                "opta_code": None if pd.isna(opta_codes[i]) else int(opta_codes[i]),
+                "horizon": horizon,
+                "run_id": str(batch["run_id"]),
+                **{k: round(float(v[i]), 4) for k, v in values.items()},
+            })
+    return {"predictions": results}
+
+
+@app.post("/predict-latest")
+def predict_latest(body: PredictLatestRequest):
+    # Same run as `python predict.py`, on the hot models. Features are reloaded first (called after ingestion).
+    pool.refresh(reload_features=True)
+    artefacts, features = pool.snapshot()
+    summary = run_predictions(_select_horizons(artefacts, body.horizons), force=body.force, features=features)
+    print(f"  predict-latest: wrote {summary['written']} ({summary['rows']} rows), skipped {summary['skipped']}")
+    return summary
+
+
+@app.post("/reload")
+def reload():
+    swapped = pool.refresh(reload_features=True)
+    artefacts, features = pool.snapshot()
+    return {"swapped": swapped, "models": _describe(artefacts), "current_gw": features[1]}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    worker_cfg = load_config().get("worker", {})
+    uvicorn.run(app, host=worker_cfg.get("host", "127.0.0.1"), port=worker_cfg.get("port", 8001))
@@ -0,0 +1,206 @@
+# Batch optimizer — many optimize requests against one player pool, fanned out across a process pool
+# Version: 1.2.1
+#
+# The parent loads config and the player pool once (data/pool.py) and starts `workers` processes; each
+# worker builds its OptimizerSession once in the pool initializer and then only solves. Identical
+# requests (same normalised form, see load_user_input.normalise_user_input) are solved once, and the
+# main_runner result cache is checked first. Results are yielded as they complete (NDJSON in the API and
+# CLI); logs are written in chunks of batch.log_chunk_size with registry/logger.save_logs_bulk.
+#
+# Usage (from the 04-optimizer directory):
+#   python batch.py squads.json                      # JSON list or NDJSON of POST /optimize bodies
+#   python batch.py squads.ndjson --workers 8 --output results.ndjson
+#   cat squads.ndjson | python batch.py - --no-log
+#
+# Workers only import session/optimizer (no DB); keep it that way — spawned workers re-import this module.
+
+import argparse
+import copy
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from optimizer import solve_request
+from session import OptimizerSession
+
+DEFAULT_LOG_CHUNK_SIZE = 200
+
+# Worker-process state, set once by _init_worker
+_session: OptimizerSession | None = None
+_constraints: dict | None = None
+_max_horizon: int | None = None
+_limits_cfg: dict | None = None
+_robust_cfg: dict | None = None
+
+
+def _init_worker(players: list[dict], constraints: dict, solver_options: dict, prune: bool, max_horizon: int,
+                 limits_cfg: dict, robust_cfg: dict):
+    global _session, _constraints, _max_horizon, _limits_cfg, _robust_cfg
+    # one HiGHS thread per worker — parallelism comes from the process pool
+    _session = OptimizerSession(players, constraints, {**solver_options, "threads": 1}, prune_dominated=prune)
+    _constraints = constraints
+    _max_horizon = max_horizon
+    _limits_cfg = limits_cfg
+    _robust_cfg = robust_cfg
+
+
+def _solve(user_input: dict):
+    return solve_request(_session, user_input, _constraints, _max_horizon, _limits_cfg, _robust_cfg)
+
+
+def _error(message: str):
+    response = {
+        "status": "error", "horizon": 0, "solve_time_ms": 0, "error_message": message,
+        "squad": None, "transfers_in": None, "transfers_out": None, "cached": False,
+        "is_optimal": False, "objective": None, "bound": None, "gap": None, "robust": None,
+    }
+    return response, None
+
+
+class _LogBuffer:
+    # save_log() entries, written with save_logs_bulk every `chunk_size` results and at the end
+    def __init__(self, predictions, triggered_by: str, chunk_size: int, enabled: bool):
+        self.predictions = predictions
+        self.triggered_by = triggered_by
+        self.chunk_size = chunk_size
+        self.enabled = enabled
+        self.entries: list[dict] = []
+
+    def add(self, user_input: dict, response: dict, run: dict | None, log_only: bool = False):
+        if not self.enabled:
+            return
+        self.entries.append({
+            "status": response["status"],
+            "solve_time_ms": response["solve_time_ms"],
+            "input_params": user_input,
+            "error_message": response["error_message"],
+            "db_input": self.predictions,
+            "triggered_by": self.triggered_by,
+            "objective": response.get("objective"),
+            "mip_bound": response.get("bound"),
+            "mip_gap": response.get("gap"),
+            "log_only": log_only,
+            **(run or {}),
+        })
+        if len(self.entries) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.entries:
+            from registry.logger import save_logs_bulk
+            save_logs_bulk(self.entries)
+            self.entries = []
+
+
+def solve_batch(user_inputs: list[dict], workers: int | None = None, triggered_by: str = "manual", log: bool = True):
+    # Yields (index, response) in completion order; response has run_optimizer()'s shape.
+    # workers: processes (config batch.workers, default os.cpu_count()); 1 solves in this process.
+    from load_config import load_config
+    from main_runner import CACHEABLE_STATUSES, _results, get_session, result_key
+    from data.pool import get_player_pool
+
+    config = load_config()
+    batch_cfg = config.get("batch", {})
+    workers = workers or batch_cfg.get("workers") or os.cpu_count() or 1
+    pool = get_player_pool(config.get("cache", {}).get("player_pool_ttl_seconds"))
+    max_horizon = int(pool.predictions["horizon"].max())
+    limits_cfg = config.get("solver", {}).get("limits")
+    robust_cfg = config.get("robust")
+    logger = _LogBuffer(pool.predictions, triggered_by, batch_cfg.get("log_chunk_size", DEFAULT_LOG_CHUNK_SIZE), log)
+
+    # Buffered log rows are written even when the consumer stops early (e.g. the NDJSON client disconnects
+    # and the generator is closed)
+    try:
+        # Deduplicate: one solve per distinct normalised request; cached results are served straight away
+        by_key: dict = {}
+        for index, user_input in enumerate(user_inputs):
+            try:
+                key = result_key(user_input, pool, config)
+            except (KeyError, TypeError, ValueError) as e:
+                response, _ = _error(f"invalid request: {e}")
+                logger.add(user_input, response, None)
+                yield index, response
+                continue
+            cached = _results.get(key)
+            if cached is not None:
+                response = {**copy.deepcopy(cached), "solve_time_ms": 0, "cached": True}
+                logger.add(user_input, response, None, log_only=True)
+                yield index, response
+                continue
+            by_key.setdefault(key, []).append(index)
+
+        def finish(key, response, run):
+            if response["status"] in CACHEABLE_STATUSES:
+                _results.put(key, copy.deepcopy(response))
+            for n, index in enumerate(by_key[key]):
+                # duplicates share the first request's optimizer_runs row
+                out = response if n == 0 else {**copy.deepcopy(response), "solve_time_ms": 0, "cached": True}
+                logger.add(user_inputs[index], out, run, log_only=n > 0)
+                yield index, out
+
+        if workers <= 1 or len(by_key) <= 1:
+            session = get_session(pool, config)
+            for key, indices in by_key.items():
+                try:
+                    response, run = solve_request(session, user_inputs[indices[0]], config["constraints"], max_horizon,
+                                                  limits_cfg, robust_cfg)
+                except Exception as e:  # like a crashed worker: fails its requests, not the batch
+                    response, run = _error(str(e))
+                yield from finish(key, response, run)
+        else:
+            solver_cfg = config.get("solver", {})
+            context = multiprocessing.get_context(batch_cfg.get("start_method", "spawn"))
+            initargs = (pool.players, config["constraints"], solver_cfg.get("options", {}),
+                        solver_cfg.get("prune_dominated", True), max_horizon, limits_cfg, robust_cfg)
+            with ProcessPoolExecutor(min(workers, len(by_key)), mp_context=context,
+                                     initializer=_init_worker, initargs=initargs) as executor:
+                futures = {executor.submit(_solve, user_inputs[indices[0]]): key for key, indices in by_key.items()}
+                for future in as_completed(futures):
+                    try:
+                        response, run = future.result()
+                    except Exception as e:  # a crashed worker fails its requests, not the batch
+                        response, run = _error(str(e))
+                    yield from finish(futures[future], response, run)
+    finally:
+        logger.flush()
+
+
+def _read_requests(path: str):
+    text = sys.stdin.read() if path == "-" else open(path).read()
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        return json.loads(stripped)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve many optimize requests against the latest predictions")
+    parser.add_argument("input", help="JSON list or NDJSON of POST /optimize bodies ('-' for stdin)")
+    parser.add_argument("--output", help="NDJSON results (default stdout)")
+    parser.add_argument("--workers", type=int, help="processes (default config batch.workers or CPU count)")
+    parser.add_argument("--triggered-by", default="manual", choices=["manual", "experiment", "api"])
+    parser.add_argument("--no-log", action="store_true", help="skip optimizer_run_logs / optimizer_runs")
+    args = parser.parse_args()
+
+    user_inputs = _read_requests(args.input)
+    out = open(args.output, "w") if args.output else sys.stdout
+    t0 = time.monotonic()
+    statuses: dict = {}
+    try:
+        for index, response in solve_batch(user_inputs, args.workers, args.triggered_by, log=not args.no_log):
+            statuses[response["status"]] = statuses.get(response["status"], 0) + 1
+            out.write(json.dumps({"index": index, **response}, default=str) + "\n")
+            out.flush()
+    finally:
+        if args.output:
+            out.close()
+    elapsed = time.monotonic() - t0
+    print(f"  {len(user_inputs)} requests in {elapsed:.1f}s ({len(user_inputs) / max(elapsed, 1e-9):.1f}/s): {statuses}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
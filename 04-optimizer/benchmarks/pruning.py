@@ -0,0 +1,129 @@
+# Benchmark: squad MILP with and without dominance pruning (session.py dominated_players).
+# Reports how many players are left out of the model, solve latency for both sessions on the same requests,
+# and checks the objectives match (pruning must never change the optimum).
+#
+# Usage (from the 04-optimizer directory):
+#   python benchmarks/pruning.py                        # synthetic 700-player pool, 20 clubs
+#   python benchmarks/pruning.py --players 800 --requests 30
+#   python benchmarks/pruning.py --from-db              # latest prediction set from ml.predictions
+#
+# Version: 1.0.0
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from load_config import load_config
+from session import OptimizerSession
+
+POSITION_SHARE = {"GKP": 0.1, "DEF": 0.33, "MID": 0.39, "FWD": 0.18}
+FRINGE_SHARE = 0.4  # players with (almost) no expected minutes — most of a real pool
+CHIPS = (None, None, None, "wildcard", "free_hit", "bench_boost")
+
+
+def synthetic_pool(n_players: int, n_horizons: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    positions = rng.choice(list(POSITION_SHARE), size=n_players, p=list(POSITION_SHARE.values()))
+    players = []
+    for i, position in enumerate(positions):
+        price = round(float(rng.uniform(3.9, 14.0)), 1)
+        fringe = rng.random() < FRINGE_SHARE
+        mean = 0.2 if fringe else price / 2.5
+        players.append({
+            "opta_code": 100000 + i,
+            "team": f"T{i % 20}",
+            "position": str(position),
+            "price": price,
+            **{f"h{h + 1}": float(max(0.0, rng.normal(mean, 1.0))) for h in range(n_horizons)},
+        })
+    return players
+
+
+def db_pool():
+    from data.loader import load_prediction_version, load_predictions
+    from data.preprocessor import preprocess_data
+
+    version = load_prediction_version()
+    if version is None:
+        sys.exit("ml.predictions is empty. Run 03-ml/predict.py first.")
+    return preprocess_data(load_predictions(version[1]))
+
+
+def random_requests(players: list[dict], n_requests: int, horizon_weights: list[float], seed: int = 0):
+    # Mix of new teams and existing squads (valid 2/5/5/3 shapes), chips, locks, free transfers.
+    rng = random.Random(seed)
+    by_position = {}
+    for p in players:
+        by_position.setdefault(p["position"], []).append(p)
+    shape = {"GKP": 2, "DEF": 5, "MID": 5, "FWD": 3}
+    requests = []
+    for k in range(n_requests):
+        chip = CHIPS[k % len(CHIPS)]
+        existing = []
+        if k % 2:
+            existing = [p for pos, count in shape.items() for p in rng.sample(by_position[pos], count)]
+        owned = [p["opta_code"] for p in existing]
+        budget = sum(p["price"] for p in existing) + rng.choice((0.0, 0.5, 2.0)) if existing else 100.0
+        locked = rng.sample(owned, rng.choice((0, 1, 2))) if owned else []
+        weights = [1.0] if chip == "free_hit" else horizon_weights[:rng.choice((1, 2, 3))]
+        requests.append((weights, budget, chip, locked, set(owned), rng.choice((0, 1, 2))))
+    return requests
+
+
+def _run(session: OptimizerSession, requests: list):
+    times, objectives = [], []
+    for weights, budget, chip, locked, owned, free_transfers in requests:
+        t0 = time.perf_counter()
+        result = session.solve(weights, budget, chip, locked, owned, free_transfers)
+        times.append(time.perf_counter() - t0)
+        objectives.append(result["objective"])
+    return np.array(times) * 1000, objectives
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dominance pruning benchmark")
+    parser.add_argument("--players", type=int, default=700)
+    parser.add_argument("--requests", type=int, default=24)
+    parser.add_argument("--from-db", action="store_true", help="use the latest prediction set instead of a synthetic pool")
+    args = parser.parse_args()
+
+    config = load_config()
+    constraints = config["constraints"]
+    solver_options = config.get("solver", {}).get("options", {})
+    horizon_weights = list(constraints["horizon_weights"].values())
+
+    players = db_pool() if args.from_db else synthetic_pool(args.players, len(horizon_weights))
+    requests = random_requests(players, args.requests, horizon_weights)
+
+    t0 = time.perf_counter()
+    full = OptimizerSession(players, constraints, solver_options, prune_dominated=False)
+    build_full = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    pruned = OptimizerSession(players, constraints, solver_options, prune_dominated=True)
+    build_pruned = (time.perf_counter() - t0) * 1000
+
+    print(f"\nPool: {len(players)} players, {args.requests} requests")
+    print(f"  Left out:   {int(pruned.dominated.sum())}/{pruned.n} ({pruned.dominated.mean():.1%}) reduction")
+    print(f"  Build:      full {build_full:.1f} ms, pruned {build_pruned:.1f} ms")
+
+    full_ms, full_obj = _run(full, requests)
+    pruned_ms, pruned_obj = _run(pruned, requests)
+    print(f"  Solve p50:  full {np.median(full_ms):.0f} ms, pruned {np.median(pruned_ms):.0f} ms")
+    print(f"  Solve p95:  full {np.percentile(full_ms, 95):.0f} ms, pruned {np.percentile(pruned_ms, 95):.0f} ms")
+    print(f"  Solve max:  full {full_ms.max():.0f} ms, pruned {pruned_ms.max():.0f} ms")
+
+    mismatches = [
+        k for k, (a, b) in enumerate(zip(full_obj, pruned_obj))
+        if (a is None) != (b is None) or (a is not None and abs(a - b) > 1e-6 * max(1.0, abs(a)))
+    ]
+    print(f"  Objectives: {'all match' if not mismatches else f'MISMATCH on requests {mismatches}'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# Benchmark: robust (scenario) mode — scenario generation and solve latency for S scenarios,
+# with and without the candidate cap (config robust.candidates_per_position), and how much of the
+# deterministic squad's downside (CVaR) the robust squad recovers.
+#
+# Usage (from the 04-optimizer directory):
+#   python benchmarks/robust.py                          # synthetic 700-player pool, S=200
+#   python benchmarks/robust.py --scenarios 500 --requests 10
+#   python benchmarks/robust.py --from-db                # latest prediction set (predicted_std from 03-ml)
+#
+# Version: 1.0.0
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from load_config import load_config
+from optimizer import ROBUST_DEFAULTS
+from pruning import db_pool, random_requests, synthetic_pool
+from scenarios import cvar, sample_scenarios, weighted_moments
+from session import OptimizerSession
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Robust mode benchmark")
+    parser.add_argument("--players", type=int, default=700)
+    parser.add_argument("--requests", type=int, default=8)
+    parser.add_argument("--scenarios", type=int, default=200)
+    parser.add_argument("--from-db", action="store_true", help="use the latest prediction set instead of a synthetic pool")
+    args = parser.parse_args()
+
+    config = load_config()
+    constraints = config["constraints"]
+    robust = {**ROBUST_DEFAULTS, **{k: v for k, v in config.get("robust", {}).items() if k != "limits"}}
+    limits = config.get("robust", {}).get("limits", {})
+    limits = {"time_limit": limits.get("time_limit"), "mip_rel_gap": limits.get("mip_rel_gap")}
+    horizon_weights = list(constraints["horizon_weights"].values())
+
+    if args.from_db:
+        players = db_pool()
+    else:
+        players = synthetic_pool(args.players, len(horizon_weights))
+        rng = np.random.default_rng(1)
+        for p in players:  # forest spread stand-in
+            for h in range(len(horizon_weights)):
+                p[f"s{h + 1}"] = float(abs(rng.normal(0.5, 0.3)))
+    session = OptimizerSession(players, constraints, config.get("solver", {}).get("options", {}))
+    requests = random_requests(players, args.requests, horizon_weights)
+
+    gen_ms, capped_ms, full_ms, recovered, mismatches = [], [], [], [], 0
+    for weights, budget, chip, locked, owned, free_transfers in requests:
+        t0 = time.perf_counter()
+        mean, variance = weighted_moments(session.points, session.std, weights, robust["outcome_variance_ratio"])
+        draws = sample_scenarios(mean, variance, session.team_of, args.scenarios, robust["club_correlation"], robust["seed"])
+        gen_ms.append((time.perf_counter() - t0) * 1000)
+
+        runs = {}
+        for name, candidates in (("capped", robust["candidates_per_position"]), ("full", None)):
+            t0 = time.perf_counter()
+            runs[name] = session.solve_scenarios(
+                weights, budget, chip, locked, owned, free_transfers, draws, robust["objective"], robust["alpha"],
+                robust["risk_weight"], candidates, robust["cheapest_per_position"], limits,
+            )
+            (capped_ms if name == "capped" else full_ms).append((time.perf_counter() - t0) * 1000)
+        a, b = runs["capped"]["objective"], runs["full"]["objective"]
+        mismatches += (a is None) != (b is None) or (a is not None and abs(a - b) > 1e-6 * max(1.0, abs(a)))
+
+        deterministic = session.solve(weights, budget, chip, locked, owned, free_transfers)
+        if deterministic["selected"] and runs["capped"]["selected"]:
+            scored = deterministic["selected"] if chip == "bench_boost" else deterministic["starters"]
+            recovered.append(runs["capped"]["scenario_cvar"] - cvar(draws[:, scored].sum(axis=1), robust["alpha"]))
+
+    print(f"\nPool: {len(players)} players, {args.requests} requests, S={args.scenarios}, "
+          f"{robust['objective']} (alpha {robust['alpha']}, risk_weight {robust['risk_weight']})")
+    print(f"  Scenarios:  p50 {np.median(gen_ms):.1f} ms")
+    print(f"  Solve p50:  capped {np.median(capped_ms):.0f} ms, full {np.median(full_ms):.0f} ms")
+    print(f"  Solve max:  capped {np.max(capped_ms):.0f} ms, full {np.max(full_ms):.0f} ms")
+    print(f"  Objectives: {'all match' if not mismatches else f'{mismatches} differ (candidate cap)'}")
+    if recovered:
+        print(f"  CVaR vs deterministic squad: +{np.mean(recovered):.2f} pts on average")
+
+
+if __name__ == "__main__":
+    main()
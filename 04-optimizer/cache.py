@@ -0,0 +1,64 @@
+# Process-level caches for the optimizer (player pool, config, results)
+# Version: 1.0.0
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    # Thread-safe bounded cache. Entries expire `ttl_seconds` after they were stored (None = never)
+    # and the least recently used entry is evicted beyond `maxsize`.
+    # Expired entries stay readable through peek() until evicted, so a caller can revalidate a stale
+    # value cheaply (e.g. compare a version) instead of reloading it.
+    def __init__(self, maxsize: int = 8, ttl_seconds: float | None = None):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()   # key -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or (entry[1] is not None and entry[1] <= time.monotonic()):
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, key, default=None):
+        # Value even if expired; does not count as a hit or miss.
+        with self._lock:
+            entry = self._data.get(key)
+            return default if entry is None else entry[0]
+
+    def put(self, key, value):
+        expires_at = None if self.ttl_seconds is None else time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def expire(self, key=None):
+        # Marks one entry (or all) stale: the next get() misses, peek() still sees the value.
+        with self._lock:
+            keys = list(self._data) if key is None else [key] if key in self._data else []
+            for k in keys:
+                self._data[k] = (self._data[k][0], 0.0)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else None,
+            }
@@ -0,0 +1,106 @@
+# Chip comparison — the same request solved once per chip (and without one), ranked by expected points net of hits
+# Version: 1.1.0
+#
+# Every variant is an ordinary optimize request (main_runner.run_optimizer), so the variants share the cached
+# player pool, the prebuilt session (session.py hands each concurrent solve its own model copy) and the
+# result cache. main_runner.compare_chips runs them on threads; highspy releases the GIL while solving.
+#
+# Expected points over the request's horizon, by FPL rules rather than the solver objective:
+#   - starters score every gameweek, the captain twice
+#   - triple_captain: the captain scores a third time in the chip gameweek (the first one)
+#   - bench_boost: all 15 score in the chip gameweek (the session returns every pick as a starter); in the
+#     later gameweeks only the best XI of the 15 scores, plus its best player again as captain
+#   - free_hit: the free-hit squad plays the chip gameweek only; the existing squad returns for the rest
+#     of the horizon (best XI and captain per gameweek, no transfers)
+# Hits (HIT_COST each) are charged for transfers beyond free_transfers except on wildcard and free_hit.
+# Without an existing squad wildcard and free_hit are not compared (they only change transfers).
+
+from load_user_input import CHIPS
+from session import HIT_COST, OptimizerSession
+
+NO_CHIP = "none"
+
+
+def chip_variants(user_input: dict):
+    # [(chip or None, user_input with only that chip active)]; user_input["chips"] = the chips still available
+    # (all flags false = compare every chip).
+    available = [c for c in CHIPS if (user_input.get("chips") or {}).get(c)] or list(CHIPS)
+    if not user_input.get("existing_squad"):
+        available = [c for c in available if c not in ("wildcard", "free_hit")]
+    return [(chip, {**user_input, "chips": {c: c == chip for c in CHIPS}}) for chip in [None] + available]
+
+
+def best_xi(members, position_of, pts: dict, config_constraints: dict):
+    # Best XI of members that meets position_starting_min (the MILP's rule), by pts.
+    starting_min = config_constraints["position_starting_min"]
+    starters = []
+    for position, count in starting_min.items():
+        starters += sorted((m for m in members if position_of(m) == position), key=pts.get, reverse=True)[:count]
+    rest = sorted((m for m in members if m not in starters), key=pts.get, reverse=True)
+    return starters + rest[:config_constraints["starting_players"] - len(starters)]
+
+
+def held_squad_pts(session: OptimizerSession, opta_codes, horizons: range, config_constraints: dict):
+    # Expected points of an existing squad kept unchanged: per horizon, best XI plus the best starter
+    # again as captain.
+    idx = [session.index[c] for c in opta_codes if c in session.index]
+    total = 0.0
+    for h in horizons:
+        pts = {i: float(session.points[i, h]) if h < session.points.shape[1] else 0.0 for i in idx}
+        starters = best_xi(idx, lambda i: session.players[i]["position"], pts, config_constraints)
+        total += sum(pts[i] for i in starters) + max((pts[i] for i in starters), default=0.0)
+    return total
+
+
+def score_variant(chip, response: dict, user_input: dict, session: OptimizerSession, config_constraints: dict,
+                  horizon: int):
+    # {"chip", "status", "error_message", "expected_pts", "transfer_hits", "expected_pts_after_hits", "result"};
+    # result is the optimize response; it and the points are None when the variant found no squad.
+    variant = {"chip": chip or NO_CHIP, "status": response["status"], "error_message": response["error_message"],
+               "expected_pts": None, "transfer_hits": None, "expected_pts_after_hits": None, "result": None}
+    if response["squad"] is None:
+        return variant
+    variant["result"] = response
+
+    squad = response["squad"]["squad"]
+    expected_pts = 0.0
+    for k in range(max((len(p["expected_pts"]) for p in squad), default=0)):
+        pts = {j: float(p["expected_pts"][k]["pts"]) if k < len(p["expected_pts"]) else 0.0 for j, p in enumerate(squad)}
+        if chip == "bench_boost" and k > 0:
+            starters = best_xi(range(len(squad)), lambda j: squad[j]["position"], pts, config_constraints)
+            expected_pts += sum(pts[j] for j in starters) + max((pts[j] for j in starters), default=0.0)
+            continue
+        for j, p in enumerate(squad):
+            if p["is_starter"]:
+                expected_pts += pts[j]
+            if p["is_captain"]:
+                expected_pts += pts[j] * (2 if chip == "triple_captain" and k == 0 else 1)
+
+    existing = {p["opta_code"] for p in user_input.get("existing_squad") or []}
+    if chip == "free_hit" and existing:
+        expected_pts += held_squad_pts(session, existing, range(1, horizon), config_constraints)
+
+    transfer_hits = 0
+    if existing and chip not in ("wildcard", "free_hit"):
+        transfers = len((response["transfers_in"] or {"transfers": []})["transfers"])
+        transfer_hits = max(0, transfers - user_input["free_transfers"])
+
+    variant.update({
+        "expected_pts": round(expected_pts, 2),
+        "transfer_hits": transfer_hits,
+        "expected_pts_after_hits": round(expected_pts - HIT_COST * transfer_hits, 2),
+    })
+    return variant
+
+
+def rank_variants(variants: list[dict]):
+    # Best first by expected_pts_after_hits (unsolved variants last); adds "rank" and "gain_vs_no_chip".
+    baseline = next((v["expected_pts_after_hits"] for v in variants if v["chip"] == NO_CHIP), None)
+    ranked = sorted(variants, key=lambda v: (v["expected_pts_after_hits"] is None, -(v["expected_pts_after_hits"] or 0)))
+    for rank, v in enumerate(ranked, start=1):
+        solved = v["expected_pts_after_hits"] is not None
+        v["rank"] = rank if solved else None
+        v["gain_vs_no_chip"] = (
+            round(v["expected_pts_after_hits"] - baseline, 2) if solved and baseline is not None else None
+        )
+    return ranked
@@ -1,10 +1,33 @@
 # Load the predictions from ml.predictions and training data from ml.training_runs
 # Returns a DataFrame
-# Version: 1.0.0
+# Version: 1.2.0
 
 import pandas as pd
+from sqlalchemy import text
 from db.engine import engine
 
+#Identity of the latest prediction set, without reading the predictions themselves.
+#fingerprint: hash of the per-horizon fingerprints 03-ml stores on each row (registry/fingerprint.py)
+#plus the latest predicted_at, so a forced rewrite or a pre-fingerprint row still changes it.
+PREDICTION_VERSION_QUERY = text("""
+    select p.season_id, p.features_gameweek_id,
+        md5(
+            coalesce(string_agg(distinct p.fingerprint, ',' order by p.fingerprint), '')
+            || '|' || max(p.predicted_at)::text
+        ) as fingerprint
+    from ml.predictions p
+    where p.features_gameweek_id = (select max(features_gameweek_id) from ml.predictions)
+    group by p.season_id, p.features_gameweek_id
+    order by p.season_id desc
+    limit 1
+""")
+
+def load_prediction_version():
+    #Returns (season_id, features_gameweek_id, fingerprint), or None when ml.predictions is empty.
+    with engine.connect() as conn:
+        row = conn.execute(PREDICTION_VERSION_QUERY).fetchone()
+    return None if row is None else (int(row[0]), int(row[1]), row[2])
+
 def load_predictions(current_gameweek_id: int | None = None):
     if current_gameweek_id is None:
         current_gameweek_id = pd.read_sql(
@@ -12,7 +35,7 @@ def load_predictions(current_gameweek_id: int | None = None):
         ).iloc[0, 0]
 
     query = f"""
-        select p.opta_code, p.predicted_points, p.predicted_gameweek_id, p.season_id, p.horizon,  ps.web_name, ps.first_name, ps.second_name, t.name as team,
+        select p.opta_code, p.predicted_points, p.predicted_std, p.predicted_gameweek_id, p.season_id, p.horizon,  ps.web_name, ps.first_name, ps.second_name, t.name as team,
             case
             when ps.element_type = 1 then 'GKP'
             when ps.element_type = 2 then 'DEF'
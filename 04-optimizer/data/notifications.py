@@ -0,0 +1,64 @@
+# Postgres LISTEN for "new predictions written" (NOTIFY sent by 03-ml registry/logger.save_predictions_bulk)
+# Version: 1.0.0
+#
+# One daemon thread per process holds a dedicated connection (detached from the engine's pool),
+# LISTENs on the channel and calls `callback(payload)` for every notification. If the connection
+# drops, it reconnects after `retry_seconds`; the TTL on the cached pool covers the gap.
+import select
+import threading
+
+from db.engine import engine
+
+_listener: threading.Thread | None = None
+_stop = threading.Event()
+
+
+def start_listener(channel: str, callback, retry_seconds: float = 5.0):
+    # Idempotent — a second call while the thread is alive does nothing. Returns the thread.
+    global _listener
+    if _listener is not None and _listener.is_alive():
+        return _listener
+    _stop.clear()
+    _listener = threading.Thread(
+        target=_listen, args=(channel, callback, retry_seconds), name=f"listen-{channel}", daemon=True
+    )
+    _listener.start()
+    return _listener
+
+
+def stop_listener():
+    _stop.set()
+
+
+def _listen(channel: str, callback, retry_seconds: float):
+    quoted = '"' + channel.replace('"', '""') + '"'
+    while not _stop.is_set():
+        raw = None
+        try:
+            raw = engine.raw_connection()
+            raw.detach()  # never returned to the pool in LISTEN state
+            dbapi = raw.dbapi_connection
+            dbapi.autocommit = True
+            cursor = dbapi.cursor()
+            cursor.execute(f"LISTEN {quoted}")
+            print(f"  Listening for {channel} notifications.")
+
+            while not _stop.is_set():
+                if hasattr(dbapi, "poll"):  # psycopg2
+                    if select.select([dbapi], [], [], retry_seconds) == ([], [], []):
+                        continue
+                    dbapi.poll()
+                    while dbapi.notifies:
+                        callback(dbapi.notifies.pop(0).payload)
+                else:  # psycopg 3
+                    for notify in dbapi.notifies(timeout=retry_seconds):
+                        callback(notify.payload)
+        except Exception as e:
+            print(f"  {channel} listener error: {e} — retrying in {retry_seconds:.0f}s.")
+            _stop.wait(retry_seconds)
+        finally:
+            if raw is not None:
+                try:
+                    raw.close()
+                except Exception:
+                    pass
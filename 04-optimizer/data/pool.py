@@ -0,0 +1,64 @@
+# Cached player pool — the latest prediction set, loaded and preprocessed once per process
+# Version: 1.0.0
+#
+# Keyed by (season_id, features_gameweek_id, prediction fingerprint) from data/loader.load_prediction_version().
+# Within cache.player_pool_ttl_seconds a request reads no predictions at all. After that, one small
+# version query decides whether the cached pool is still current (kept) or stale (reloaded).
+# predict.py NOTIFYs on the predictions channel after writing new rows; data/notifications.py expires
+# the pool on that signal, so a new prediction set is picked up without waiting for the TTL.
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from cache import TTLCache
+from data.loader import load_prediction_version, load_predictions
+from data.preprocessor import preprocess_data
+
+DEFAULT_POOL_TTL_SECONDS = 300
+LATEST = "latest"
+
+
+@dataclass
+class PlayerPool:
+    key: tuple                       # (season_id, features_gameweek_id, fingerprint)
+    predictions: pd.DataFrame        # load_predictions() rows, every horizon
+    players: list[dict] = field(default_factory=list)  # preprocess_data(predictions)
+
+    @property
+    def fingerprint(self):
+        return self.key[2]
+
+
+_pool_cache = TTLCache(maxsize=1, ttl_seconds=DEFAULT_POOL_TTL_SECONDS)
+
+
+def get_player_pool(ttl_seconds: float | None = None):
+    # ttl_seconds: config cache.player_pool_ttl_seconds (None keeps the current TTL).
+    if ttl_seconds is not None:
+        _pool_cache.ttl_seconds = ttl_seconds
+
+    pool = _pool_cache.get(LATEST)
+    if pool is not None:
+        return pool
+
+    version = load_prediction_version()
+    if version is None:
+        raise RuntimeError("ml.predictions is empty. Run 03-ml/predict.py first.")
+
+    stale = _pool_cache.peek(LATEST)
+    if stale is not None and stale.key == version:
+        pool = stale  # unchanged — just restart its TTL
+    else:
+        predictions = load_predictions(version[1])
+        pool = PlayerPool(key=version, predictions=predictions, players=preprocess_data(predictions))
+    _pool_cache.put(LATEST, pool)
+    return pool
+
+
+def invalidate_player_pool(payload: str | None = None):
+    # Next get_player_pool() re-checks the version (and reloads only if it changed).
+    _pool_cache.expire()
+
+
+def pool_cache_stats():
+    return _pool_cache.stats()
@@ -1,5 +1,5 @@
 # Data preprocessing for the optimizer
-# Version: 1.0.0
+# Version: 1.1.0
 import pandas as pd
 
 #user choice of horizon and free_hit chip dictate the optimizer goal. filter the input df into the optimizer beforehand.
@@ -16,6 +16,11 @@ def slice_weights(df: pd.DataFrame, horizon_weights):
 def preprocess_data(df: pd.DataFrame):
     pts = df.pivot(index="opta_code", columns="horizon", values="predicted_points")
     pts.columns = [f'h{h}' for h in pts.columns]  # rename 1→h1 etc.
+    #spread of the prediction (03-ml forests; NULL otherwise) as s1..sN, used by robust mode (scenarios.py)
+    if "predicted_std" in df.columns:
+        std = df.pivot(index="opta_code", columns="horizon", values="predicted_std").astype(float)
+        std.columns = [f's{h}' for h in std.columns]
+        pts = pts.join(std)
     pts = pts.reset_index()
     meta = df.sort_values('horizon')[['opta_code',"predicted_gameweek_id", "season_id", "web_name", "first_name", "second_name", "team", 'position', 'price']].drop_duplicates('opta_code')
     processed_df = pts.merge(meta, on='opta_code')
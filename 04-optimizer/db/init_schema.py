@@ -1,7 +1,16 @@
+import sys
 from sqlalchemy import text
-from schema import optimizer_metadata
+from schema import RUN_LOG_STATUS_CHECK, optimizer_metadata
 from engine import engine
 
+# Columns added after the tables were first created. init_schema() recreates the schema;
+# migrate() keeps existing rows and adds them with ADD COLUMN IF NOT EXISTS.
+ADDED_COLUMNS = [
+    ("optimizer_run_logs", "objective", "NUMERIC(12, 4)"),
+    ("optimizer_run_logs", "mip_bound", "NUMERIC(12, 4)"),
+    ("optimizer_run_logs", "mip_gap", "NUMERIC(12, 6)"),
+]
+
 def init_schema():
     with engine.connect() as conn:
         conn.execute(text("DROP SCHEMA IF EXISTS optimizer CASCADE"))
@@ -9,6 +18,20 @@ def init_schema():
         conn.commit()
     optimizer_metadata.create_all(engine)
 
+def migrate():
+    with engine.connect() as conn:
+        for table, column, col_type in ADDED_COLUMNS:
+            conn.execute(text(f"ALTER TABLE optimizer.{table} ADD COLUMN IF NOT EXISTS {column} {col_type}"))
+        # status gained feasible / time_limit
+        conn.execute(text("ALTER TABLE optimizer.optimizer_run_logs DROP CONSTRAINT IF EXISTS ck_optimizer_run_logs_status"))
+        conn.execute(text(f"ALTER TABLE optimizer.optimizer_run_logs ADD CONSTRAINT ck_optimizer_run_logs_status CHECK ({RUN_LOG_STATUS_CHECK})"))
+        conn.commit()
+
 if __name__ == "__main__":
-    init_schema()
+    # python init_schema.py            drop and recreate the optimizer schema
+    # python init_schema.py --migrate  add new columns/constraints to an existing one
+    if "--migrate" in sys.argv[1:]:
+        migrate()
+    else:
+        init_schema()
     print("Done")
\ No newline at end of file
@@ -5,6 +5,7 @@ from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy import TIMESTAMP 
 
 optimizer_metadata = MetaData(schema="optimizer")
+RUN_LOG_STATUS_CHECK = "status IN ('optimal','feasible','time_limit','error','infeasible','unbounded')"
 
 # optimizer SCHEMA
 # 1. optimizer results table
@@ -53,12 +54,16 @@ optimizer_run_logs = Table(
     Column("id", BigInteger, primary_key=True, autoincrement=True),
     Column("run_id", UUID(as_uuid=True)),           
     Column("run_at", TIMESTAMP(timezone=True), nullable=False),
-    Column("status", String(50), nullable=False), #optimal/error/infeasible/unbounded
+    Column("status", String(50), nullable=False), #optimal/feasible/time_limit/error/infeasible/unbounded
     Column("solve_time_ms", BigInteger, nullable=False),
     Column("input_params", JSONB, nullable=False),
     Column("config_snapshot", JSONB),
     Column("error_message", Text),
-    CheckConstraint("status IN ('optimal','error','infeasible','unbounded')", name="ck_optimizer_run_logs_status"),
+    # solver outcome (feasible = stopped by time limit / gap with a squad): incumbent, proven bound, relative gap
+    Column("objective", Numeric(12, 4)),
+    Column("mip_bound", Numeric(12, 4)),
+    Column("mip_gap", Numeric(12, 6)),
+    CheckConstraint(RUN_LOG_STATUS_CHECK, name="ck_optimizer_run_logs_status"),
 )
 Index("ix_optimizer_run_logs_run_id", optimizer_run_logs.c.run_id)
 Index("ix_optimizer_run_logs_run_at", optimizer_run_logs.c.run_at)
@@ -0,0 +1,33 @@
+#Loading optimizer config.yaml
+#Version: 1.0.0
+#Cached for the life of the process; re-read at most every cache.config_ttl_seconds, and only
+#if the file changed on disk (mtime).
+import os
+from pathlib import Path
+
+import yaml
+
+from cache import TTLCache
+
+CONFIG_PATH = Path(__file__).parent / "config.yaml"
+DEFAULT_CONFIG_TTL_SECONDS = 60
+
+_config_cache = TTLCache(maxsize=1, ttl_seconds=DEFAULT_CONFIG_TTL_SECONDS)
+
+
+def load_config():
+    # Returns the parsed config. Treat it as read-only — it is shared between requests.
+    cached = _config_cache.get(CONFIG_PATH)
+    if cached is not None:
+        return cached[1]
+
+    mtime = os.stat(CONFIG_PATH).st_mtime_ns
+    stale = _config_cache.peek(CONFIG_PATH)
+    if stale is not None and stale[0] == mtime:
+        config = stale[1]
+    else:
+        with open(CONFIG_PATH) as f:
+            config = yaml.safe_load(f)
+    _config_cache.ttl_seconds = config.get("cache", {}).get("config_ttl_seconds", DEFAULT_CONFIG_TTL_SECONDS)
+    _config_cache.put(CONFIG_PATH, (mtime, config))
+    return config
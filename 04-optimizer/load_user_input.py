@@ -1,5 +1,7 @@
 #Loading User input
-#Version: 1.0.0
+#Version: 1.4.1
+
+CHIPS = ("wildcard", "free_hit", "bench_boost", "triple_captain")
 
 def _get_active_chip(user_input):
     # Get the chips dict
@@ -17,7 +19,43 @@ def _existing_squad(user_input):
 def load_user_input(user_input):
     existing_opta_codes, locked_players = _existing_squad(user_input)
     chip = _get_active_chip(user_input)
-    bank = user_input["bank"]
+    bank = round(user_input["bank"], 1)  # FPL bank is in £0.1m steps
     free_transfers = user_input["free_transfers"]
     horizon = user_input["horizon"]
-    return existing_opta_codes, locked_players, chip, bank, free_transfers, horizon
\ No newline at end of file
+    return existing_opta_codes, locked_players, chip, bank, free_transfers, horizon
+
+#Optional "excluded_players": opta codes the squad must not contain ("best squad without X")
+def load_excluded_players(user_input):
+    return sorted(set(user_input.get("excluded_players") or []))
+
+#Canonical form of a request, used as the result-cache key (main_runner).
+#Two requests with the same canonical form get the same response:
+#  - existing squad sorted by opta_code (order never mattered), None when empty
+#  - exactly one active chip (the one load_user_input picks)
+#  - bank at 0.1m precision; dropped (0) without an existing squad, where the budget is max_budget
+#  - free_transfers dropped (0) when there is no hit penalty: no existing squad, wildcard, free_hit
+#  - horizon as actually used: 1 on free_hit, otherwise capped at the horizons predicted (max_horizon)
+#  - limits: mip_rel_gap only (None = config default)
+#  - excluded_players sorted, None when empty
+#  - robust: only the fields given (None = deterministic mode); scenarios use a fixed seed, so same result
+def normalise_user_input(user_input, max_horizon: int):
+    existing_opta_codes, locked_players = _existing_squad(user_input)
+    chip = _get_active_chip(user_input)
+    locked = set(locked_players)
+    squad = [{"opta_code": c, "locked": c in locked} for c in sorted(existing_opta_codes)] or None
+
+    no_penalty = squad is None or chip in ("wildcard", "free_hit")
+    return {
+        "existing_squad": squad,
+        "chips": {c: c == chip for c in CHIPS},
+        "bank": round(user_input["bank"], 1) if squad else 0.0,
+        "free_transfers": 0 if no_penalty else user_input["free_transfers"],
+        "horizon": 1 if chip == "free_hit" else min(user_input["horizon"], max_horizon),
+        # only proven results are cached, so time_limit can't change them
+        "mip_rel_gap": (user_input.get("limits") or {}).get("mip_rel_gap"),
+        "excluded_players": load_excluded_players(user_input) or None,
+        "robust": None if user_input.get("robust") is None else {
+            k: v for k, v in user_input["robust"].items() if v is not None
+        },
+    }
+
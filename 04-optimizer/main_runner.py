@@ -1,84 +1,254 @@
 # FPL Gaffer — optimizer Entry Point
-# Version: 1.0.0
+# Version: 1.10.2
+import copy
+import hashlib
 import json
 import time
-import yaml
-from pathlib import Path
-from data.loader import load_predictions
-from data.preprocessor import apply_horizon_filter, preprocess_data, slice_weights
+from concurrent.futures import ThreadPoolExecutor
+from cache import TTLCache
+from chips import chip_variants, rank_variants, score_variant
+from data.notifications import start_listener
+from data.pool import PlayerPool, get_player_pool, invalidate_player_pool, pool_cache_stats
+from data.preprocessor import apply_horizon_filter, slice_weights
 from tests.temporary_input import adjust_user_input
-from load_user_input import load_user_input
-from optimizer import select_squad
+from load_config import load_config
+from load_user_input import load_user_input, normalise_user_input
+from optimizer import request_limits, solve_alternatives, solve_request
+from planner import plan_transfers
 from registry.logger import save_log
+from session import HIT_COST, OptimizerSession
 
-def run_optimizer(user_input: dict, triggered_by: str = "api"):
-    #loading config
-    CONFIG_PATH = Path(__file__).parent / "config.yaml"
+# Prebuilt MILP per player pool (+ constraints/solver config). A new prediction set gets a new session;
+# only the most recent few are kept.
+SESSION_CACHE_SIZE = 4
+_sessions = TTLCache(maxsize=SESSION_CACHE_SIZE)
 
-    def load_config():
-        with open(CONFIG_PATH) as f:
-            return yaml.safe_load(f)
+# Responses by (normalised request, prediction fingerprint, config hash). A hit skips the solver.
+# Bounded LRU, no TTL — a new prediction set or config changes the key. Size: cache.results_maxsize.
+DEFAULT_RESULTS_MAXSIZE = 512
+_results = TTLCache(maxsize=DEFAULT_RESULTS_MAXSIZE)
+# Only proven outcomes are cached: a time-limited ("feasible"/"time_limit") result could improve on retry
+CACHEABLE_STATUSES = ("optimal", "infeasible", "unbounded")
 
+
+def config_hash(config: dict):
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def get_session(pool: PlayerPool, config: dict):
+    solver_cfg = config.get("solver", {})
+    solver_options = solver_cfg.get("options", {})
+    prune = solver_cfg.get("prune_dominated", True)
+    key = (pool.key, config_hash({"constraints": config["constraints"], "solver": solver_options, "prune": prune}))
+    session = _sessions.get(key)
+    if session is None:
+        # Two concurrent misses both build; the last one is kept
+        session = OptimizerSession(pool.players, config["constraints"], solver_options, prune_dominated=prune)
+        _sessions.put(key, session)
+    return session
+
+
+def result_key(user_input: dict, pool: PlayerPool, config: dict):
+    max_horizon = int(pool.predictions["horizon"].max())
+    request = json.dumps(normalise_user_input(user_input, max_horizon), sort_keys=True)
+    return request, pool.fingerprint, config_hash(
+        {"constraints": config["constraints"], "solver": config.get("solver"), "robust": config.get("robust")}
+    )
+
+
+def cache_stats():
+    # Hit/miss counters of every optimizer cache (05-api GET /optimize/cache).
+    return {"results": _results.stats(), "sessions": _sessions.stats(), "player_pool": pool_cache_stats()}
+
+
+def prewarm_results():
+    # Solves the requests under cache.prewarm (e.g. the landing-page default) into the result cache.
+    # Logged as a pipeline run: later cache hits only add log rows and rely on this optimizer_runs row.
+    for user_input in load_config().get("cache", {}).get("prewarm") or []:
+        response = run_optimizer(user_input, triggered_by="pipeline")
+        print(f"  Prewarmed optimizer result: {response['status']} in {response['solve_time_ms']} ms")
+
+
+def _on_new_predictions(payload: str | None = None):
+    invalidate_player_pool(payload)
+    try:
+        prewarm_results()
+    except Exception as e:  # the next request solves it instead
+        print(f"  Optimizer prewarm failed: {e}")
+
+
+def start_invalidation_listener():
+    # For long-running processes (05-api): expire the cached player pool as soon as predict.py writes,
+    # then prewarm the configured requests against the new prediction set.
+    cache_cfg = load_config().get("cache", {})
+    if cache_cfg.get("listen", True):
+        start_listener(cache_cfg.get("predictions_channel", "ml_predictions"), _on_new_predictions)
+
+
+def run_optimizer(user_input: dict, triggered_by: str = "api", log: bool = True):
+    #loading config (cached, see load_config.py)
     config = load_config()
-    max_budget = config["constraints"]["max_budget"]
-    horizon_weights = list(config["constraints"]["horizon_weights"].items())
+    cache_cfg = config.get("cache", {})
 
-    #USER INPUT LOADING
-    user_existing_opta_codes, user_locked_players, user_chip, user_bank, user_free_transfers, user_horizon = load_user_input(user_input)
+    #USER INPUT LOADING (budget, weights etc. are derived in optimizer.solve_request)
+    _, _, user_chip, _, _, user_horizon = load_user_input(user_input)
 
     #PREDICTIONS LOADING AS INPUT FOR OPTIMIZER
-    predictions = load_predictions()
-    predictions_filtered = apply_horizon_filter(user_horizon, user_chip, predictions)
-    players = preprocess_data(predictions_filtered)
+    #OLD: predictions = load_predictions() on every request
+    pool = get_player_pool(cache_cfg.get("player_pool_ttl_seconds"))
+
+    #RESULT CACHE — identical (normalised) request on the same predictions and config: no solve
+    _results.maxsize = cache_cfg.get("results_maxsize", DEFAULT_RESULTS_MAXSIZE)
+    key = result_key(user_input, pool, config)
+    cached = _results.get(key)
+    if cached is not None:
+        if log:
+            # log row only — the optimizer_runs row was written when this result was solved
+            save_log(status=cached["status"], solve_time_ms=0, input_params=user_input,
+                     error_message=cached["error_message"], objective=cached.get("objective"),
+                     mip_bound=cached.get("bound"), mip_gap=cached.get("gap"), log_only=True)
+        return {**copy.deepcopy(cached), "solve_time_ms": 0, "cached": True}
 
-    #Weights
+    # The session holds every horizon; the request's horizons only select the objective weights
+    session = get_session(pool, config)
+    response, run = solve_request(session, user_input, config["constraints"], int(pool.predictions["horizon"].max()),
+                                  config.get("solver", {}).get("limits"), config.get("robust"))
+
+    #logging
+    if log:
+        save_log(
+            status=response["status"],
+            solve_time_ms=response["solve_time_ms"],
+            input_params=user_input,
+            error_message=response["error_message"],
+            #run fields
+            db_input=apply_horizon_filter(user_horizon, user_chip, pool.predictions),
+            triggered_by=triggered_by,
+            **run)
+
+    #solver errors and time-limited results are not cached — the next identical request retries
+    if response["status"] in CACHEABLE_STATUSES:
+        _results.put(key, copy.deepcopy(response))
+    return response
+
+def run_planner(user_input: dict, triggered_by: str = "api", log: bool = True):
+    # Multi-gameweek transfer plan (planner.py). Same input as run_optimizer minus chips.
+    config = load_config()
+    max_budget = config["constraints"]["max_budget"]
+    horizon_weights = list(config["constraints"]["horizon_weights"].items())
+
+    user_existing_opta_codes, user_locked_players, _, user_bank, user_free_transfers, user_horizon = load_user_input(
+        {**user_input, "chips": {}}
+    )
+    pool = get_player_pool(config.get("cache", {}).get("player_pool_ttl_seconds"))
+    predictions_filtered = apply_horizon_filter(user_horizon, None, pool.predictions)
+    session = get_session(pool, config)
     gw_weights = slice_weights(predictions_filtered, horizon_weights)
 
-    #Budget
     budget = max_budget
     if user_existing_opta_codes:
-        existing_players = [p for p in players if p["opta_code"] in user_existing_opta_codes]
-        budget = user_bank + sum(p["price"] for p in existing_players)
+        budget = user_bank + sum(session.players[session.index[c]]["price"] for c in user_existing_opta_codes if c in session.index)
 
     t0 = time.monotonic()
-    squad_json, transfers_in_json, transfers_out_json, transfer_hits, status, error_message = select_squad(
-        players,
-        gw_weights,
-        budget,
-        user_chip,
-        user_locked_players,
-        user_existing_opta_codes,
-        user_free_transfers,
-        config["constraints"],
+    plan = plan_transfers(
+        session, gw_weights, budget, user_locked_players, user_existing_opta_codes, user_free_transfers,
+        config.get("planner", {}), request_limits(user_input, config.get("planner", {}).get("limits")),
     )
     solve_time_ms = int((time.monotonic() - t0) * 1000)
 
-    #logging
+    if log:
+        # run log only — optimizer_runs holds single squads
+        save_log(
+            status=plan["status"],
+            solve_time_ms=solve_time_ms,
+            input_params={**user_input, "mode": "plan"},
+            error_message=plan["error_message"],
+            objective=plan["objective"],
+            mip_bound=plan["bound"],
+            mip_gap=plan["mip_gap"],
+            log_only=True)
+
+    total_hits = sum(gw["hits"] for gw in plan["gameweeks"])
+    expected_pts = sum(gw["expected_pts"] for gw in plan["gameweeks"])
+    return {
+    "status": plan["status"],
+    "horizon": len(gw_weights),
+    "solve_time_ms": solve_time_ms,
+    "error_message": plan["error_message"],
+    "is_optimal": plan["status"] == "optimal",
+    "mip_gap": plan["mip_gap"],
+    "expected_pts": round(expected_pts, 2),
+    "transfer_hits": total_hits,
+    "expected_pts_after_hits": round(expected_pts - HIT_COST * total_hits, 2),
+    "gameweeks": plan["gameweeks"],
+    }
+
+def run_alternatives(user_input: dict, triggered_by: str = "api", log: bool = True):
+    # K best distinct squads (optimizer.solve_alternatives), each with its objective delta
+    # to the best. k: user_input["k"] or solver.pool.k, at most solver.pool.max_k.
+    config = load_config()
+    cache_cfg = config.get("cache", {})
+    pool_cfg = config.get("solver", {}).get("pool", {})
+    k = max(1, min(user_input.get("k") or pool_cfg.get("k", 5), pool_cfg.get("max_k", 10)))
+
+    pool = get_player_pool(cache_cfg.get("player_pool_ttl_seconds"))
+    key = result_key(user_input, pool, config) + ("alternatives", k)
+    cached = _results.get(key)
+    if cached is None:
+        session = get_session(pool, config)
+        response = solve_alternatives(session, user_input, config["constraints"], int(pool.predictions["horizon"].max()),
+                                      k, pool_cfg.get("limits"))
+        # complete and proven only: a time budget cut-off could find more squads on retry
+        if response["status"] == "optimal":
+            _results.put(key, copy.deepcopy(response))
+    else:
+        response = {**copy.deepcopy(cached), "solve_time_ms": 0, "cached": True}
 
-    save_log(
-        status=status,
-        solve_time_ms=solve_time_ms,
-        input_params=user_input,
-        error_message=error_message,
-        #run fields
-        db_input=predictions_filtered,
-        transfer_hits=transfer_hits,
-        squad_json=squad_json,
-        transfers_in_json=transfers_in_json,
-        transfers_out_json=transfers_out_json,
-        triggered_by=triggered_by,
-        user_chip=user_chip,
-        effective_horizon=int(predictions_filtered["horizon"].max()),
-        budget=budget)
+    if log:
+        # run log only — optimizer_runs holds single squads
+        best = response["alternatives"][0] if response["alternatives"] else {}
+        save_log(
+            status=response["status"],
+            solve_time_ms=response["solve_time_ms"],
+            input_params={**user_input, "mode": "alternatives", "k": k},
+            error_message=response["error_message"],
+            objective=best.get("objective"),
+            mip_gap=best.get("gap"),
+            log_only=True)
+    return response
+
+def compare_chips(user_input: dict, triggered_by: str = "api", log: bool = True):
+    # Solves the request with each available chip and without one, concurrently on the shared session,
+    # and ranks them by expected points net of hits (chips.py). Each variant is cached and logged like
+    # a normal optimize request.
+    config = load_config()
+    pool = get_player_pool(config.get("cache", {}).get("player_pool_ttl_seconds"))
+    session = get_session(pool, config)  # built here, not raced by the variant threads
+    max_horizon = int(pool.predictions["horizon"].max())
+    horizon = min(user_input["horizon"], max_horizon)
+
+    variants = chip_variants(user_input)
+    t0 = time.monotonic()
+    with ThreadPoolExecutor(max_workers=len(variants), thread_name_prefix="chip") as executor:
+        responses = list(executor.map(lambda v: run_optimizer(v[1], triggered_by, log), variants))
+    solve_time_ms = int((time.monotonic() - t0) * 1000)
 
+    ranked = rank_variants([
+        score_variant(chip, response, user_input, session, config["constraints"], horizon)
+        for (chip, _), response in zip(variants, responses)
+    ])
+    solved = [v for v in ranked if v["rank"] is not None]
+    if solved:
+        status = "optimal" if all(v["status"] == "optimal" for v in solved) else "feasible"
+    else:
+        status = ranked[0]["status"]
     return {
     "status": status,
-    "horizon": int(predictions_filtered["horizon"].max()),
+    "horizon": horizon,
     "solve_time_ms": solve_time_ms,
-    "error_message": error_message,
-    "squad": squad_json,
-    "transfers_in": transfers_in_json,
-    "transfers_out": transfers_out_json,
+    "error_message": None if solved else ranked[0]["error_message"],
+    "best_chip": solved[0]["chip"] if solved else None,
+    "variants": ranked,
     }
 
 if __name__ == "__main__":
@@ -90,7 +260,6 @@ if __name__ == "__main__":
 #safeguarding
 #1. only one chip should be active at any one time. i think its fine for now but definetely needs to be thought through. 
 #Caching
-#1. we can cache load_predictions() it is the same data every week until next week. 
-#optimizer solve time is in miliseconds. bottleneck on load. 
-#Redis or in-memory TTL cache to show knowledge
-#2. New user team can still be cached. can be our landing page maybe ?
+#1. DONE: player pool cached in-process with TTL + NOTIFY invalidation (data/pool.py), config.yaml too (load_config.py).
+#2. DONE: results cached per normalised request + prediction fingerprint + config hash; the landing page
+#   default (new team) is prewarmed from cache.prewarm after every prediction run.
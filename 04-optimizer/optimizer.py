@@ -1,115 +1,227 @@
-# Optimization logic PuLP
-# Version: 1.0.0
-import pulp
+# Optimization logic — squad selection MILP (built once per player pool in session.py, solved with HiGHS)
+# Version: 2.4.2
+# OLD: PuLP problem rebuilt per call (team/position constraints as O(teams x players) comprehensions),
+#      written to an LP file for a CBC subprocess.
+import time
+
+from load_user_input import load_excluded_players, load_user_input
+from scenarios import sample_scenarios, weighted_moments
+from session import OptimizerSession
+
+ROBUST_DEFAULTS = {
+    "objective": "cvar", "alpha": 0.2, "risk_weight": 0.5, "scenarios": 200, "max_scenarios": 500,
+    "club_correlation": 0.3, "outcome_variance_ratio": 1.0, "seed": 0,
+    "candidates_per_position": 20, "cheapest_per_position": 5,
+}
+
+
+#Solve limits for one request: config solver.limits defaults, overridden by the request's "limits"
+#({"time_limit": seconds, "mip_rel_gap": fraction}), time_limit capped at solver.limits.max_time_limit.
+def request_limits(user_input: dict, limits_cfg: dict | None):
+    limits_cfg = limits_cfg or {}
+    requested = user_input.get("limits") or {}
+    limits = {
+        name: requested.get(name) if requested.get(name) is not None else limits_cfg.get(name)
+        for name in ("time_limit", "mip_rel_gap")
+    }
+    cap = limits_cfg.get("max_time_limit")
+    if cap is not None:
+        limits["time_limit"] = min(limits["time_limit"] if limits["time_limit"] is not None else cap, cap)
+    return limits
+
+
+#Robust-mode settings for one request, None when the request has no "robust" object: config robust
+#defaults, overridden by the request's objective / alpha / risk_weight / scenarios (capped at max_scenarios).
+def request_robust(user_input: dict, robust_cfg: dict | None):
+    requested = user_input.get("robust")
+    if requested is None:
+        return None
+    robust = {**ROBUST_DEFAULTS, **{k: v for k, v in (robust_cfg or {}).items() if k != "limits"}}
+    robust.update({k: v for k, v in requested.items() if k in ("objective", "alpha", "risk_weight", "scenarios") and v is not None})
+    robust["scenarios"] = min(int(robust["scenarios"]), robust["max_scenarios"])
+    return robust
+
+
+#One request against a session: budget, horizon weights, solve, response. No DB — main_runner and
+#batch.py workers both call it (main_runner adds caching and logging around it).
+#limits_cfg: config solver.limits; robust_cfg: config robust (its limits replace solver.limits in robust mode).
+#Returns (response, run) — run holds the save_log() run fields except db_input/triggered_by.
+def solve_request(session: OptimizerSession, user_input: dict, config_constraints: dict, max_horizon: int,
+                  limits_cfg: dict | None = None, robust_cfg: dict | None = None):
+    existing_opta_codes, locked_players, chip, _, free_transfers, _ = load_user_input(user_input)
+    effective_horizon, gw_weights, budget = _request_setup(session, user_input, config_constraints, max_horizon)
+    robust = request_robust(user_input, robust_cfg)
+    if robust is not None:
+        limits_cfg = (robust_cfg or {}).get("limits", limits_cfg)
+
+    t0 = time.monotonic()
+    squad_json, transfers_in_json, transfers_out_json, transfer_hits, status, error_message, mip = select_squad(
+        session.players, gw_weights, budget, chip, locked_players, existing_opta_codes, free_transfers,
+        config_constraints, session=session, limits=request_limits(user_input, limits_cfg),
+        excluded_players=load_excluded_players(user_input), robust=robust,
+    )
+    solve_time_ms = int((time.monotonic() - t0) * 1000)
+
+    response = {
+    "status": status,
+    "horizon": effective_horizon,
+    "solve_time_ms": solve_time_ms,
+    "error_message": error_message,
+    "squad": squad_json,
+    "transfers_in": transfers_in_json,
+    "transfers_out": transfers_out_json,
+    "cached": False,
+    #incumbent objective, proven bound and relative gap; is_optimal False = feasible but stopped early
+    "is_optimal": status == "optimal",
+    "objective": mip["objective"],
+    "bound": mip["bound"],
+    "gap": mip["gap"],
+    #robust mode: settings plus the squad's scenario mean and CVaR (mean of the worst alpha share)
+    "robust": None if robust is None else {
+        "objective": robust["objective"], "alpha": robust["alpha"], "risk_weight": robust["risk_weight"],
+        "scenarios": robust["scenarios"], "scenario_mean": mip.get("scenario_mean"),
+        "scenario_cvar": mip.get("scenario_cvar"),
+    },
+    }
+    run = {
+        "transfer_hits": transfer_hits,
+        "squad_json": squad_json,
+        "transfers_in_json": transfers_in_json,
+        "transfers_out_json": transfers_out_json,
+        "user_chip": chip,
+        "effective_horizon": effective_horizon,
+        "budget": float(budget),
+        "objective": mip["objective"],
+        "mip_bound": mip["bound"],
+        "mip_gap": mip["gap"],
+    }
+    return response, run
+
+
+#Solution-pool counterpart of solve_request: the k best distinct squads (select_squads).
+#limits_cfg: config solver.pool.limits — time_limit is the budget for all k solves. Returns the response only;
+#alternatives[i]["delta"] = its objective minus the best squad's (<= 0).
+def solve_alternatives(session: OptimizerSession, user_input: dict, config_constraints: dict, max_horizon: int,
+                       k: int, limits_cfg: dict | None = None):
+    existing_opta_codes, locked_players, chip, _, free_transfers, _ = load_user_input(user_input)
+    effective_horizon, gw_weights, budget = _request_setup(session, user_input, config_constraints, max_horizon)
+    limits = request_limits(user_input, limits_cfg)
+
+    t0 = time.monotonic()
+    squads, complete = select_squads(
+        session.players, gw_weights, budget, chip, locked_players, existing_opta_codes, free_transfers,
+        config_constraints, k, session=session, time_budget=limits.pop("time_limit"), limits=limits,
+        excluded_players=load_excluded_players(user_input),
+    )
+    solve_time_ms = int((time.monotonic() - t0) * 1000)
+
+    found = [s for s in squads if s[4] in ("optimal", "feasible")]
+    best = found[0][6]["objective"] if found else None
+    alternatives = [
+        {
+            "rank": rank,
+            "status": status,
+            "is_optimal": status == "optimal",
+            "objective": mip["objective"],
+            "delta": mip["objective"] - best,
+            "gap": mip["gap"],
+            "transfer_hits": transfer_hits,
+            "squad": squad_json,
+            "transfers_in": transfers_in_json,
+            "transfers_out": transfers_out_json,
+        }
+        for rank, (squad_json, transfers_in_json, transfers_out_json, transfer_hits, status, _, mip)
+        in enumerate(found, start=1)
+    ]
+    if not found:
+        status, error_message = squads[0][4], squads[0][5]
+    elif not complete:
+        status, error_message = "feasible", f"time budget reached after {len(found)} of {k} squads"
+    else:
+        status = "optimal" if all(a["is_optimal"] for a in alternatives) else "feasible"
+        error_message = None
+    return {
+    "status": status,
+    "horizon": effective_horizon,
+    "solve_time_ms": solve_time_ms,
+    "error_message": error_message,
+    "k": k,
+    "alternatives": alternatives,
+    "cached": False,
+    }
+
+
+#Effective horizon (free_hit looks one gameweek ahead; never more horizons than were predicted), its
+#weights and the budget (max_budget for a new team, else bank + squad value).
+def _request_setup(session: OptimizerSession, user_input: dict, config_constraints: dict, max_horizon: int):
+    existing_opta_codes, _, chip, bank, _, horizon = load_user_input(user_input)
+    effective_horizon = min(1 if chip == "free_hit" else horizon, max_horizon)
+    gw_weights = [w for _, w in list(config_constraints["horizon_weights"].items())[:effective_horizon]]
+    budget = config_constraints["max_budget"]
+    if existing_opta_codes:
+        budget = bank + sum(session.price[session.index[c]] for c in existing_opta_codes if c in session.index)
+    return effective_horizon, gw_weights, budget
 
 #Objective: Maximize game week points.
-def select_squad(players, gw_weights, budget, user_chip, user_locked_players, user_existing_opta_codes, user_free_transfers, config_constraints):
-    total_players = config_constraints["max_players"]
-    starter_players = config_constraints["starting_players"]
-    max_players_per_team = config_constraints["max_players_per_team"]
-    position_total_limit = list(config_constraints["position_total_limit"].items())
-    position_starting_min = list(config_constraints["position_starting_min"].items())
-    set_positions = [pos for pos, _ in position_total_limit]
-    max_players_per_position = [lim for _, lim in position_total_limit]
-    min_players_per_position = [lim for _, lim in position_starting_min]
-    BENCH_COST_EPSILON = config_constraints["bench_cost_modifier"]
-
-    #PROBLEM
-    problem = pulp.LpProblem("FPL_Optimizer", pulp.LpMaximize)
-
-    #Decision Variables for pulp
-    selected = {p['opta_code']: pulp.LpVariable(f"selected_{p['opta_code']}", cat='Binary') for p in players}
-    starters = {p['opta_code']: pulp.LpVariable(f"starter_{p['opta_code']}", cat='Binary') for p in players}
-
-    #OBJECTIVE
+def select_squad(players, gw_weights, budget, user_chip, user_locked_players, user_existing_opta_codes, user_free_transfers, config_constraints, session: OptimizerSession | None = None, limits: dict | None = None, excluded_players=None, robust: dict | None = None):
+    # session: a prebuilt OptimizerSession for this player pool (main_runner keeps one per prediction set).
+    # None builds a throwaway one. Either way `players` must be the list the session was built from.
+    # limits: {"time_limit", "mip_rel_gap"}; the last value returned is {"objective", "bound", "gap"}.
+    # excluded_players: opta codes never selected ("best squad without X").
+    # robust: request_robust() settings — stochastic mode: S sampled scenarios (scenarios.py) and a sample-average
+    # or CVaR objective in one MILP (session.solve_scenarios) instead of the point estimates.
     #Horizon filtering already achieves the idea to tell the optimizer for how many horizons to think.
     #bench_boost is the only chip that changes the objective structure (all 15 score).
-    #everything else uses the same objective. maximize starters, minimize bench cost.
-    if user_chip == "bench_boost":
-        problem += pulp.lpSum(
-            selected[p['opta_code']] * pulp.lpSum(p[f'h{i+1}'] * gw_weights[i] for i in range(len(gw_weights)))
-            for p in players
-        ), "Total_Points"
-    else:
-        starter_pts = pulp.lpSum(
-            starters[p['opta_code']] * pulp.lpSum(p[f'h{i+1}'] * gw_weights[i] for i in range(len(gw_weights)))
-            for p in players)
-        bench_cost = pulp.lpSum(
-            (selected[p['opta_code']] - starters[p['opta_code']]) * p['price'] for p in players)
-        #hit penalty
-        #wildcard and free_hit chips are exempt
-        transfer_penalty = 0
-        if user_existing_opta_codes and user_chip not in ("wildcard", "free_hit"):
-            existing_set = set(user_existing_opta_codes)
-            extra_transfers = pulp.LpVariable("extra_transfers", lowBound=0, cat='Continuous')
-            transfers_made = pulp.lpSum(
-                selected[p['opta_code']] for p in players if p['opta_code'] not in existing_set
-            )
-            problem += extra_transfers >= transfers_made - user_free_transfers, "Extra_Transfers_Lower_Bound"
-            transfer_penalty = 4 * extra_transfers
-        problem += starter_pts - BENCH_COST_EPSILON * bench_cost - transfer_penalty, "Total_Points"
-
-    #CONSTRAINTS
-    #Budget constraint
-    problem += pulp.lpSum(selected[p['opta_code']] * p['price'] for p in players) <= budget, "Budget_Constraint"
-
-    #Players constraints
-    problem += pulp.lpSum(selected[p['opta_code']] for p in players) == total_players, "Total_Players_Constraint"
-
-    if user_chip == "bench_boost": #TODO: at the moment as it is now, it thinks all players play for the whatever horizon is set. can i make it think about that only for h1 ? will that even matter ?
-        #i might have at least a small idea, we can designate starters to an optimum team only for h2, h3 within bench boost team. so maximize starter points within a team. that way the lowest with expected points in h2 and h3 are benched.
-        #THIS COULD WORK TRY LATER
-        #all 15 starters
-        for p in players:
-            problem += starters[p['opta_code']] == selected[p['opta_code']], f"BenchBoost_AllPlay_{p['opta_code']}"
+    #everything else uses the same objective. maximize starters, minimize bench cost. hits cost 4 unless wildcard/free_hit.
+    if session is None:
+        session = OptimizerSession(players, config_constraints)
+
+    if robust is None:
+        result = session.solve(
+            gw_weights, budget, user_chip, user_locked_players, user_existing_opta_codes, user_free_transfers, limits,
+            excluded_players,
+        )
     else:
-        #11 starters, and each starter must be one of the selected 15
-        problem += pulp.lpSum(starters[p['opta_code']] for p in players) == starter_players, "Starter_Players_Constraint"
-        for p in players:
-            problem += starters[p['opta_code']] <= selected[p['opta_code']], f"Starter_In_Selected_{p['opta_code']}"
-
-    #Max players per team
-    teams = set(p['team'] for p in players)
-    for team in teams:
-        problem += pulp.lpSum(selected[p['opta_code']] for p in players if p['team'] == team) <= max_players_per_team, f"Max_Players_{team}"
-
-    #Position constraints
-    positions = set(p['position'] for p in players)
-    for position in positions:
-        idx = set_positions.index(position)
-        problem += pulp.lpSum(selected[p['opta_code']] for p in players if p['position'] == position) >= min_players_per_position[idx], f"Min_{position}_Selected_Constraint"
-        problem += pulp.lpSum(selected[p['opta_code']] for p in players if p['position'] == position) <= max_players_per_position[idx], f"Max_{position}_Selected_Constraint"
-        # Starters must also satisfy minimum position counts
-        problem += pulp.lpSum(starters[p['opta_code']] for p in players if p['position'] == position) >= min_players_per_position[idx], f"Min_{position}_Starter_Constraint"
-
-    #Existing team constraints
-    #Locked players must be selected
-    for opta_code in user_locked_players:
-        if opta_code in selected:
-            problem += selected[opta_code] == 1, f"Locked_{opta_code}"
-    # When the user has an existing team and is not on wildcard or free_hit,
-    # the transfer penalty discourages unnecessary changes.
-    # No hard constraint, penalty should work
-
-    #Solve the problem & logging
-    try:
-        problem.solve()
-        status = pulp.LpStatus[problem.status].lower()
-        error_message = None
-    except Exception as e:
-        status = "error"
-        error_message = str(e)
-        return None, None, None, None, status, error_message
+        mean, variance = weighted_moments(session.points, session.std, gw_weights, robust["outcome_variance_ratio"])
+        draws = sample_scenarios(mean, variance, session.team_of, robust["scenarios"], robust["club_correlation"],
+                                 robust["seed"])
+        result = session.solve_scenarios(
+            gw_weights, budget, user_chip, user_locked_players, user_existing_opta_codes, user_free_transfers, draws,
+            robust["objective"], robust["alpha"], robust["risk_weight"], robust["candidates_per_position"],
+            robust["cheapest_per_position"], limits, excluded_players,
+        )
+    return _package_result(session, result, gw_weights, user_existing_opta_codes, user_free_transfers)
 
-    if status != "optimal":
-        return None, None, None, None, status, error_message
 
-    #preparing squad
-    squad = [p for p in players if pulp.value(selected[p['opta_code']]) == 1]
+#Solution-pool mode of select_squad: the k best distinct squads, best first, from no-good
+#cuts on the session's in-memory model (session.solve_pool). time_budget: seconds for all k solves.
+#Returns ([select_squad tuple per squad], complete) — complete False when the time budget cut it short.
+def select_squads(players, gw_weights, budget, user_chip, user_locked_players, user_existing_opta_codes, user_free_transfers, config_constraints, k, session: OptimizerSession | None = None, time_budget: float | None = None, limits: dict | None = None, excluded_players=None):
+    if session is None:
+        session = OptimizerSession(players, config_constraints)
+    results, complete = session.solve_pool(
+        gw_weights, budget, user_chip, user_locked_players, user_existing_opta_codes, user_free_transfers, k,
+        time_budget, limits, excluded_players,
+    )
+    return [
+        _package_result(session, result, gw_weights, user_existing_opta_codes, user_free_transfers)
+        for result in results
+    ], complete
 
-    #appending is_starter key to the players.
-    for p in squad:
-        p["starter"] = bool(starters[p["opta_code"]].value())
+
+#One session result -> select_squad's tuple (squad, transfers in/out, hits, status, error, mip).
+def _package_result(session: OptimizerSession, result: dict, gw_weights, user_existing_opta_codes, user_free_transfers):
+    players = session.players
+    status = result["status"]
+    error_message = result["error_message"]
+    mip = {"objective": result["objective"], "bound": result["bound"], "gap": result["gap"]}
+    mip.update({k: result[k] for k in ("scenario_mean", "scenario_cvar") if k in result})
+    if status not in ("optimal", "feasible"):
+        return None, None, None, None, status, error_message, mip
+
+    #preparing squad — copies, the session's player records are shared across requests
+    starter_idx = set(result["starters"])
+    squad = [{**players[i], "starter": i in starter_idx} for i in result["selected"]]
 
     #captain logic #no need to recalculate points here right ?
     #triple captain only makes captain points x3. captain still stays the same. no additional logic
@@ -123,6 +235,7 @@ def select_squad(players, gw_weights, budget, user_chip, user_locked_players, us
     captain["captain"] = True
 
     #preparing transfers out, in
+    user_existing_opta_codes = user_existing_opta_codes or set()
     selected_codes = {p["opta_code"] for p in squad}
     transfers_in = [p for p in squad if p["opta_code"] not in user_existing_opta_codes]
     transfers_out_codes = [code for code in user_existing_opta_codes if code not in selected_codes]
@@ -139,7 +252,7 @@ def select_squad(players, gw_weights, budget, user_chip, user_locked_players, us
         transfers_in_json = None
         transfers_out_json = None
 
-    return squad_json, transfers_in_json, transfers_out_json, transfer_hits, status, error_message
+    return squad_json, transfers_in_json, transfers_out_json, transfer_hits, status, error_message, mip
 
 
 #Output response shape: list of dictionaries
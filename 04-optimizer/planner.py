@@ -0,0 +1,274 @@
+# Multi-gameweek transfer planner — one squad per gameweek, transfers between them, rolling free transfers
+# Version: 1.1.1
+#
+# select_squad() picks one squad for the whole horizon and charges hits once. The planner gives every
+# gameweek t = 0..T-1 its own squad, starters and captain and links consecutive squads by transfers:
+#
+# Columns (M players per block, see session.dominated_mask):
+#   selected[t] | starter[t] | captain[t] | buy[t] | sell[t]   (binary, T blocks of M each)
+#   hits[t]     (integer >= 0)   paid transfers in gameweek t
+#   free[t]     (integer)        free transfers available in gameweek t
+# Rows per gameweek:
+#   budget, 15 selected, 11 starters, 1 captain, starter <= selected, captain <= starter,
+#   per team, per position selected min..max, per position starters min,
+#   selected[t] - selected[t-1] - buy[t] + sell[t] = 0        (t = 0: right-hand side = owned)
+#   sum(buy[t]) - free[t] - hits[t] <= 0
+#   free[t+1] <= free[t] - sum(buy[t]) + hits[t] + 1           (unused transfers roll over...)
+#   1 <= free[t+1] <= planner.max_banked_free_transfers         (...up to the bank limit)
+# Objective: sum_t weight_t * (points of starters + captain again - bench_cost * bench price) - HIT_COST * hits
+#
+# A new team (no existing squad) picks gameweek 0 freely and has 1 free transfer in gameweek 1.
+# Chips are not planned. Prices are held constant over the horizon.
+#
+# Latency: players are pruned with the multi-period dominance threshold, the single-squad solution
+# (session.solve, milliseconds) is passed to HiGHS as a starting incumbent (hold that squad, captain the
+# best starter each week), and planner.limits (or the request's limits) sets time_limit / mip_rel_gap.
+
+import highspy
+import numpy as np
+
+from optimizer import package_transfers
+from session import HIT_COST, INF, OptimizerSession, apply_limits, run_status
+
+BLOCKS = ("selected", "starter", "captain", "buy", "sell")
+DEFAULT_MAX_BANKED = 5
+
+
+class _Layout:
+    # Column indices of the planner model: m players x T gameweeks
+    def __init__(self, m: int, periods: int):
+        self.m, self.periods = m, periods
+        self.n_cols = len(BLOCKS) * periods * m + 2 * periods
+
+    def block(self, name: str, t: int):
+        first = (BLOCKS.index(name) * self.periods + t) * self.m
+        return np.arange(first, first + self.m)
+
+    def hits(self, t: int):
+        return len(BLOCKS) * self.periods * self.m + t
+
+    def free(self, t: int):
+        return len(BLOCKS) * self.periods * self.m + self.periods + t
+
+
+def plan_transfers(
+    session: OptimizerSession,
+    gw_weights: list[float],
+    budget: float,
+    locked_players,
+    existing_opta_codes,
+    free_transfers: int,
+    planner_cfg: dict | None = None,
+    limits: dict | None = None,
+):
+    # Returns {"status", "error_message", "gameweeks": [...], "objective", "bound", "warm_start_objective", "mip_gap"}.
+    # status "feasible": best plan found within limits["time_limit"] (gameweeks filled, gap reported).
+    # gw_weights: one weight per planned gameweek (its length is the horizon).
+    planner_cfg = planner_cfg or {}
+    cfg = session.config_constraints
+    periods = len(gw_weights)
+    max_banked = planner_cfg.get("max_banked_free_transfers", DEFAULT_MAX_BANKED)
+
+    owned = sorted(session.index[c] for c in (existing_opta_codes or []) if c in session.index)
+    locked = sorted(session.index[c] for c in (locked_players or []) if c in session.index)
+    new_team = not owned
+
+    cols = np.union1d(np.flatnonzero(~session.dominated_mask(periods)), owned + locked).astype(np.int64)
+    m = len(cols)
+    column = {int(i): k for k, i in enumerate(cols)}
+    layout = _Layout(m, periods)
+    price = session.price[cols]
+    points = session.points[cols, :periods]
+    team_of = session.team_of[cols]
+    position_of = {position: np.flatnonzero(np.isin(cols, members)) for position, members in session.positions.items()}
+
+    # Bounds and integrality
+    lower = np.zeros(layout.n_cols)
+    upper = np.ones(layout.n_cols)
+    integrality = [highspy.HighsVarType.kInteger] * layout.n_cols
+    # A player without a prediction for gameweek t can't be picked that week unless already owned
+    unpredicted = ~session.predicted[cols, :periods]
+    unpredicted[[column[i] for i in owned]] = False
+    for t in range(periods):
+        lower[layout.block("selected", t)[[column[i] for i in locked]]] = 1.0
+        upper[layout.block("selected", t)[unpredicted[:, t]]] = 0.0
+        upper[layout.hits(t)] = INF
+        lower[layout.free(t)], upper[layout.free(t)] = 1.0, max_banked
+    if new_team:
+        # gameweek 0 is the initial pick: no transfers, no hits; one free transfer the week after
+        upper[layout.block("buy", 0)] = 0.0
+        upper[layout.block("sell", 0)] = 0.0
+        upper[layout.hits(0)] = 0.0
+        lower[layout.free(0)] = upper[layout.free(0)] = 0.0
+        if periods > 1:
+            upper[layout.free(1)] = 1.0
+    else:
+        lower[layout.free(0)] = upper[layout.free(0)] = min(free_transfers, max_banked)
+
+    # Objective
+    cost = np.zeros(layout.n_cols)
+    bench = session.bench_cost * price
+    for t, w in enumerate(gw_weights):
+        cost[layout.block("selected", t)] = -w * bench
+        cost[layout.block("starter", t)] = w * (points[:, t] + bench)
+        cost[layout.block("captain", t)] = w * points[:, t]
+        cost[layout.hits(t)] = -HIT_COST
+
+    # Rows
+    owned_mask = np.zeros(m)
+    owned_mask[[column[i] for i in owned]] = 1.0
+    total_limit = cfg["position_total_limit"]
+    starting_min = cfg["position_starting_min"]
+    ones = np.ones(m)
+    rows = []  # (lower, upper, [cols], [values])
+    for t in range(periods):
+        sel, start, capt = layout.block("selected", t), layout.block("starter", t), layout.block("captain", t)
+        buy, sell = layout.block("buy", t), layout.block("sell", t)
+        rows.append((-INF, float(budget), sel, price))
+        rows.append((session.total_players, session.total_players, sel, ones))
+        rows.append((session.starting_players, session.starting_players, start, ones))
+        rows.append((1.0, 1.0, capt, ones))
+        for k in range(m):
+            rows.append((-INF, 0.0, [start[k], sel[k]], [1.0, -1.0]))
+            rows.append((-INF, 0.0, [capt[k], start[k]], [1.0, -1.0]))
+        for team in np.unique(team_of):
+            members = np.flatnonzero(team_of == team)
+            rows.append((-INF, cfg["max_players_per_team"], sel[members], np.ones(len(members))))
+        for position, members in position_of.items():
+            rows.append((starting_min[position], total_limit[position], sel[members], np.ones(len(members))))
+            rows.append((starting_min[position], INF, start[members], np.ones(len(members))))
+        if t == 0 and new_team:
+            continue
+        # squad flow
+        for k in range(m):
+            if t == 0:
+                rows.append((owned_mask[k], owned_mask[k], [sel[k], buy[k], sell[k]], [1.0, -1.0, 1.0]))
+            else:
+                previous = layout.block("selected", t - 1)[k]
+                rows.append((0.0, 0.0, [sel[k], previous, buy[k], sell[k]], [1.0, -1.0, -1.0, 1.0]))
+        # hits and free-transfer banking
+        rows.append((-INF, 0.0, np.append(buy, [layout.free(t), layout.hits(t)]), np.append(ones, [-1.0, -1.0])))
+        if t + 1 < periods:
+            rows.append((
+                -INF, 1.0,
+                np.append(buy, [layout.free(t + 1), layout.free(t), layout.hits(t)]),
+                np.append(ones, [1.0, -1.0, -1.0]),
+            ))
+
+    lp = highspy.HighsLp()
+    lp.num_col_ = layout.n_cols
+    lp.num_row_ = len(rows)
+    lp.sense_ = highspy.ObjSense.kMaximize
+    lp.col_cost_ = cost
+    lp.col_lower_ = lower
+    lp.col_upper_ = upper
+    lp.integrality_ = integrality
+    lp.row_lower_ = np.array([r[0] for r in rows], dtype=np.float64)
+    lp.row_upper_ = np.array([r[1] for r in rows], dtype=np.float64)
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+    lp.a_matrix_.num_col_ = lp.num_col_
+    lp.a_matrix_.num_row_ = lp.num_row_
+    lp.a_matrix_.start_ = np.cumsum([0] + [len(r[2]) for r in rows]).astype(np.int32)
+    lp.a_matrix_.index_ = np.concatenate([np.asarray(r[2], dtype=np.int32) for r in rows])
+    lp.a_matrix_.value_ = np.concatenate([np.asarray(r[3], dtype=np.float64) for r in rows])
+
+    h = highspy.Highs()
+    h.setOptionValue("output_flag", False)
+    h.passModel(lp)
+    for name, value in {**session.solver_options, **planner_cfg.get("options", {})}.items():
+        h.setOptionValue(name, value)
+    apply_limits(h, limits)
+
+    # Warm start: the single-squad optimum, held for every gameweek
+    warm_start_objective = None
+    single = session.solve(gw_weights, budget, None, locked_players, existing_opta_codes, free_transfers)
+    if single["status"] == "optimal" and all(i in column for i in single["selected"]):
+        start_values = _warm_start(layout, column, single, points, owned_mask, new_team, free_transfers, max_banked)
+        warm_start_objective = float(cost @ start_values)
+        solution = highspy.HighsSolution()
+        solution.col_value = start_values.tolist()
+        solution.value_valid = True
+        h.setSolution(solution)
+
+    status, error_message, info = run_status(h)
+    if info is None:
+        return {"status": status, "error_message": error_message, "gameweeks": [], "objective": None,
+                "bound": None, "warm_start_objective": warm_start_objective, "mip_gap": None}
+    values = np.asarray(h.getSolution().col_value)
+    return {
+        "status": status,
+        "error_message": error_message,
+        "gameweeks": _package_plan(session, layout, cols, values, owned, new_team),
+        "objective": info["objective"],
+        "bound": info["bound"],
+        "warm_start_objective": warm_start_objective,
+        "mip_gap": info["gap"],
+    }
+
+
+def _warm_start(layout: _Layout, column: dict, single: dict, points, owned_mask, new_team: bool, free: int, max_banked: int):
+    # Column values for "keep the single-squad solution every week" — feasible by construction.
+    values = np.zeros(layout.n_cols)
+    selected = np.zeros(layout.m)
+    selected[[column[i] for i in single["selected"]]] = 1.0
+    starters = [column[i] for i in single["starters"]]
+    for t in range(layout.periods):
+        values[layout.block("selected", t)] = selected
+        values[layout.block("starter", t)[starters]] = 1.0
+        values[layout.block("captain", t)[max(starters, key=lambda k: points[k, t])]] = 1.0
+    if new_team:
+        free_t = 1
+    else:
+        bought = int(((selected == 1) & (owned_mask == 0)).sum())
+        values[layout.block("buy", 0)] = (selected == 1) & (owned_mask == 0)
+        values[layout.block("sell", 0)] = (selected == 0) & (owned_mask == 1)
+        free_t = min(free, max_banked)
+        values[layout.free(0)] = free_t
+        values[layout.hits(0)] = max(0, bought - free_t)
+        free_t = min(max_banked, max(free_t - bought, 0) + 1)
+    for t in range(1, layout.periods):
+        values[layout.free(t)] = free_t
+        free_t = min(max_banked, free_t + 1)
+    return values
+
+
+def _package_plan(session: OptimizerSession, layout: _Layout, cols, values, owned: list[int], new_team: bool):
+    # One entry per gameweek: squad (starters/captain, that week's points), transfers and free-transfer state
+    players = session.players
+    base_gw = int(players[0]["predicted_gameweek_id"])
+    previous = set(owned)
+    gameweeks = []
+    for t in range(layout.periods):
+        selected = cols[values[layout.block("selected", t)] > 0.5].tolist()
+        starters = set(cols[values[layout.block("starter", t)] > 0.5].tolist())
+        captain = cols[values[layout.block("captain", t)] > 0.5].tolist()
+        transfers_in = [] if t == 0 and new_team else [i for i in selected if i not in previous]
+        transfers_out = [] if t == 0 and new_team else [i for i in previous if i not in set(selected)]
+        hits = int(round(values[layout.hits(t)]))
+        expected_pts = float(sum(session.points[i, t] for i in starters) + sum(session.points[i, t] for i in captain))
+        gameweeks.append({
+            "gw": base_gw + t,
+            "free_transfers": None if t == 0 and new_team else int(round(values[layout.free(t)])),
+            "transfers": len(transfers_in),
+            "hits": hits,
+            "expected_pts": round(expected_pts, 2),
+            "expected_pts_after_hits": round(expected_pts - HIT_COST * hits, 2),
+            "squad": [
+                {
+                    "opta_code": players[i]["opta_code"],
+                    "name": players[i]["web_name"],
+                    "club": players[i]["team"],
+                    "position": players[i]["position"],
+                    "price": players[i]["price"],
+                    "is_starter": i in starters,
+                    "is_captain": i in captain,
+                    "pts": round(float(session.points[i, t]), 2),
+                }
+                for i in selected
+            ],
+            "transfers_in": package_transfers([players[i] for i in transfers_in]),
+            "transfers_out": package_transfers([players[i] for i in transfers_out]),
+        })
+        previous = set(selected)
+    return gameweeks
+
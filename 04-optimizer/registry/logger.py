@@ -1,7 +1,6 @@
 # Saving results and run details in optimizer schema
-# Version: 1.1.0
+# Version: 1.5.0
 import sys
-import yaml
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
@@ -13,6 +12,7 @@ from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from db.engine import engine
 from db.schema import optimizer_runs, optimizer_run_logs
+from load_config import load_config
     
 def save_log(
     *,
@@ -31,35 +31,73 @@ def save_log(
     user_chip: str | None = None,
     effective_horizon: int | None = None,
     budget: float | None = None,
+    # solver outcome: incumbent objective, proven bound, relative gap (None when no squad was found)
+    objective: float | None = None,
+    mip_bound: float | None = None,
+    mip_gap: float | None = None,
+    # log row only: a cached result (its run was saved when solved) or a transfer plan (no optimizer_runs shape)
+    log_only: bool = False,
 ):
-    run_id = uuid.uuid4()
-    run_at = datetime.now(timezone.utc)
-    
-    with open(Path(__file__).parent.parent / "config.yaml") as f:
-        config_snapshot = yaml.safe_load(f)
+    save_logs_bulk([{
+        "status": status,
+        "solve_time_ms": solve_time_ms,
+        "input_params": input_params,
+        "error_message": error_message,
+        "db_input": db_input,
+        "transfer_hits": transfer_hits,
+        "squad_json": squad_json,
+        "transfers_in_json": transfers_in_json,
+        "transfers_out_json": transfers_out_json,
+        "triggered_by": triggered_by,
+        "user_chip": user_chip,
+        "effective_horizon": effective_horizon,
+        "budget": budget,
+        "objective": objective,
+        "mip_bound": mip_bound,
+        "mip_gap": mip_gap,
+        "log_only": log_only,
+    }])
+
 
-    row = [
-        {
+def save_logs_bulk(entries: list[dict]):
+    # Many save_log() calls (same keyword fields per entry) in one transaction: one multi-row insert per table.
+    if not entries:
+        return
+    config_snapshot = load_config()
+    log_rows, run_rows = [], []
+    for entry in entries:
+        run_id = uuid.uuid4()
+        run_at = datetime.now(timezone.utc)
+        log_rows.append({
             "run_id": run_id,
             "run_at": run_at,
-            "status": status,
-            "solve_time_ms": solve_time_ms,
-            "input_params": input_params,
+            "status": entry["status"],
+            "solve_time_ms": entry["solve_time_ms"],
+            "input_params": entry["input_params"],
             "config_snapshot": config_snapshot,
-            "error_message": error_message,
-            
-        }
-    ]
-    #check this on both
-    stmt = pg_insert(optimizer_run_logs).values(row)
-    
+            "error_message": entry.get("error_message"),
+            "objective": entry.get("objective"),
+            "mip_bound": entry.get("mip_bound"),
+            "mip_gap": entry.get("mip_gap"),
+        })
+        # a time-limited ("feasible") squad is still a squad the user received
+        if entry["status"] in ("optimal", "feasible") and not entry.get("log_only"):
+            run_rows.append(_run_row(
+                run_id, run_at, entry["db_input"], entry["input_params"], entry["transfer_hits"],
+                entry["squad_json"], entry["transfers_in_json"], entry["transfers_out_json"],
+                entry["triggered_by"], entry["user_chip"], entry["effective_horizon"], entry["budget"],
+            ))
+
     with engine.begin() as conn:
-        conn.execute(stmt)
-    
-    if status == "optimal":
-        _save_run(run_id, run_at, db_input, input_params, transfer_hits, squad_json, transfers_in_json, transfers_out_json, triggered_by, user_chip, effective_horizon, budget)
+        conn.execute(pg_insert(optimizer_run_logs).values(log_rows))
+        if run_rows:
+            stmt = pg_insert(optimizer_runs).values(run_rows)
+            stmt = stmt.on_conflict_do_nothing(
+                constraint="uq_optimizer_runs_run_id",
+            )
+            conn.execute(stmt)
 
-def _save_run(
+def _run_row(
     run_id: uuid.UUID,
     run_at: datetime,
     db_input: pd.DataFrame,
@@ -88,33 +126,21 @@ def _save_run(
     if user_chip in ("free_hit", "wildcard"):
         transfer_hits = 0
 
-
-    row = [
-        {
-            "run_id": run_id,
-            "run_at": run_at,
-            "gameweek_id": int(db_input["predicted_gameweek_id"].min() - 1),
-            "season_id": int(db_input["season_id"].iloc[0]),
-            "horizon": effective_horizon,
-            "chip": user_chip,
-            "free_transfers": input_params["free_transfers"],
-            "transfer_hits": transfer_hits,
-            "expected_pts": expected_pts,
-            "expected_pts_after_hits": expected_pts - (transfer_hits * 4),
-            "budget_used": budget_used,
-            "budget_remaining": budget - budget_used,
-            "squad": squad_json,
-            "transfers_in": transfers_in_json,
-            "transfers_out": transfers_out_json,
-            "triggered_by": triggered_by,
-        }
-    ]
-
-    stmt = pg_insert(optimizer_runs).values(row)
-    stmt = stmt.on_conflict_do_nothing(
-        constraint="uq_optimizer_runs_run_id",
-    )
-
-    with engine.begin() as conn:
-        conn.execute(stmt)
-
+    return {
+        "run_id": run_id,
+        "run_at": run_at,
+        "gameweek_id": int(db_input["predicted_gameweek_id"].min() - 1),
+        "season_id": int(db_input["season_id"].iloc[0]),
+        "horizon": effective_horizon,
+        "chip": user_chip,
+        "free_transfers": input_params["free_transfers"],
+        "transfer_hits": transfer_hits,
+        "expected_pts": expected_pts,
+        "expected_pts_after_hits": expected_pts - (transfer_hits * 4),
+        "budget_used": budget_used,
+        "budget_remaining": budget - budget_used,
+        "squad": squad_json,
+        "transfers_in": transfers_in_json,
+        "transfers_out": transfers_out_json,
+        "triggered_by": triggered_by,
+    }
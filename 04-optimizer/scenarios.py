@@ -0,0 +1,58 @@
+# Sampled point outcomes for robust squad selection (session.solve_scenarios)
+# Version: 1.0.0
+#
+# One scenario = every player's horizon-weighted points for the request, drawn jointly:
+#   mean_i = sum_h w_h * points_ih
+#   var_i  = sum_h w_h^2 * (predicted_std_ih^2 + outcome_variance_ratio * points_ih)
+# predicted_std (03-ml forests, s1..sN in the player records; 0 where missing) is the model's own
+# uncertainty; outcome_variance_ratio * points adds the match-to-match noise (Poisson-like, variance ~ mean).
+# Draws are log-normal with that mean and variance — never negative, right-skewed like hauls — from a
+# Gaussian copula with a shared club factor: z_is = sqrt(rho) * c_club(i),s + sqrt(1 - rho) * e_is, so
+# teammates (same attack, same clean sheet) move together. rho = club_correlation.
+# All S x N draws are one NumPy batch; a fixed seed makes a request's scenarios (and squad) reproducible.
+
+import numpy as np
+
+DEFAULT_SCENARIOS = 200
+DEFAULT_CLUB_CORRELATION = 0.3
+DEFAULT_OUTCOME_VARIANCE_RATIO = 1.0
+
+
+def weighted_moments(points: np.ndarray, std: np.ndarray, gw_weights: list[float], outcome_variance_ratio: float):
+    # points, std: (N, horizons) — std NaN = unknown (0). Returns (mean, variance) over the first
+    # len(gw_weights) horizons, each (N,).
+    w = np.asarray(gw_weights, dtype=np.float64)
+    h = len(w)
+    pts = np.clip(points[:, :h], 0.0, None)
+    spread = np.nan_to_num(std[:, :h])
+    mean = pts @ w
+    variance = (spread ** 2 + outcome_variance_ratio * pts) @ (w ** 2)
+    return mean, variance
+
+
+def sample_scenarios(
+    mean: np.ndarray,
+    variance: np.ndarray,
+    team_of: np.ndarray,
+    n_scenarios: int = DEFAULT_SCENARIOS,
+    club_correlation: float = DEFAULT_CLUB_CORRELATION,
+    seed: int | None = 0,
+):
+    # Returns (S, N) scenario points. Players with no expected points score 0 in every scenario.
+    rng = np.random.default_rng(seed)
+    n_clubs = int(team_of.max()) + 1 if len(team_of) else 0
+    club = rng.standard_normal((n_scenarios, n_clubs))
+    own = rng.standard_normal((n_scenarios, len(mean)))
+    z = np.sqrt(club_correlation) * club[:, team_of] + np.sqrt(1.0 - club_correlation) * own
+
+    positive = mean > 0
+    safe_mean = np.where(positive, mean, 1.0)
+    sigma2 = np.log1p(variance / safe_mean ** 2)
+    mu = np.log(safe_mean) - sigma2 / 2
+    return np.where(positive, np.exp(mu + np.sqrt(sigma2) * z), 0.0)
+
+
+def cvar(totals: np.ndarray, alpha: float):
+    # Mean of the worst ceil(alpha * S) scenario totals (lower tail — the squad's bad weeks).
+    k = max(1, int(np.ceil(alpha * len(totals))))
+    return float(np.sort(totals)[:k].mean())
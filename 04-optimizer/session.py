@@ -0,0 +1,630 @@
+# Prebuilt squad-selection MILP (HiGHS, in-process)
+# Version: 1.6.3
+#
+# The constraint structure only depends on the player pool (one prediction set), so it is built once
+# per pool from precomputed position/team index groups. A request only changes:
+#   - objective coefficients (horizon weights, chip)
+#   - budget and starter-count right-hand sides
+#   - lock bounds on selected_i
+#   - the transfer row's coefficients (which players are already owned) and its RHS
+# and the solver is called through highspy — no LP file, no CBC subprocess.
+#
+# Columns: selected_0..M-1 | starter_0..M-1 | extra_transfers   (M = model players, see pruning below)
+# Rows:    budget | total players | starters | starter_i <= selected_i (M) | per team (T)
+#          | per position selected min..max (P) | per position starters min (P) | transfers
+#
+# A HiGHS model is mutated per request, so each concurrent solve() takes its own from a free list (built on
+# demand, kept for reuse); a server keeps one session per pool. highspy releases the GIL while solving, so
+# threads solving on one session run in parallel (chip comparison, API worker threads).
+# Every solve runs under limits (time_limit seconds, mip_rel_gap) and reports the incumbent objective,
+# the proven bound and the gap. Stopped early with a squad in hand = "feasible", without = "time_limit".
+# HiGHS sizes its thread pool once per process, so threads is a process setting (solver.options.threads),
+# not a per-request one.
+#
+# Dominance pruning: player j is dominated by i (same position) if i is no more expensive and predicted
+# at least as well on every horizon (ties broken by index, so the relation is a strict order). Horizon
+# weights are non-negative, so this holds for every request's objective. If j is in a squad, some
+# dominator can replace it — same position, <= price, >= points as starter, <= bench cost, and never
+# more transfers — as long as one is unselected and its club is not full. At most (position limit - 1)
+# dominators are already in the squad, and at most floor((max_players - 1) / max_per_team) clubs are
+# full without j, so j is safe to drop once it has more dominators from distinct clubs than that.
+# Replacements only move up the order, so repeating the swap ends in an optimal squad without pruned
+# players.
+# Multi-period plans (planner.py) replace j in every gameweek it is held, so a dominator must be free in
+# all of them: the threshold is multiplied by the number of periods (dominated_mask(periods)).
+# The shared model only has columns for the kept players. Owned and locked players are never pruned
+# (they change transfers/feasibility): a request that owns or locks a dominated player gets a
+# throwaway model of kept + those players (built in milliseconds).
+
+import threading
+import time
+
+import highspy
+import numpy as np
+
+from scenarios import cvar
+
+HIT_COST = 4
+INF = highspy.kHighsInf
+
+# HiGHS model status -> optimizer_run_logs.status
+STATUS_NAMES = {
+    highspy.HighsModelStatus.kOptimal: "optimal",
+    highspy.HighsModelStatus.kInfeasible: "infeasible",
+    highspy.HighsModelStatus.kUnbounded: "unbounded",
+    highspy.HighsModelStatus.kUnboundedOrInfeasible: "infeasible",
+}
+# Stopped before proving optimality: "feasible" with an incumbent, "time_limit" without one
+STOPPED_EARLY = {
+    highspy.HighsModelStatus.kTimeLimit,
+    highspy.HighsModelStatus.kIterationLimit,
+    highspy.HighsModelStatus.kSolutionLimit,
+    highspy.HighsModelStatus.kInterrupt,
+    highspy.HighsModelStatus.kHighsInterrupt,
+}
+# Per-request limits and their HiGHS defaults (no limit, 0.01% gap)
+DEFAULT_LIMITS = {"time_limit": INF, "mip_rel_gap": 1e-4}
+
+
+def apply_limits(highs, limits: dict | None):
+    # Sets every limit on every request — a shared model must not keep the previous request's.
+    for name, default in DEFAULT_LIMITS.items():
+        value = (limits or {}).get(name)
+        highs.setOptionValue(name, float(default if value is None else value))
+
+
+def run_status(highs):
+    # Runs the model. Returns (status, error_message, info): info = {"objective", "bound", "gap"} when a
+    # squad was found (status "optimal" or "feasible"), else None.
+    try:
+        highs.run()
+        model_status = highs.getModelStatus()
+    except Exception as e:
+        return "error", str(e), None
+    info = highs.getInfo()
+    has_incumbent = info.primal_solution_status == highspy.SolutionStatus.kSolutionStatusFeasible
+    status = STATUS_NAMES.get(model_status)
+    if model_status in STOPPED_EARLY:
+        status = "feasible" if has_incumbent else "time_limit"
+    if status not in ("optimal", "feasible"):
+        message = None if status else highs.modelStatusToString(model_status)
+        if status == "time_limit":
+            message = "no squad found within the time limit"
+        return status or "error", message, None
+    # no bound yet (stopped before the root LP finished) = inf / nan; None keeps the response valid JSON
+    bound = info.mip_dual_bound if np.isfinite(info.mip_dual_bound) else None
+    gap = info.mip_gap if np.isfinite(info.mip_gap) else None
+    message = None
+    if status == "feasible":
+        message = f"stopped early ({highs.modelStatusToString(model_status)}), " + (
+            f"gap {gap:.2%}" if gap is not None else "gap unknown"
+        )
+    return status, message, {"objective": info.objective_function_value, "bound": bound, "gap": gap}
+
+
+def dominated_players(
+    points: np.ndarray, price: np.ndarray, positions: dict, team_of: np.ndarray, cfg: dict, periods: int = 1
+):
+    # Bool mask over players: True = provably never needed in an optimal squad (see header).
+    # points: (N, horizons), price: (N,), positions: {position: [i...]}, team_of: (N,) club index.
+    # periods: gameweeks with their own squad (1 = single squad).
+    full_clubs = (cfg["max_players"] - 1) // cfg["max_players_per_team"]
+    n_clubs = int(team_of.max()) + 1 if len(team_of) else 0
+    dominated = np.zeros(len(price), dtype=bool)
+    for position, members in positions.items():
+        m = np.asarray(members)
+        pts, cost = points[m], price[m]
+        # dom[a, b]: a dominates b
+        dom = (cost[:, None] <= cost[None, :]) & (pts[:, None, :] >= pts[None, :, :]).all(axis=2)
+        strict = (cost[:, None] < cost[None, :]) | (pts[:, None, :] > pts[None, :, :]).any(axis=2)
+        dom &= strict | (np.arange(len(m))[:, None] < np.arange(len(m))[None, :])
+        np.fill_diagonal(dom, False)
+        clubs = np.zeros((len(m), n_clubs))
+        clubs[np.arange(len(m)), team_of[m]] = 1.0
+        distinct_clubs = ((dom.T.astype(np.float64) @ clubs) > 0).sum(axis=1)
+        dominated[m] = distinct_clubs > periods * ((cfg["position_total_limit"][position] - 1) + full_clubs)
+    return dominated
+
+
+class _Model:
+    # One HiGHS model over a subset of players (`cols`: player index of column k) and its request state.
+    def __init__(self, highs, cols: np.ndarray, row_transfers: int):
+        self.highs = highs
+        self.cols = cols
+        self.m = len(cols)
+        self.column = {int(i): k for k, i in enumerate(cols)}
+        self.row_budget, self.row_starters, self.row_transfers = 0, 2, row_transfers
+        self.locked: list[int] = []   # columns
+        self.owned: list[int] = []    # columns
+        self.excluded: list[int] = [] # columns
+        self.kind: str | None = None  # OptimizerSession free list it belongs to (None = throwaway)
+
+
+class OptimizerSession:
+    def __init__(
+        self,
+        players: list[dict],
+        config_constraints: dict,
+        solver_options: dict | None = None,
+        prune_dominated: bool = True,
+    ):
+        # players: preprocess_data() records — opta_code, team, position, price, h1..hN (all horizons).
+        # solver_options: HiGHS options (config.yaml solver.options), applied once.
+        # prune_dominated: leave dominated players out of the model (config.yaml solver.prune_dominated).
+        self.players = players
+        self.n = len(players)
+        self.index = {p["opta_code"]: i for i, p in enumerate(players)}
+        self.price = np.array([p["price"] for p in players], dtype=np.float64)
+        # (N, horizons) points matrix; a request uses its first len(gw_weights) columns. Missing = 0 points,
+        # but a player missing any of a request's horizons can't be picked for it (unpredicted_mask)
+        # unless already in the squad.
+        n_horizons = sum(1 for k in players[0] if k[:1] == "h" and k[1:].isdigit()) if players else 0
+        raw = np.array(
+            [[p.get(f"h{h + 1}", np.nan) for h in range(n_horizons)] for p in players], dtype=np.float64
+        ).reshape(self.n, n_horizons)
+        self.predicted = ~np.isnan(raw)
+        self.points = np.nan_to_num(raw)
+        # Dominance input: a missing prediction never dominates, so excluding unpredicted players keeps
+        # the pruned model valid
+        self._dominance_points = np.where(self.predicted, self.points, -INF)
+        # (N, horizons) prediction spread (s1..sN from preprocess_data), NaN where 03-ml wrote none
+        self.std = np.array(
+            [[p.get(f"s{h + 1}", np.nan) for h in range(n_horizons)] for p in players], dtype=np.float64
+        ).reshape(self.n, n_horizons)
+
+        self.config_constraints = config_constraints
+        self.solver_options = solver_options or {}
+        self.total_players = config_constraints["max_players"]
+        self.starting_players = config_constraints["starting_players"]
+        self.bench_cost = config_constraints["bench_cost_modifier"]
+
+        # Index groups, built once: {position: [i...]} and each player's club index
+        self.positions = {}
+        for i, p in enumerate(players):
+            self.positions.setdefault(p["position"], []).append(i)
+        team_ids = {}
+        self.team_of = np.array([team_ids.setdefault(p["team"], len(team_ids)) for p in players], dtype=np.int64)
+
+        if prune_dominated and self.n:
+            self.dominated = dominated_players(
+                self._dominance_points, self.price, self.positions, self.team_of, config_constraints
+            )
+            print(f"  Dominance pruning: {int(self.dominated.sum())}/{self.n} players "
+                  f"({self.dominated.mean():.0%}) left out of the model")
+        else:
+            self.dominated = np.zeros(self.n, dtype=bool)
+        self.kept = np.flatnonzero(~self.dominated)
+
+        self.prune_dominated = prune_dominated
+        self._dominated_by_periods = {1: self.dominated}
+
+        self._lock = threading.Lock()
+        self._free_models = {"kept": [self._build(self.kept)]}  # "all": every player, built on first need
+
+    def dominated_mask(self, periods: int):
+        # dominated_players() for a plan over `periods` gameweeks (cached per session)
+        if periods not in self._dominated_by_periods:
+            if self.prune_dominated and self.n:
+                mask = dominated_players(
+                    self._dominance_points, self.price, self.positions, self.team_of, self.config_constraints, periods
+                )
+            else:
+                mask = np.zeros(self.n, dtype=bool)
+            self._dominated_by_periods[periods] = mask
+        return self._dominated_by_periods[periods]
+
+    def unpredicted_mask(self, n_horizons: int):
+        # Bool mask over players: True = no prediction for at least one of the first n_horizons horizons
+        return ~self.predicted[:, :n_horizons].all(axis=1)
+
+    def _build(self, cols: np.ndarray):
+        # Model over players `cols` (sorted player indices).
+        cfg = self.config_constraints
+        m = len(cols)
+        sel = np.arange(m)
+        start = m
+        extra = 2 * m
+        team_of = self.team_of[cols]
+        position_of = {position: np.flatnonzero(np.isin(cols, members)) for position, members in self.positions.items()}
+
+        rows = []  # (lower, upper, [cols], [values])
+        rows.append((-INF, 0.0, sel, self.price[cols]))                                  # budget (RHS per request)
+        rows.append((self.total_players, self.total_players, sel, np.ones(m)))
+        rows.append((self.starting_players, self.starting_players, start + sel, np.ones(m)))  # 15 for bench_boost
+        for k in range(m):
+            rows.append((-INF, 0.0, [start + k, k], [1.0, -1.0]))                        # starter_i <= selected_i
+        for team in np.unique(team_of):
+            members = np.flatnonzero(team_of == team)
+            rows.append((-INF, cfg["max_players_per_team"], members, np.ones(len(members))))
+        total_limit = cfg["position_total_limit"]
+        starting_min = cfg["position_starting_min"]
+        for position, members in position_of.items():
+            rows.append((starting_min[position], total_limit[position], members, np.ones(len(members))))
+        for position, members in position_of.items():
+            rows.append((starting_min[position], INF, start + members, np.ones(len(members))))
+        # extra_transfers + sum(owned selected) >= total_players - free_transfers; owned coefficients set per request
+        row_transfers = len(rows)
+        rows.append((-INF, INF, [extra], [1.0]))
+
+        lp = highspy.HighsLp()
+        lp.num_col_ = 2 * m + 1
+        lp.num_row_ = len(rows)
+        lp.sense_ = highspy.ObjSense.kMaximize
+        lp.col_cost_ = np.zeros(lp.num_col_)
+        lp.col_lower_ = np.zeros(lp.num_col_)
+        lp.col_upper_ = np.append(np.ones(2 * m), INF)
+        lp.integrality_ = [highspy.HighsVarType.kInteger] * (2 * m) + [highspy.HighsVarType.kContinuous]
+        lp.row_lower_ = np.array([r[0] for r in rows], dtype=np.float64)
+        lp.row_upper_ = np.array([r[1] for r in rows], dtype=np.float64)
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+        lp.a_matrix_.num_col_ = lp.num_col_
+        lp.a_matrix_.num_row_ = lp.num_row_
+        lp.a_matrix_.start_ = np.cumsum([0] + [len(r[2]) for r in rows]).astype(np.int32)
+        lp.a_matrix_.index_ = np.concatenate([np.asarray(r[2], dtype=np.int32) for r in rows])
+        lp.a_matrix_.value_ = np.concatenate([np.asarray(r[3], dtype=np.float64) for r in rows])
+
+        highs = highspy.Highs()
+        highs.setOptionValue("output_flag", False)
+        highs.passModel(lp)
+        for name, value in self.solver_options.items():
+            highs.setOptionValue(name, value)
+        return _Model(highs, np.asarray(cols), row_transfers)
+
+    def objective(self, gw_weights: list[float], chip: str | None, transfer_penalty: bool, cols=None, weighted=None):
+        # Column costs for one request (maximised), over players `cols` (default: every player).
+        #   bench_boost: every selected player scores.
+        #   otherwise:   starters score; bench priced at bench_cost per £m.
+        # Hits cost HIT_COST each whenever transfer_penalty (bench_boost does not waive them).
+        # weighted: (N,) points per player instead of the horizon-weighted predictions (robust mode).
+        cols = np.arange(self.n) if cols is None else cols
+        m = len(cols)
+        if weighted is None:
+            weighted = self.points[cols, :len(gw_weights)] @ np.asarray(gw_weights, dtype=np.float64)
+        else:
+            weighted = weighted[cols]
+        price = self.price[cols]
+        cost = np.zeros(2 * m + 1)
+        if chip == "bench_boost":
+            cost[:m] = weighted
+        else:
+            # starter*pts - eps*(selected - starter)*price
+            cost[:m] = -self.bench_cost * price
+            cost[m:2 * m] = weighted + self.bench_cost * price
+        cost[2 * m] = -HIT_COST if transfer_penalty else 0.0
+        return cost
+
+    def solve(
+        self,
+        gw_weights: list[float],
+        budget: float,
+        chip: str | None,
+        locked_players,
+        existing_opta_codes,
+        free_transfers: int,
+        limits: dict | None = None,
+        excluded_players=None,
+    ):
+        # Returns {"status", "error_message", "selected": [player idx], "starters": [player idx],
+        #          "objective", "bound", "gap"}. limits: {"time_limit", "mip_rel_gap"} (None = HiGHS default).
+        # excluded_players: opta codes that must not be selected.
+        request = self._request(chip, locked_players, existing_opta_codes, excluded_players, len(gw_weights))
+        model = self._acquire(request)
+        try:
+            return self._solve(model, gw_weights, budget, chip, free_transfers, limits, **request)
+        finally:
+            self._release(model)
+
+    def solve_pool(
+        self,
+        gw_weights: list[float],
+        budget: float,
+        chip: str | None,
+        locked_players,
+        existing_opta_codes,
+        free_transfers: int,
+        k: int,
+        time_budget: float | None = None,
+        limits: dict | None = None,
+        excluded_players=None,
+    ):
+        # The k best distinct squads (different 15), best first: solve(), then a no-good cut
+        #   sum(selected_i for i in previous squad) <= len(squad) - 1
+        # and re-solve the same model, warm-started with a feasible neighbour of the previous squad
+        # (_neighbour). The cuts are removed before the model goes back to the free list.
+        # Squads come back sorted by objective: within mip_rel_gap a later solve can beat an earlier one.
+        # time_budget: seconds for all k solves (each gets what is left, at most limits["time_limit"]).
+        # Returns (solve() results, complete): stops when no further squad exists (complete) or at the time
+        # budget (not complete). A first solve that finds nothing is returned as the only result.
+        request = self._request(
+            chip, locked_players, existing_opta_codes, excluded_players, len(gw_weights), pool=True
+        )
+        model = self._acquire(request)
+        h = model.highs
+        first_cut = h.getNumRow()
+        deadline = None if time_budget is None else time.monotonic() + time_budget
+        results, complete, seen = [], True, set()
+        try:
+            self._prepare(model, gw_weights, budget, chip, free_transfers, request["locked"], request["existing"],
+                          request["excluded"], request["transfer_penalty"])
+            cost = self.objective(gw_weights, chip, request["transfer_penalty"], model.cols)
+            for _ in range(k):
+                run_limits = dict(limits or {})
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        complete = False
+                        break
+                    cap = run_limits.get("time_limit")
+                    run_limits["time_limit"] = remaining if cap is None else min(cap, remaining)
+                result = self._run(model, run_limits)
+                if result["status"] not in ("optimal", "feasible"):
+                    if not results:
+                        results.append(result)
+                    complete = result["status"] != "time_limit"
+                    break
+                results.append(result)
+
+                # cut on the 15 selected: a new XI or captain from the same squad is not an alternative squad
+                squad = np.array([model.column[i] for i in result["selected"]], dtype=np.int32)
+                seen.add(frozenset(squad.tolist()))
+                h.addRow(-INF, len(squad) - 1, len(squad), squad, np.ones(len(squad)))
+                start = self._neighbour(model, h, cost, budget, free_transfers, request["transfer_penalty"], seen)
+                if start is not None:
+                    solution = highspy.HighsSolution()
+                    solution.col_value = start.tolist()
+                    solution.value_valid = True
+                    h.setSolution(solution)
+        finally:
+            n_cuts = h.getNumRow() - first_cut
+            if n_cuts:
+                h.deleteRows(n_cuts, np.arange(first_cut, first_cut + n_cuts, dtype=np.int32))
+            self._release(model)
+        results.sort(key=lambda r: -INF if r["objective"] is None else r["objective"], reverse=True)
+        return results, complete
+
+    def _neighbour(self, model: _Model, h, cost, budget, free_transfers, transfer_penalty, seen: set):
+        # Previous solution with its least costly one-player swap: same position, same starter flag, within
+        # budget and the club limit, locks and exclusions kept, and not a squad already returned (`seen`,
+        # column sets) — so it satisfies every cut so far. A feasible incumbent close to the previous objective.
+        values = np.asarray(h.getSolution().col_value)
+        m = model.m
+        selected = values[:m] > 0.5
+        starter = values[m:2 * m] > 0.5
+        price = self.price[model.cols]
+        team = self.team_of[model.cols]
+        position = np.array([self.players[i]["position"] for i in model.cols])
+        spare = budget - price[selected].sum()
+        club_count = np.bincount(team[selected], minlength=int(team.max()) + 1)
+        club_open = club_count[team] < self.config_constraints["max_players_per_team"]
+        owned = np.zeros(m, dtype=bool)
+        owned[model.owned] = True
+        lower = self.total_players - free_transfers
+        extra = max(0.0, lower - owned[selected].sum()) if transfer_penalty else values[2 * m]
+
+        can_leave = selected.copy()
+        can_leave[model.locked] = False
+        can_join = ~selected
+        can_join[model.excluded] = False
+        squad = set(np.flatnonzero(selected).tolist())
+        best = None
+        for a in np.flatnonzero(can_leave):
+            joins = np.flatnonzero(can_join & (position == position[a]) & (price - price[a] <= spare + 1e-9)
+                                   & ((team == team[a]) | club_open))
+            if not len(joins):
+                continue
+            gain = cost[joins] - cost[a] + starter[a] * (cost[m + joins] - cost[m + a])
+            if transfer_penalty:
+                n_owned = owned[selected].sum() - owned[a] + owned[joins]
+                gain += cost[2 * m] * (np.maximum(0.0, lower - n_owned) - extra)
+            for j in np.argsort(-gain, kind="stable"):
+                if best is not None and gain[j] <= best[0]:
+                    break
+                if frozenset(squad - {int(a)} | {int(joins[j])}) not in seen:
+                    best = (gain[j], a, joins[j])
+                    break
+        if best is None:
+            return None
+        _, a, b = best
+        start = values.copy()
+        start[a], start[b] = 0.0, 1.0
+        start[m + a], start[m + b] = 0.0, float(starter[a])
+        if transfer_penalty:
+            start[2 * m] = max(0.0, lower - (owned[selected].sum() - owned[a] + owned[b]))
+        return start
+
+    def solve_scenarios(
+        self,
+        gw_weights: list[float],
+        budget: float,
+        chip: str | None,
+        locked_players,
+        existing_opta_codes,
+        free_transfers: int,
+        scenarios: np.ndarray,
+        objective: str = "cvar",
+        alpha: float = 0.2,
+        risk_weight: float = 0.5,
+        candidates: int | None = None,
+        cheapest: int = 0,
+        limits: dict | None = None,
+        excluded_players=None,
+    ):
+        # Robust squad: scenarios (S, N) are horizon-weighted points per scenario (scenarios.sample_scenarios).
+        #   "mean": sample average. The objective is linear, so this is the deterministic model with each
+        #           player's scenario mean — no extra rows.
+        #   "cvar": (1 - risk_weight) * sample mean + risk_weight * CVaR_alpha of the scoring players' total,
+        #           Rockafellar-Uryasev: + eta - sum(u_s) / (alpha * S), u_s >= eta - total_s, u_s >= 0
+        #           (one dense row per scenario over the starter columns, S + 1 extra columns).
+        # Model size:
+        #   - players dominated in every scenario are left out (dominated_players on the (N, S) matrix — exact,
+        #     both objectives only improve when a scenario total does); excluded players never dominate
+        #   - candidates: per position, only the `candidates` best by scenario mean plus the `cheapest`
+        #     cheapest (budget enablers) — a heuristic cap; None = no cap
+        #   - owned and locked players are always in
+        # The "mean" squad is solved first on the same model and warm-starts the CVaR solve (eta = its VaR).
+        # Returns solve()'s dict plus "scenario_mean" / "scenario_cvar" of the chosen squad's total.
+        request = self._request(chip, locked_players, existing_opta_codes, excluded_players, len(gw_weights))
+        n_scenarios = scenarios.shape[0]
+        sample_mean = scenarios.mean(axis=0)
+        outcomes = scenarios.T.copy()
+        outcomes[request["excluded"]] = -INF
+        keep = ~dominated_players(outcomes, self.price, self.positions, self.team_of, self.config_constraints)
+        if candidates is not None:
+            capped = np.zeros(self.n, dtype=bool)
+            for members in self.positions.values():
+                members = np.asarray(members)[keep[members]]
+                capped[members[np.argsort(-sample_mean[members], kind="stable")[:candidates]]] = True
+                value = sample_mean[members] / self.price[members]
+                capped[members[np.argsort(-value, kind="stable")[:candidates]]] = True
+                capped[members[np.lexsort((-sample_mean[members], self.price[members]))[:cheapest]]] = True
+            keep &= capped
+        cols = np.union1d(np.flatnonzero(keep), request["existing"] + request["locked"]).astype(np.int64)
+        model = self._build(cols)
+        prepare = (model, gw_weights, budget, chip, free_transfers, request["locked"], request["existing"],
+                   request["excluded"], request["transfer_penalty"])
+
+        self._prepare(*prepare, sample_mean)
+        result = self._run(model, limits)
+        weight = risk_weight if objective == "cvar" else 0.0
+        if weight > 0 and result["selected"]:
+            h = model.highs
+            m = model.m
+            start = np.asarray(h.getSolution().col_value)
+            scoring = np.arange(m) if chip == "bench_boost" else m + np.arange(m)
+            totals = scenarios[:, cols] @ start[scoring]
+            eta_start = np.sort(totals)[max(1, int(np.ceil(alpha * n_scenarios))) - 1]
+
+            self._prepare(*prepare, (1.0 - weight) * sample_mean)
+            eta = h.getNumCol()
+            h.addCols(1 + n_scenarios,
+                      np.concatenate([[weight], np.full(n_scenarios, -weight / (alpha * n_scenarios))]),
+                      np.concatenate([[-INF], np.zeros(n_scenarios)]), np.full(1 + n_scenarios, INF),
+                      0, np.array([], dtype=np.int32), np.array([], dtype=np.int32), np.array([], dtype=np.float64))
+            # eta - u_s - sum_k outcome[s, k] * scoring_k <= 0
+            index = np.column_stack([
+                np.full(n_scenarios, eta), eta + 1 + np.arange(n_scenarios), np.tile(scoring, (n_scenarios, 1)),
+            ]).astype(np.int32)
+            values = np.column_stack([np.ones(n_scenarios), -np.ones(n_scenarios), -scenarios[:, cols]])
+            h.addRows(n_scenarios, np.full(n_scenarios, -INF), np.zeros(n_scenarios), index.size,
+                      np.arange(n_scenarios, dtype=np.int32) * index.shape[1], index.ravel(), values.ravel())
+
+            solution = highspy.HighsSolution()
+            solution.col_value = np.concatenate([start, [eta_start], np.maximum(0.0, eta_start - totals)]).tolist()
+            solution.value_valid = True
+            h.setSolution(solution)
+            result = self._run(model, limits)
+
+        if result["selected"]:
+            scored = result["selected"] if chip == "bench_boost" else result["starters"]
+            totals = scenarios[:, scored].sum(axis=1)
+            result["scenario_mean"] = float(totals.mean())
+            result["scenario_cvar"] = cvar(totals, alpha)
+        else:
+            result["scenario_mean"] = result["scenario_cvar"] = None
+        result["model_players"] = model.m
+        return result
+
+    def _request(self, chip, locked_players, existing_opta_codes, excluded_players, n_horizons: int,
+                 pool: bool = False):
+        # Player indices of one request, plus the columns its model needs (None = the shared pruned model).
+        # "excluded" also holds players without a prediction for one of the request's horizons (not owned).
+        existing = [self.index[c] for c in (existing_opta_codes or []) if c in self.index]
+        locked = [self.index[c] for c in (locked_players or []) if c in self.index]
+        excluded = [self.index[c] for c in (excluded_players or []) if c in self.index]
+        unpredicted = self.unpredicted_mask(n_horizons)
+        unpredicted[existing] = False
+        # wildcard and free_hit are exempt from hits
+        transfer_penalty = bool(existing_opta_codes) and chip not in ("wildcard", "free_hit")
+
+        # Pruning assumes every dominator is available and only the optimum is wanted: excluding a player or
+        # asking for runner-up squads (a second-best squad may hold a dominated player) needs every player.
+        cols = None
+        if self.dominated.any() and (pool or excluded):
+            cols = np.arange(self.n)
+        else:
+            # Owned/locked players that were pruned need their own model; everyone else shares the prebuilt one
+            missing = sorted({i for i in existing + locked if self.dominated[i]})
+            if missing:
+                cols = np.union1d(self.kept, missing)
+        excluded = sorted(set(excluded) | set(np.flatnonzero(unpredicted).tolist()))
+        return {"locked": locked, "existing": existing, "excluded": excluded,
+                "transfer_penalty": transfer_penalty, "cols": cols}
+
+    def _acquire(self, request: dict):
+        # A model for the request's columns: the shared kept/all-player models come from a free list
+        # (built on demand when all are busy in other threads); any other column set is a throwaway model.
+        cols = request["cols"]
+        kind = "kept" if cols is None else "all" if len(cols) == self.n else None
+        if kind is None:
+            return self._build(cols)
+        with self._lock:
+            free = self._free_models.setdefault(kind, [])
+            model = free.pop() if free else None
+        if model is None:
+            model = self._build(self.kept if kind == "kept" else np.arange(self.n))
+        model.kind = kind
+        return model
+
+    def _release(self, model: _Model):
+        if model.kind is not None:
+            with self._lock:
+                self._free_models[model.kind].append(model)
+
+    def _solve(self, model: _Model, gw_weights, budget, chip, free_transfers, limits,
+               locked, existing, excluded, transfer_penalty, cols=None):
+        self._prepare(model, gw_weights, budget, chip, free_transfers, locked, existing, excluded, transfer_penalty)
+        return self._run(model, limits)
+
+    def _prepare(self, model: _Model, gw_weights, budget, chip, free_transfers, locked, existing, excluded,
+                 transfer_penalty, weighted=None):
+        # Sets one request's costs, right-hand sides and bounds on the model (any change here drops a
+        # solution passed with setSolution, so warm starts go in after it).
+        h = model.highs
+        m = model.m
+        existing = [model.column[i] for i in existing]
+        locked = [model.column[i] for i in locked]
+        excluded = [model.column[i] for i in excluded if i in model.column]
+
+        cost = self.objective(gw_weights, chip, transfer_penalty, model.cols, weighted)
+        h.changeColsCost(len(cost), np.arange(len(cost), dtype=np.int32), cost)
+        h.changeRowBounds(model.row_budget, -INF, float(budget))
+        starters = self.total_players if chip == "bench_boost" else self.starting_players
+        h.changeRowBounds(model.row_starters, starters, starters)
+
+        # Locks and exclusions: reset the previous request's, then force this one's
+        self._set_bounds(h, model.locked + model.excluded, 0.0, 1.0)
+        self._set_bounds(h, locked, 1.0, 1.0)
+        self._set_bounds(h, excluded, 0.0, 0.0)  # locked and excluded = infeasible
+        model.locked, model.excluded = locked, excluded
+
+        # Transfers row: coefficient 1 on owned players' selected_i
+        for k in set(model.owned) - set(existing):
+            h.changeCoeff(model.row_transfers, k, 0.0)
+        for k in set(existing) - set(model.owned):
+            h.changeCoeff(model.row_transfers, k, 1.0)
+        model.owned = existing
+        lower = self.total_players - free_transfers if transfer_penalty else -INF
+        h.changeRowBounds(model.row_transfers, lower, INF)
+
+    def _run(self, model: _Model, limits):
+        h = model.highs
+        m = model.m
+        apply_limits(h, limits)
+        status, error_message, info = run_status(h)
+        if info is None:
+            return {"status": status, "error_message": error_message, "selected": [], "starters": [],
+                    "objective": None, "bound": None, "gap": None}
+        values = np.asarray(h.getSolution().col_value)
+        return {
+            "status": status,
+            "error_message": error_message,
+            "selected": model.cols[np.flatnonzero(values[:m] > 0.5)].tolist(),
+            "starters": model.cols[np.flatnonzero(values[m:2 * m] > 0.5)].tolist(),
+            **info,
+        }
+
+    @staticmethod
+    def _set_bounds(highs, idx: list[int], lower: float, upper: float):
+        if idx:
+            k = len(idx)
+            highs.changeColsBounds(k, np.asarray(idx, dtype=np.int32), np.full(k, lower), np.full(k, upper))
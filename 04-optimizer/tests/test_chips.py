@@ -0,0 +1,139 @@
+# Chip scoring (chips.py) on hand-built optimize responses, and on squads solved by the session (highspy, no DB).
+# Run from 04-optimizer: python -m pytest -q tests
+# Version: 1.1.0
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from chips import NO_CHIP, rank_variants, score_variant
+from optimizer import select_squad
+from session import HIT_COST, OptimizerSession
+
+CONSTRAINTS = {
+    "max_players": 15,
+    "starting_players": 11,
+    "max_players_per_team": 3,
+    "position_total_limit": {"GKP": 2, "DEF": 5, "MID": 5, "FWD": 3},
+    "position_starting_min": {"GKP": 1, "DEF": 3, "MID": 3, "FWD": 2},
+    "bench_cost_modifier": 0.01,
+}
+POSITIONS = ["GKP"] * 2 + ["DEF"] * 5 + ["MID"] * 5 + ["FWD"] * 3
+USER_INPUT = {"existing_squad": None, "free_transfers": 1}
+
+
+def response(pts_by_player, starters, captain):
+    # pts_by_player: 15 lists of per-gameweek points, in POSITIONS order.
+    return {
+        "status": "optimal",
+        "error_message": None,
+        "transfers_in": None,
+        "squad": {"squad": [
+            {
+                "position": position,
+                "is_starter": j in starters,
+                "is_captain": j == captain,
+                "expected_pts": [{"gw": 30 + k, "pts": pts} for k, pts in enumerate(pts_by_player[j])],
+            }
+            for j, position in enumerate(POSITIONS)
+        ]},
+    }
+
+
+def score(chip, resp):
+    return score_variant(chip, resp, USER_INPUT, None, CONSTRAINTS, horizon=3)
+
+
+# XI: 1 GKP, 4 DEF, 4 MID, 2 FWD at 5 pts a week; bench: GKP, DEF, MID, FWD at 1 pt in the chip week
+# and 4 pts afterwards — worth less than any starter, so the later-week XI is unchanged.
+XI = [0, 2, 3, 4, 5, 7, 8, 9, 10, 12, 13]
+PTS = [[5.0, 5.0, 5.0] if j in XI else [1.0, 4.0, 4.0] for j in range(15)]
+
+
+def test_bench_boost_counts_bench_in_chip_week_only():
+    # The session returns all 15 as starters on bench_boost.
+    result = score("bench_boost", response(PTS, starters=set(range(15)), captain=0))
+    chip_week = 11 * 5 + 4 * 1 + 5       # all 15 + captain
+    later_weeks = 2 * (11 * 5 + 5)       # best XI + its best player as captain
+    assert result["expected_pts"] == chip_week + later_weeks
+
+
+def test_bench_boost_does_not_win_on_later_week_bench_points():
+    no_chip = score(None, response(PTS, starters=set(XI), captain=0))
+    bench_boost = score("bench_boost", response(PTS, starters=set(range(15)), captain=0))
+    ranked = rank_variants([no_chip, bench_boost])
+    # bench boost gains exactly the bench's chip-week 4 pts, not its 8 pts from later weeks too
+    assert ranked[0]["chip"] == "bench_boost"
+    assert bench_boost["gain_vs_no_chip"] == 4.0
+
+    # a blank chip-week bench (0 pts) gains nothing, however much it scores later
+    pts = [p if j in XI else [0.0, 4.0, 4.0] for j, p in enumerate(PTS)]
+    no_chip = score(None, response(pts, starters=set(XI), captain=0))
+    bench_boost = score("bench_boost", response(pts, starters=set(range(15)), captain=0))
+    assert bench_boost["expected_pts"] == no_chip["expected_pts"]
+    assert rank_variants([no_chip, bench_boost])[0]["chip"] == NO_CHIP
+
+
+def test_bench_boost_later_weeks_pick_best_legal_xi():
+    # In week 2 the bench goalkeeper and forward outscore their starters: the XI starts both, the
+    # captain is one of them, and week 3 falls back to the original XI.
+    pts = [list(p) for p in PTS]
+    pts[1] = [1.0, 9.0, 0.0]    # bench GKP
+    pts[14] = [1.0, 9.0, 0.0]   # bench FWD
+    result = score("bench_boost", response(pts, starters=set(range(15)), captain=0))
+    chip_week = 11 * 5 + 4 * 1 + 5
+    week_2 = 9 * 5 + 9 + 9 + 9          # two 5-pt starters dropped for the 9s, one 9 captained
+    week_3 = 11 * 5 + 5
+    assert result["expected_pts"] == chip_week + week_2 + week_3
+
+
+def solved_pool(n_teams=20):
+    rng = np.random.default_rng(3)
+    players, code = [], 0
+    for team in range(n_teams):
+        for position, count in (("GKP", 2), ("DEF", 5), ("MID", 5), ("FWD", 3)):
+            for _ in range(count):
+                code += 1
+                players.append({
+                    "opta_code": code, "web_name": f"p{code}", "team": f"T{team}", "position": position,
+                    "price": float(rng.integers(40, 100)) / 10, "predicted_gameweek_id": 30,
+                    "h1": float(rng.uniform(0, 8)),
+                })
+    return players
+
+
+def test_bench_boost_is_solved_and_scored_with_hits_on_an_existing_squad():
+    players = solved_pool()
+    session = OptimizerSession(players, CONSTRAINTS)
+    # a legal existing squad picked without looking at points: the first player of each position
+    # from teams T0.., as many teams as the position needs
+    existing = []
+    for position, count in CONSTRAINTS["position_total_limit"].items():
+        members = [p for p in players if p["position"] == position]
+        for team in range(count):
+            existing.append(next(p["opta_code"] for p in members if p["team"] == f"T{team}"))
+    budget = sum(p["price"] for p in players if p["opta_code"] in existing) + 0.5
+    user_input = {"existing_squad": [{"opta_code": c, "locked": False} for c in existing], "free_transfers": 1}
+
+    def solve(chip):
+        squad, transfers_in, _, hits, status, error, mip = select_squad(
+            players, [1.0], budget, chip, [], set(existing), 1, CONSTRAINTS, session=session)
+        response = {"status": status, "error_message": error, "squad": squad, "transfers_in": transfers_in}
+        return score_variant(chip, response, user_input, session, CONSTRAINTS, horizon=1), mip
+
+    no_chip, _ = solve(None)
+    bench_boost, mip = solve("bench_boost")
+    assert bench_boost["status"] == "optimal" and bench_boost["transfer_hits"] > 0
+
+    # solved by the rule it is scored by: all 15 score in the chip week, HIT_COST per transfer beyond the free one
+    squad = bench_boost["result"]["squad"]["squad"]
+    captain = next(p["expected_pts"][0]["pts"] for p in squad if p["is_captain"])
+    assert abs(bench_boost["expected_pts_after_hits"] - captain - mip["objective"]) < 0.05
+
+    # the no-chip squad (all 15 playing, its hits paid) is a feasible bench-boost squad
+    kept = no_chip["result"]["squad"]["squad"]
+    no_chip_all_15 = sum(p["expected_pts"][0]["pts"] for p in kept) - HIT_COST * no_chip["transfer_hits"]
+    assert mip["objective"] >= no_chip_all_15 - 0.05
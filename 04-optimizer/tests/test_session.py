@@ -0,0 +1,62 @@
+# OptimizerSession (session.py) on a small synthetic pool — needs highspy, no DB.
+# Run from 04-optimizer: python -m pytest -q tests
+# Version: 1.0.0
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from session import OptimizerSession
+
+CONSTRAINTS = {
+    "max_budget": 100,
+    "max_players": 15,
+    "starting_players": 11,
+    "max_players_per_team": 3,
+    "position_total_limit": {"GKP": 2, "DEF": 5, "MID": 5, "FWD": 3},
+    "position_starting_min": {"GKP": 1, "DEF": 3, "MID": 3, "FWD": 2},
+    "bench_cost_modifier": 0.01,
+}
+STAR = 1000   # opta_code of a MID with a big h1 and no h2 prediction
+
+
+def pool():
+    rng = np.random.default_rng(0)
+    players, code = [], 0
+    for team in range(10):
+        for position, count in (("GKP", 2), ("DEF", 3), ("MID", 3), ("FWD", 2)):
+            for _ in range(count):
+                code += 1
+                players.append({
+                    "opta_code": code, "team": f"T{team}", "position": position,
+                    "price": float(rng.integers(40, 80)) / 10,
+                    "h1": float(rng.uniform(1, 6)), "h2": float(rng.uniform(1, 6)),
+                })
+    players.append({"opta_code": STAR, "team": "T10", "position": "MID", "price": 6.0, "h1": 20.0})
+    return players
+
+
+def selected_codes(session, result):
+    return {session.players[i]["opta_code"] for i in result["selected"]}
+
+
+def test_unpredicted_player_is_not_picked_for_that_horizon():
+    session = OptimizerSession(pool(), CONSTRAINTS)
+    one_week = session.solve([1.0], 100.0, None, [], [], 1)
+    two_weeks = session.solve([1.0, 0.8], 100.0, None, [], [], 1)
+    assert one_week["status"] == two_weeks["status"] == "optimal"
+    assert STAR in selected_codes(session, one_week)
+    assert STAR not in selected_codes(session, two_weeks)
+
+
+def test_unpredicted_player_already_owned_can_be_kept():
+    session = OptimizerSession(pool(), CONSTRAINTS)
+    squad = sorted(selected_codes(session, session.solve([1.0], 100.0, None, [], [], 1)))
+    budget = sum(session.price[session.index[c]] for c in squad)
+    kept = session.solve([1.0, 0.8], budget, None, [], squad, 1)
+    assert kept["status"] == "optimal"
+    assert STAR in selected_codes(session, kept)
+
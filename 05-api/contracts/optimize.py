@@ -1,6 +1,8 @@
 #Declaring a pydantic api contract
 #optimize route
-from pydantic import BaseModel
+from typing import Literal
+
+from pydantic import BaseModel, Field
 from decimal import Decimal
 
 class SquadRequest(BaseModel):
@@ -13,12 +15,31 @@ class ChipsRequest(BaseModel):
     bench_boost: bool
     triple_captain: bool
 
+# Optional per-request solve limits; unset fields fall back to config solver.limits (planner.limits for plans)
+class SolveLimitsRequest(BaseModel):
+    time_limit: float | None = Field(default=None, gt=0)
+    mip_rel_gap: float | None = Field(default=None, ge=0)
+
+# Robust mode: optimise over sampled outcomes instead of point predictions; unset fields use config robust
+class RobustRequest(BaseModel):
+    objective: Literal["mean", "cvar"] | None = None
+    alpha: float | None = Field(default=None, gt=0, le=1)
+    risk_weight: float | None = Field(default=None, ge=0, le=1)
+    scenarios: int | None = Field(default=None, ge=10)
+
 class OptimizeRequest(BaseModel):
     existing_squad: list[SquadRequest] | None
     chips: ChipsRequest
     bank: float
     free_transfers: int
     horizon: int
+    limits: SolveLimitsRequest | None = None
+    excluded_players: list[int] | None = None  # opta codes the squad must not contain
+    robust: RobustRequest | None = None
+
+# POST /optimize/alternatives — the k best distinct squads (default/max: solver.pool in config)
+class AlternativesRequest(OptimizeRequest):
+    k: int | None = Field(default=None, ge=1)
 
 class PointsResponse(BaseModel):
     gw: int
@@ -48,6 +69,14 @@ class SquadWrapper(BaseModel):
 class TransfersWrapper(BaseModel):
     transfers: list[TransferResponse]
 
+class RobustResponse(BaseModel):
+    objective: str
+    alpha: float
+    risk_weight: float
+    scenarios: int
+    scenario_mean: float | None  # squad's expected points over the scenarios
+    scenario_cvar: float | None  # mean of its worst alpha share of scenarios
+
 class OptimizeResponse(BaseModel):
     status: str
     horizon: int
@@ -55,4 +84,104 @@ class OptimizeResponse(BaseModel):
     error_message: str | None
     squad: SquadWrapper
     transfers_in: TransfersWrapper | None
-    transfers_out: TransfersWrapper | None
\ No newline at end of file
+    transfers_out: TransfersWrapper | None
+    cached: bool = False
+    # is_optimal False: best squad found within the time limit; objective/bound/gap say how close it is
+    is_optimal: bool = True
+    objective: float | None = None
+    bound: float | None = None
+    gap: float | None = None
+    robust: RobustResponse | None = None
+
+# POST /optimize/plan — multi-gameweek transfer plan (04-optimizer/planner.py). No chips.
+class PlanRequest(BaseModel):
+    existing_squad: list[SquadRequest] | None
+    bank: float
+    free_transfers: int
+    horizon: int
+    limits: SolveLimitsRequest | None = None
+
+class PlanSquadResponse(BaseModel):
+    club: str
+    name: str
+    price: Decimal
+    position: str
+    opta_code: int
+    is_captain: bool
+    is_starter: bool
+    pts: Decimal
+
+class PlanGameweekResponse(BaseModel):
+    gw: int
+    free_transfers: int | None
+    transfers: int
+    hits: int
+    expected_pts: Decimal
+    expected_pts_after_hits: Decimal
+    squad: list[PlanSquadResponse]
+    transfers_in: TransfersWrapper
+    transfers_out: TransfersWrapper
+
+class PlanResponse(BaseModel):
+    status: str
+    horizon: int
+    solve_time_ms: int
+    error_message: str | None
+    is_optimal: bool = True
+    mip_gap: float | None
+    expected_pts: Decimal
+    transfer_hits: int
+    expected_pts_after_hits: Decimal
+    gameweeks: list[PlanGameweekResponse]
+
+# POST /optimize/chips — the request solved with each chip and without one (04-optimizer/chips.py).
+# chips: the chips still available to compare (all false or omitted = every chip).
+class ChipCompareRequest(BaseModel):
+    existing_squad: list[SquadRequest] | None
+    chips: ChipsRequest | None = None
+    bank: float
+    free_transfers: int
+    horizon: int
+    limits: SolveLimitsRequest | None = None
+    excluded_players: list[int] | None = None
+    robust: RobustRequest | None = None
+
+class ChipVariantResponse(BaseModel):
+    chip: str
+    rank: int | None
+    status: str
+    error_message: str | None
+    expected_pts: Decimal | None
+    transfer_hits: int | None
+    expected_pts_after_hits: Decimal | None
+    gain_vs_no_chip: Decimal | None
+    result: OptimizeResponse | None
+
+class ChipCompareResponse(BaseModel):
+    status: str
+    horizon: int
+    solve_time_ms: int
+    error_message: str | None
+    best_chip: str | None
+    variants: list[ChipVariantResponse]
+
+class AlternativeResponse(BaseModel):
+    rank: int
+    status: str
+    is_optimal: bool
+    objective: float
+    delta: float  # objective minus the best squad's
+    gap: float | None
+    transfer_hits: int
+    squad: SquadWrapper
+    transfers_in: TransfersWrapper | None
+    transfers_out: TransfersWrapper | None
+
+class AlternativesResponse(BaseModel):
+    status: str
+    horizon: int
+    solve_time_ms: int
+    error_message: str | None
+    k: int
+    alternatives: list[AlternativeResponse]
+    cached: bool = False
\ No newline at end of file
@@ -1,9 +1,18 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from routers import gameweek, players, optimize
 from fastapi.middleware.cors import CORSMiddleware
 from config import ALLOWED_ORIGINS
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # expire the optimizer's cached player pool when 03-ml/predict.py writes new predictions
+    optimize.start_invalidation_listener()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -1,20 +1,76 @@
 #POST /optimize — runs the FPL squad optimizer and returns the selected squad, transfers, and solve metadata
-# Version: 1.0.0
+# Version: 1.7.0
+import json
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "04-optimizer"))
 
-from main_runner import run_optimizer  # type: ignore
+from main_runner import (cache_stats, compare_chips, run_alternatives, run_optimizer, run_planner,  # type: ignore
+                         start_invalidation_listener)
+from batch import solve_batch  # type: ignore
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from fastapi.concurrency import run_in_threadpool
-from contracts.optimize import OptimizeRequest, OptimizeResponse
+from contracts.optimize import (AlternativesRequest, AlternativesResponse, ChipCompareRequest, ChipCompareResponse,
+                                OptimizeRequest, OptimizeResponse, PlanRequest, PlanResponse)
 
 router = APIRouter()
 
 @router.post("/optimize")
 async def optimize(body: OptimizeRequest):
+    # feasible = best squad within the time limit (is_optimal false); time_limit = none found in time
     response = await run_in_threadpool(run_optimizer, body.model_dump())
-    if response["status"] != "optimal":
+    if response["status"] == "time_limit":
+        raise HTTPException(status_code=504, detail=response["error_message"])
+    if response["status"] not in ("optimal", "feasible"):
         raise HTTPException(status_code=400, detail=response.get("error_message", "infeasible team"))
 
     return OptimizeResponse(**response)
+
+@router.post("/optimize/plan")
+async def optimize_plan(body: PlanRequest):
+    # feasible still returns the best plan found (is_optimal + mip_gap tell the client)
+    response = await run_in_threadpool(run_planner, body.model_dump())
+    if response["status"] == "time_limit":
+        raise HTTPException(status_code=504, detail=response["error_message"])
+    if response["status"] not in ("optimal", "feasible"):
+        raise HTTPException(status_code=400, detail=response.get("error_message") or "infeasible team")
+
+    return PlanResponse(**response)
+
+@router.post("/optimize/alternatives")
+async def optimize_alternatives(body: AlternativesRequest):
+    # best first; fewer than k squads when no more exist or the time budget ran out (status feasible)
+    response = await run_in_threadpool(run_alternatives, body.model_dump())
+    if response["status"] == "time_limit":
+        raise HTTPException(status_code=504, detail=response["error_message"])
+    if not response["alternatives"]:
+        raise HTTPException(status_code=400, detail=response.get("error_message") or "infeasible team")
+
+    return AlternativesResponse(**response)
+
+@router.post("/optimize/chips")
+async def optimize_chips(body: ChipCompareRequest):
+    # every variant solved concurrently from the same player pool; ranked best first by expected_pts_after_hits
+    user_input = body.model_dump()
+    user_input["chips"] = user_input["chips"] or {}
+    response = await run_in_threadpool(compare_chips, user_input)
+    if response["best_chip"] is None:
+        raise HTTPException(status_code=400, detail=response.get("error_message") or "infeasible team")
+
+    return ChipCompareResponse(**response)
+
+@router.post("/optimize/batch")
+def optimize_batch(body: list[OptimizeRequest]):
+    # NDJSON, one line per request as it completes: {"index": i, ...OptimizeResponse fields}.
+    # Failed requests stream as status != optimal instead of failing the batch.
+    def lines():
+        for index, response in solve_batch([request.model_dump() for request in body], triggered_by="api"):
+            yield json.dumps({"index": index, **response}, default=str) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.get("/optimize/cache")
+def optimize_cache():
+    # hit/miss counters of the result, session and player-pool caches
+    return cache_stats()